@@ -0,0 +1,46 @@
+# backend/src/aplicativo_web/aceite.py
+"""Aceite de solicitações de coleta por coletores, seguro sob concorrência."""
+
+from django.db import transaction
+
+from .models import SolicitacaoColeta
+from .transicoes import NAO_ENCONTRADA, aplicar_transicao
+
+ACEITA = 'aceita'
+INDISPONIVEL = 'indisponivel'
+
+
+def aceitar_solicitacao(pk, coletor_id):
+    """Tenta aceitar a solicitação `pk` para o coletor.
+
+    `UPDATE ... WHERE id = pk AND status = 'SOLICITADA'`: o banco serializa os
+    concorrentes na própria linha e só um deles vê 1 linha afetada, sem leitura prévia
+    e gravando apenas as colunas alteradas (e a linha do histórico, no mesmo comando).
+    Retorna ACEITA, INDISPONIVEL ou NAO_ENCONTRADA.
+    """
+    if aplicar_transicao(pk, 'SOLICITADA', 'ACEITA', 'aceite', coletor_id=coletor_id) is not None:
+        return ACEITA
+    if SolicitacaoColeta.objects.filter(pk=pk).exists():
+        return INDISPONIVEL
+    return NAO_ENCONTRADA
+
+
+def aceitar_proxima(coletor_id, ponto, raio_m):
+    """Aceita a solicitação disponível mais próxima do ponto e retorna seu id (ou None).
+
+    A candidata é a mais próxima ainda livre, com `FOR UPDATE SKIP LOCKED`: coletores disputando
+    ao mesmo tempo pulam as linhas já reservadas e cada um leva uma solicitação diferente.
+    """
+    with transaction.atomic():
+        pk = (
+            SolicitacaoColeta.objects
+            .filter(status='SOLICITADA')
+            .proximas_de(ponto, raio_m)
+            .select_for_update(skip_locked=True, of=('self',))
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if pk is None:
+            return None
+        aplicar_transicao(pk, 'SOLICITADA', 'ACEITA', 'aceite_proxima', coletor_id=coletor_id)
+    return pk
@@ -1,8 +1,14 @@
 from django.contrib import admin
-from .models import Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta
+from .models import Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta, TarefaGeocodificacao, CacheGeocodificacao, VolumeResiduoDiario, Avaliacao, LancamentoPontos, Recompensa
 
 admin.site.register(Produtor)
 admin.site.register(Coletor)
 admin.site.register(Cooperativa)
 admin.site.register(SolicitacaoColeta)
 admin.site.register(ItemColeta)
+admin.site.register(TarefaGeocodificacao)
+admin.site.register(CacheGeocodificacao)
+admin.site.register(VolumeResiduoDiario)
+admin.site.register(Avaliacao)
+admin.site.register(LancamentoPontos)
+admin.site.register(Recompensa)
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class Aplicativo_webConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'aplicativo_web'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from . import metricas, rastreamento, vouchers
+        from .models import LISTAGEM_DO_MODELO, incrementar_listagem
+        vouchers.verificar_chave()
+        connection_created.connect(metricas.instalar_em_conexao, dispatch_uid='metricas_consultas')
+        connection_created.connect(rastreamento.instalar_em_conexao, dispatch_uid='rastreamento_consultas')
+        for modelo in LISTAGEM_DO_MODELO:
+            post_save.connect(incrementar_listagem, sender=modelo, dispatch_uid=f'versao_{modelo.__name__}_save')
+            post_delete.connect(incrementar_listagem, sender=modelo, dispatch_uid=f'versao_{modelo.__name__}_delete')
@@ -0,0 +1,63 @@
+# backend/src/aplicativo_web/assincrono.py
+"""Base das views assíncronas de leitura (ver `views`, seção "Leituras assíncronas").
+
+No ASGI, cada view DRF síncrona ocupa uma thread do executor do início ao fim, inclusive
+enquanto espera o banco. As variantes assíncronas rodam no event loop: a autenticação é
+CPU pura (o JWT já verificado vem do `cache_de_tokens`), as consultas usam a interface
+assíncrona do ORM e a thread só é ocupada durante cada consulta. `leitura_assincrona`
+reproduz o que o DRF faz em volta da view: autenticação, permissão por perfil e as
+respostas de erro (401 com `WWW-Authenticate`, 403, 404), com os mesmos corpos.
+"""
+
+import functools
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions
+
+from .authentication import CachedJWTAuthentication
+from .metricas import JSONRendererMedido
+
+
+def resposta_json(dados, status=200):
+    """Mesmo corpo e content-type que o `JSONRendererMedido` produz nas views DRF."""
+    return HttpResponse(JSONRendererMedido().render(dados), status=status,
+                        content_type=JSONRendererMedido.media_type)
+
+
+def resposta_erro(request, exc):
+    response = resposta_json({'detail': exc.detail}, status=exc.status_code)
+    if isinstance(exc, exceptions.NotAuthenticated):
+        response['WWW-Authenticate'] = CachedJWTAuthentication().authenticate_header(request)
+    return response
+
+
+def autenticar(request, permissao=None):
+    """Payload do token (ou None) e checagem de `permissao` (ex.: `IsProdutor`).
+
+    Token ausente ou inválido numa rota com permissão é 401; perfil errado é 403,
+    com a mensagem da permissão, como nas views DRF.
+    """
+    autenticado = CachedJWTAuthentication().authenticate(request)
+    request.auth = autenticado[1] if autenticado else None
+    if permissao is not None:
+        checagem = permissao()
+        if not checagem.has_permission(request, None):
+            if request.auth is None:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(checagem.message)
+    return request.auth
+
+
+def leitura_assincrona(permissao=None):
+    """Decora `async def view(request, payload, **kwargs)`: só GET/HEAD, autenticação e erros da API."""
+    def decorador(view):
+        @require_safe
+        @functools.wraps(view)
+        async def envolvida(request, *args, **kwargs):
+            try:
+                return await view(request, autenticar(request, permissao), *args, **kwargs)
+            except exceptions.APIException as exc:
+                return resposta_erro(request, exc)
+        return envolvida
+    return decorador
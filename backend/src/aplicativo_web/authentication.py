@@ -0,0 +1,104 @@
+# backend/src/aplicativo_web/authentication.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .rastreamento import span
+
+
+class UsuarioToken:
+    """Usuário da requisição montado só a partir do payload do token (sem consulta ao banco).
+
+    Produtor, Coletor e Cooperativa não são usuários do `django.contrib.auth`, então
+    `request.user` carrega apenas `pk` e `user_type`; o payload completo fica em `request.auth`.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.pk = self.id = payload.get('user_id')
+        self.user_type = payload.get('user_type')
+
+    def __str__(self):
+        return f"{self.user_type} #{self.pk}"
+
+
+class CacheDeTokens:
+    """LRU limitado de payloads já verificados, cada um válido até o `exp` do próprio token."""
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raw_token):
+        with self._lock:
+            item = self._itens.get(raw_token)
+            if item is None:
+                return None
+            payload, expira_em = item
+            if expira_em <= time.time():
+                del self._itens[raw_token]
+                return None
+            self._itens.move_to_end(raw_token)
+            return payload
+
+    def set(self, raw_token, payload):
+        expira_em = payload.get('exp')
+        if expira_em is None:
+            return
+        with self._lock:
+            self._itens[raw_token] = (payload, expira_em)
+            self._itens.move_to_end(raw_token)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+
+cache_de_tokens = CacheDeTokens(getattr(settings, 'JWT_CACHE_TAMANHO', 4096))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Autenticação JWT única da API.
+
+    O token é decodificado uma vez por requisição (o DRF guarda o resultado em
+    `request.user`/`request.auth`) e a verificação de assinatura é reaproveitada entre
+    requisições pelo `cache_de_tokens`. Token ausente ou inválido não derruba a
+    requisição: ela segue anônima e as permissões (`IsProdutor`, `IsColetor`,
+    `IsCooperativa`) decidem, usando `request.erro_token` como mensagem.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        with span('autenticacao'):
+            return self._autenticar(request, header)
+
+    def _autenticar(self, request, header):
+        try:
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+            payload = self.get_payload(raw_token.decode() if isinstance(raw_token, bytes) else raw_token)
+        except AuthenticationFailed as e:
+            detalhe = e.detail.get('detail', e.detail) if isinstance(e.detail, dict) else e.detail
+            request.erro_token = f"Token inválido ou expirado: {detalhe}"
+            return None
+        return UsuarioToken(payload), payload
+
+    def get_payload(self, raw_token):
+        payload = cache_de_tokens.get(raw_token)
+        if payload is None:
+            payload = dict(self.get_validated_token(raw_token).payload)
+            cache_de_tokens.set(raw_token, payload)
+        return payload
@@ -0,0 +1,66 @@
+# backend/src/aplicativo_web/avaliacoes.py
+"""Avaliações entre produtor e coletor ao fim de uma coleta confirmada."""
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Cast
+
+from .models import Avaliacao, Coletor, Produtor, SolicitacaoColeta
+
+AVALIADA = 'avaliada'
+JA_AVALIADA = 'ja_avaliada'
+NAO_CONFIRMADA = 'nao_confirmada'
+NAO_PARTICIPANTE = 'nao_participante'
+NAO_ENCONTRADA = 'nao_encontrada'
+
+# quem avalia -> (modelo avaliado, campo da solicitação com o avaliado, campo com o avaliador)
+LADOS = {
+    'produtor': (Coletor, 'coletor_id', 'produtor_id'),
+    'coletor': (Produtor, 'produtor_id', 'coletor_id'),
+}
+
+
+def aplicar_nota(modelo, pk, nota):
+    """Soma a nota à média do avaliado num único UPDATE.
+
+    Todas as expressões do SET leem os valores antigos da linha, e o UPDATE trava a
+    linha até o fim da transação: avaliações simultâneas se enfileiram e nenhuma se
+    perde, sem AVG sobre todas as notas nem leitura seguida de escrita em Python.
+    """
+    return modelo.objects.filter(pk=pk).update(
+        soma_avaliacoes=F('soma_avaliacoes') + nota,
+        total_avaliacoes=F('total_avaliacoes') + 1,
+        nota_avaliacao_atual=(
+            Cast(F('soma_avaliacoes') + Value(nota), DecimalField(max_digits=12, decimal_places=4))
+            / (F('total_avaliacoes') + 1)
+        ),
+    )
+
+
+def avaliar(solicitacao_id, avaliador, avaliador_id, nota, comentario=None):
+    """Registra a avaliação de `avaliador` ('produtor' ou 'coletor') numa solicitação.
+
+    Retorna (resultado, avaliado) com resultado AVALIADA, JA_AVALIADA, NAO_CONFIRMADA,
+    NAO_PARTICIPANTE ou NAO_ENCONTRADA, e avaliado a instância avaliada (só se AVALIADA).
+    """
+    modelo, campo_avaliado, campo_avaliador = LADOS[avaliador]
+    solicitacao = SolicitacaoColeta.objects.filter(pk=solicitacao_id).values(
+        'status', campo_avaliado, campo_avaliador).first()
+    if solicitacao is None:
+        return NAO_ENCONTRADA, None
+    if solicitacao[campo_avaliador] != avaliador_id:
+        return NAO_PARTICIPANTE, None
+    if solicitacao['status'] != 'CONFIRMADA' or solicitacao[campo_avaliado] is None:
+        return NAO_CONFIRMADA, None
+
+    try:
+        with transaction.atomic():
+            # a restrição única (solicitação, avaliador) barra a segunda avaliação do mesmo lado
+            Avaliacao.objects.create(solicitacao_id=solicitacao_id, avaliador=avaliador,
+                                     nota=nota, comentario=comentario)
+            aplicar_nota(modelo, solicitacao[campo_avaliado], nota)
+    except IntegrityError:
+        return JA_AVALIADA, None
+    avaliado = modelo.objects.only('nota_avaliacao_atual', 'total_avaliacoes').get(
+        pk=solicitacao[campo_avaliado])
+    return AVALIADA, avaliado
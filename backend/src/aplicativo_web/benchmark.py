@@ -0,0 +1,337 @@
+# backend/src/aplicativo_web/benchmark.py
+"""Benchmark de carga das rotas da API (`manage.py benchmark_api`).
+
+Cada cenário monta requisições reais (URL, corpo e token) para uma rota e é disparado
+por `clientes` threads simultâneas. Por padrão as requisições passam pelo `Client` de
+teste do Django dentro do processo: URLconf, middlewares, DRF e banco reais, sem a
+variação da rede. Com `url_base`, vão por HTTP a um servidor já rodando. Com `asgi`,
+os `clientes` são corrotinas num único event loop, passando pelo handler ASGI: é um
+worker do uvicorn/daphne, e as rotas `*_async` (views assíncronas) podem ser comparadas
+com as síncronas pela concorrência que um worker aguenta.
+O resultado de cada rota traz p50/p95/p99, média, máximo, requisições por segundo e a
+contagem por status HTTP.
+"""
+
+import asyncio
+import itertools
+import math
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .massa import SENHA_MASSA, ponto_aleatorio
+from .models import Coletor, Cooperativa, Produtor, SolicitacaoColeta
+
+
+def token_de_acesso(pk, user_type):
+    """Access token no mesmo formato do login, sem passar pela rota de login."""
+    refresh = RefreshToken()
+    refresh['user_id'] = pk
+    refresh['user_type'] = user_type
+    return str(refresh.access_token)
+
+
+def _amostra(rng, valores, n):
+    """Amostra reprodutível (mesma semente, mesma base, mesma amostra); ORDER BY random() não é."""
+    valores = list(valores.order_by('pk'))
+    return rng.sample(valores, min(n, len(valores)))
+
+
+class Cenario:
+    """Gera as requisições de uma rota. `preparar` roda uma vez, antes das threads."""
+    nome = None
+
+    def preparar(self, rng, requisicoes):
+        pass
+
+    def requisicao(self, rng):
+        """(método, path, corpo JSON ou None, token ou None)."""
+        raise NotImplementedError
+
+
+class _ComContas(Cenario):
+    modelo = user_type = None
+    amostra = 1000
+
+    def preparar(self, rng, requisicoes):
+        ids = _amostra(rng, self.modelo.objects.filter(email__startswith='massa-').values_list('pk', flat=True),
+                       self.amostra)
+        if not ids:
+            raise ValueError(f"Nenhum {self.user_type} da massa na base; rode com --semear.")
+        self.tokens = [token_de_acesso(pk, self.user_type) for pk in ids]
+
+
+class Login(Cenario):
+    nome = 'login'
+
+    def preparar(self, rng, requisicoes):
+        self.emails = _amostra(rng, Produtor.objects.filter(email__startswith='massa-p')
+                               .values_list('email', flat=True), 1000)
+        if not self.emails:
+            raise ValueError("Nenhum produtor da massa na base; rode com --semear.")
+
+    def requisicao(self, rng):
+        return 'POST', reverse('login'), {'email': rng.choice(self.emails), 'password': SENHA_MASSA}, None
+
+
+class _Leitura(_ComContas):
+    """GET numa rota sem parâmetros; `rota` é o nome no URLconf."""
+    rota = None
+
+    def requisicao(self, rng):
+        return 'GET', reverse(self.rota), None, rng.choice(self.tokens)
+
+
+class Disponiveis(_Leitura):
+    nome, rota = 'coletas_disponiveis', 'coletas-disponiveis'
+    modelo, user_type = Coletor, 'coletor'
+
+
+class DisponiveisProximas(_ComContas):
+    nome = 'coletas_disponiveis_proximas'
+    modelo, user_type = Coletor, 'coletor'
+
+    def requisicao(self, rng):
+        lat, lng = ponto_aleatorio(rng)
+        return 'GET', f"{reverse('coletas-disponiveis-proximas')}?lat={lat:.5f}&lng={lng:.5f}", None, \
+            rng.choice(self.tokens)
+
+
+class MinhasSolicitacoes(_Leitura):
+    nome, rota = 'coletas_minhas', 'minhas-solicitacoes'
+    modelo, user_type = Produtor, 'produtor'
+
+
+class MinhasSolicitacoesColetor(_Leitura):
+    nome, rota = 'coletas_minhas_coletor', 'minhas-solicitacoes-coletor'
+    modelo, user_type = Coletor, 'coletor'
+
+
+class Detalhe(_ComContas):
+    nome, rota = 'coleta_detalhe', 'coleta-detail'
+    modelo, user_type = Produtor, 'produtor'
+
+    def preparar(self, rng, requisicoes):
+        super().preparar(rng, requisicoes)
+        self.pks = _amostra(rng, SolicitacaoColeta.objects.values_list('pk', flat=True), 1000)
+        if not self.pks:
+            raise ValueError("Nenhuma solicitação na base; rode com --semear.")
+
+    def requisicao(self, rng):
+        return 'GET', reverse(self.rota, args=[rng.choice(self.pks)]), None, rng.choice(self.tokens)
+
+
+class Cooperativas(Cenario):
+    nome, rota = 'cooperativas', 'cooperativas-list'
+
+    def preparar(self, rng, requisicoes):
+        if not Cooperativa.objects.exists():
+            raise ValueError("Nenhuma cooperativa na base; rode com --semear.")
+
+    def requisicao(self, rng):
+        return 'GET', reverse(self.rota), None, None
+
+
+class Aceitar(_ComContas):
+    """Cada requisição aceita uma solicitação aberta diferente (a massa é consumida)."""
+    nome = 'coleta_aceitar'
+    modelo, user_type = Coletor, 'coletor'
+
+    def preparar(self, rng, requisicoes):
+        super().preparar(rng, requisicoes)
+        abertas = _amostra(rng, SolicitacaoColeta.objects.filter(status='SOLICITADA')
+                           .values_list('pk', flat=True), requisicoes)
+        if len(abertas) < requisicoes:
+            raise ValueError(f"Só há {len(abertas)} solicitações abertas para {requisicoes} aceites.")
+        self._abertas = iter(abertas)
+        self._lock = threading.Lock()
+
+    def requisicao(self, rng):
+        with self._lock:
+            pk = next(self._abertas)
+        return 'POST', reverse('coleta-aceitar', args=[pk]), None, rng.choice(self.tokens)
+
+
+def _assincrono(cenario):
+    """O mesmo cenário na variante assíncrona da rota (`<rota>-async`)."""
+    return type(f"{cenario.__name__}Assincrono", (cenario,),
+                {'nome': f"{cenario.nome}_async", 'rota': f"{cenario.rota}-async"})
+
+
+LEITURAS = (Disponiveis, MinhasSolicitacoes, MinhasSolicitacoesColetor, Detalhe, Cooperativas)
+CENARIOS = {c.nome: c for c in (Login, *LEITURAS, DisponiveisProximas, Aceitar, *map(_assincrono, LEITURAS))}
+
+
+class _ClienteProcesso:
+    def __init__(self):
+        # 'localhost' passa por ALLOWED_HOSTS em DEBUG sem configurar nada
+        self.client = Client(SERVER_NAME='localhost')
+
+    def enviar(self, metodo, path, corpo, token):
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if metodo == 'GET':
+            return self.client.get(path, **extra).status_code
+        return self.client.post(path, corpo or {}, content_type='application/json', **extra).status_code
+
+    def fechar(self):
+        connections.close_all()
+
+
+class _ClienteASGI:
+    def __init__(self):
+        self.client = AsyncClient(SERVER_NAME='localhost')
+
+    async def enviar(self, metodo, path, corpo, token):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        # como o ASGIHandler: as partes síncronas de cada requisição rodam numa thread
+        # própria, e as conexões abertas nela são fechadas no fim (CONN_MAX_AGE = 0)
+        async with ThreadSensitiveContext():
+            if metodo == 'GET':
+                response = await self.client.get(path, headers=headers)
+            else:
+                response = await self.client.post(path, corpo or {}, content_type='application/json',
+                                                  headers=headers)
+            await sync_to_async(connections.close_all)()
+        return response.status_code
+
+
+class _ClienteHTTP:
+    def __init__(self, url_base):
+        self.url_base = url_base.rstrip('/')
+        self.sessao = requests.Session()
+
+    def enviar(self, metodo, path, corpo, token):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return self.sessao.request(metodo, self.url_base + path, json=corpo, headers=headers, timeout=30).status_code
+
+    def fechar(self):
+        self.sessao.close()
+
+
+def percentil(ordenados, p):
+    """Percentil pelo método do posto mais próximo sobre uma lista já ordenada."""
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def resumir(latencias, status, duracao):
+    ordenadas = sorted(latencias)
+    ms = [v * 1000 for v in ordenadas]
+    return {
+        'requisicoes': len(ordenadas),
+        'erros': sum(n for codigo, n in status.items() if int(codigo) >= 500),
+        'status': dict(sorted(status.items())),
+        'rps': round(len(ordenadas) / duracao, 1) if duracao else None,
+        'p50_ms': round(percentil(ms, 50), 2),
+        'p95_ms': round(percentil(ms, 95), 2),
+        'p99_ms': round(percentil(ms, 99), 2),
+        'media_ms': round(statistics.fmean(ms), 2),
+        'max_ms': round(ms[-1], 2),
+    }
+
+
+def _rodar_asgi(cenario, total, clientes, seed, fase):
+    """`clientes` corrotinas num único event loop, dividindo `total` requisições."""
+    sequencia = itertools.count()
+    latencias, status = [], {}
+
+    async def trabalhar(indice):
+        rng = random.Random(f"{seed}:{fase}:{indice}")
+        cliente = _ClienteASGI()
+        while next(sequencia) < total:
+            metodo, path, corpo, token = cenario.requisicao(rng)
+            inicio = time.perf_counter()
+            codigo = str(await cliente.enviar(metodo, path, corpo, token))
+            latencias.append(time.perf_counter() - inicio)
+            status[codigo] = status.get(codigo, 0) + 1
+
+    async def principal():
+        await asyncio.gather(*(trabalhar(indice) for indice in range(clientes)))
+
+    inicio = time.perf_counter()
+    asyncio.run(principal())
+    return latencias, status, time.perf_counter() - inicio
+
+
+def executar_cenario(cenario, requisicoes, clientes, aquecimento=0, url_base=None, seed=42, asgi=False):
+    """Dispara `aquecimento` requisições descartadas e depois `requisicoes` medidas, com
+    `clientes` threads (ou corrotinas, com `asgi`) em ambas as fases.
+    """
+    cenario.preparar(random.Random(seed), requisicoes + aquecimento)
+
+    def rodar(total, fase):
+        if asgi:
+            return _rodar_asgi(cenario, total, clientes, seed, fase)
+        sequencia = itertools.count()
+        latencias, status = [], {}
+        lock = threading.Lock()
+
+        def trabalhar(indice):
+            rng = random.Random(f"{seed}:{fase}:{indice}")
+            cliente = _ClienteHTTP(url_base) if url_base else _ClienteProcesso()
+            medidas, codigos = [], {}
+            try:
+                while next(sequencia) < total:
+                    metodo, path, corpo, token = cenario.requisicao(rng)
+                    inicio = time.perf_counter()
+                    codigo = str(cliente.enviar(metodo, path, corpo, token))
+                    medidas.append(time.perf_counter() - inicio)
+                    codigos[codigo] = codigos.get(codigo, 0) + 1
+            finally:
+                cliente.fechar()
+            with lock:
+                latencias.extend(medidas)
+                for codigo, n in codigos.items():
+                    status[codigo] = status.get(codigo, 0) + n
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clientes) as executor:
+            list(executor.map(trabalhar, range(clientes)))
+        return latencias, status, time.perf_counter() - inicio
+
+    if aquecimento:
+        rodar(aquecimento, 'aquecimento')
+    return resumir(*rodar(requisicoes, 'medicao'))
+
+
+def comparar(anterior, atual):
+    """Variação percentual de p50/p95/p99 e rps por rota presente nos dois resultados."""
+    variacoes = {}
+    for nome, dados in atual['endpoints'].items():
+        base = anterior.get('endpoints', {}).get(nome)
+        if not base:
+            continue
+        variacoes[nome] = {
+            chave: round((dados[chave] - base[chave]) / base[chave] * 100, 1)
+            for chave in ('p50_ms', 'p95_ms', 'p99_ms', 'rps') if base.get(chave)
+        }
+    return variacoes
+
+
+def sincrona_vs_assincrona(endpoints):
+    """Para cada rota medida nas duas variantes (`<nome>` e `<nome>_async`, no mesmo número
+    de clientes), rps e p99 de cada uma e a razão de rps assíncrona/síncrona.
+    """
+    pares = {}
+    for chave, assincrona in endpoints.items():
+        nome, _, clientes = chave.partition('@')
+        if not nome.endswith('_async'):
+            continue
+        base = nome[:-len('_async')] + (f"@{clientes}" if clientes else '')
+        sincrona = endpoints.get(base)
+        if not sincrona:
+            continue
+        pares[base] = {
+            'rps_sincrona': sincrona['rps'], 'rps_assincrona': assincrona['rps'],
+            'rps_razao': round(assincrona['rps'] / sincrona['rps'], 2) if sincrona['rps'] else None,
+            'p99_sincrona_ms': sincrona['p99_ms'], 'p99_assincrona_ms': assincrona['p99_ms'],
+        }
+    return pares
@@ -0,0 +1,67 @@
+# backend/src/aplicativo_web/condicional.py
+"""GET condicional (ETag / Last-Modified) para as views de leitura."""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+class GetCondicionalMixin:
+    """Responde 304 sem serializar nada quando o recurso não mudou.
+
+    A view implementa `versao_recurso(request)`, uma consulta barata que retorna
+    `(marcador, ultima_alteracao)`, ou `(None, None)` se o recurso não existe. O ETag combina o marcador com a URL completa (cursor,
+    filtros) e o usuário, então listas diferentes nunca compartilham validador.
+    A verificação roda depois da autenticação/permissões do DRF.
+    """
+
+    def versao_recurso(self, request):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        marcador, ultima_alteracao = self.versao_recurso(request)
+        if marcador is None:
+            # recurso inexistente: deixa a view responder (404) sem validadores
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validadores(request, marcador, ultima_alteracao, getattr(request.user, 'pk', None))
+
+        nao_modificado = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if nao_modificado is not None:
+            response = nao_modificado
+        else:
+            response = super().get(request, *args, **kwargs)
+            aplicar_validadores(response, etag, last_modified)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+def validadores(request, marcador, ultima_alteracao, usuario_pk):
+    """(ETag, Last-Modified em segundos) de um recurso nesta URL para este usuário."""
+    chave = f"{marcador}|{request.get_full_path()}|{usuario_pk}"
+    etag = '"%s"' % hashlib.md5(chave.encode(), usedforsecurity=False).hexdigest()
+    return etag, (int(ultima_alteracao.timestamp()) if ultima_alteracao else None)
+
+
+def aplicar_validadores(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+async def responder_condicional(request, usuario_pk, versao, responder):
+    """O mesmo GET condicional para as views assíncronas (fora do DRF).
+
+    `versao` é o `(marcador, ultima_alteracao)` já lido; `responder` é a corrotina que
+    monta a resposta completa, só chamada quando o cliente não tem a versão atual.
+    """
+    marcador, ultima_alteracao = versao
+    if marcador is None:
+        return await responder()
+    etag, last_modified = validadores(request, marcador, ultima_alteracao, usuario_pk)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await responder()
+        aplicar_validadores(response, etag, last_modified)
+    patch_vary_headers(response, ['Authorization'])
+    return response
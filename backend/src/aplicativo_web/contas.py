@@ -0,0 +1,63 @@
+# backend/src/aplicativo_web/contas.py
+"""Resolução de contas de login entre Produtor, Coletor e Cooperativa."""
+
+from collections import namedtuple
+
+from django.db.models import Case, CharField, F, IntegerField, Q, Value, When
+from django.db.models.functions import Coalesce, NullIf
+
+from .models import Produtor, Coletor, Cooperativa
+
+Conta = namedtuple('Conta', ['user_type', 'pk', 'senha', 'nome'])
+
+# (modelo, user_type, campo de documento, campo de nome) na ordem de precedência do login
+TIPOS_DE_CONTA = (
+    (Produtor, 'produtor', 'cpf_cnpj', 'nome'),
+    (Coletor, 'coletor', 'cpf', 'nome'),
+    (Cooperativa, 'cooperativa', 'cnpj', 'nome_empresa'),
+)
+
+
+def _candidatos(modelo, user_type, campo_documento, campo_nome, ordem, identifier):
+    # Só anotações, e sempre na mesma ordem, para as colunas do UNION casarem
+    return (
+        modelo.objects
+        .filter(Q(email=identifier) | Q(**{campo_documento: identifier}))
+        .annotate(
+            c_pk=F('pk'),
+            c_senha=F('senha'),
+            c_nome=Coalesce(NullIf(F(campo_nome), Value('')), F('email'), output_field=CharField()),
+            c_tipo=Value(user_type, output_field=CharField()),
+            # email tem precedência sobre documento em qualquer tabela
+            c_prioridade=Case(When(email=identifier, then=Value(0)), default=Value(1),
+                              output_field=IntegerField()),
+            c_ordem=Value(ordem, output_field=IntegerField()),
+        )
+        .values_list('c_tipo', 'c_pk', 'c_senha', 'c_nome', 'c_prioridade', 'c_ordem')
+        .order_by()
+    )
+
+
+def _consulta(identifier):
+    ramos = [
+        _candidatos(modelo, user_type, campo_documento, campo_nome, ordem, identifier)
+        for ordem, (modelo, user_type, campo_documento, campo_nome) in enumerate(TIPOS_DE_CONTA)
+    ]
+    return ramos[0].union(*ramos[1:], all=True).order_by('c_prioridade', 'c_ordem')
+
+
+def resolver_conta(identifier):
+    """Encontra a conta de um identificador (email, CPF ou CNPJ) em uma única consulta.
+
+    Faz um UNION ALL das três tabelas, cada ramo servido pelos índices únicos de
+    email/documento, e fica com a primeira linha pela mesma precedência do login
+    original: email antes de documento, Produtor antes de Coletor antes de Cooperativa.
+    Retorna `Conta` ou None.
+    """
+    linha = _consulta(identifier).first()
+    return Conta(*linha[:4]) if linha is not None else None
+
+
+async def aresolver_conta(identifier):
+    linha = await _consulta(identifier).afirst()
+    return Conta(*linha[:4]) if linha is not None else None
@@ -0,0 +1,107 @@
+# backend/src/aplicativo_web/cooperativas.py
+"""Busca das cooperativas mais próximas de um ponto, com cache por célula de coordenadas.
+
+O ponto é arredondado para uma célula (`COOPERATIVAS_CELULA_GRAUS`); por célula e filtro
+de resíduos guardamos no cache do Django os candidatos mais próximos do centro da célula,
+obtidos pelo KNN sobre o índice GiST de `cooperativa.geom`. Cada requisição só recalcula
+as distâncias a partir do ponto real e reordena. Se a garantia geométrica de que os k
+primeiros estão entre os candidatos não vale (cooperativas esparsas), a consulta é feita
+direto no banco, sem cache.
+"""
+
+import math
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db.models import Q
+
+from .geo import DistanciaKNN, METROS_POR_GRAU, haversine_m
+from .models import Cooperativa
+
+K_MAXIMO = 20
+# Candidatos guardados por célula: folga para servir qualquer k <= K_MAXIMO da célula toda
+CANDIDATOS_POR_CELULA = 2 * K_MAXIMO
+CHAVE_VERSAO = 'cooperativas_proximas:versao'
+CAMPOS = ('id', 'nome_empresa', 'email', 'telefone', 'cep', 'rua', 'numero', 'bairro',
+          'cidade', 'estado', 'tipos_residuo_aceitos')
+
+
+def _versao():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        cache.add(CHAVE_VERSAO, 1, None)
+        versao = cache.get(CHAVE_VERSAO, 1)
+    return versao
+
+
+def invalidar_cooperativas_proximas():
+    """Descarta (por versão) todas as células cacheadas; chamar quando cooperativas mudam."""
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.add(CHAVE_VERSAO, 1, None)
+
+
+def _buscar(ponto, tipos, limite):
+    queryset = Cooperativa.objects.filter(geom__isnull=False)
+    if tipos:
+        # vazio = cooperativa não restringe o que recebe
+        queryset = queryset.filter(Q(tipos_residuo_aceitos__contains=tipos) | Q(tipos_residuo_aceitos=[]))
+    linhas = queryset.order_by(DistanciaKNN('geom', ponto)).values(*CAMPOS, 'geom')[:limite]
+    candidatos = []
+    for linha in linhas:
+        geom = linha.pop('geom')
+        candidatos.append({**linha, 'latitude': geom.y, 'longitude': geom.x})
+    return candidatos
+
+
+def _com_distancias(candidatos, lat, lng):
+    resultado = [
+        {**c, 'distancia_m': round(haversine_m(lat, lng, c['latitude'], c['longitude']), 1)}
+        for c in candidatos
+    ]
+    resultado.sort(key=lambda c: c['distancia_m'])
+    return resultado
+
+
+def _cobertos(candidatos, ordenados, k, centro, lat, lng):
+    """Os k primeiros a partir do ponto real estão garantidamente entre os candidatos?
+
+    Quem ficou de fora está, em graus, pelo menos tão longe do centro quanto o último
+    candidato (ordem do KNN). Convertendo essa distância para metros de forma pessimista
+    (pelo cosseno da latitude mais afastada do equador), se o k-ésimo resultado está mais
+    perto do ponto do que esse limite, nenhum não-candidato pode ultrapassá-lo.
+    """
+    if len(candidatos) < CANDIDATOS_POR_CELULA:
+        return True  # a célula já trouxe todas as cooperativas do filtro
+    ultimo = candidatos[-1]
+    graus = math.hypot(ultimo['latitude'] - centro[0], ultimo['longitude'] - centro[1])
+    cos_lat = max(math.cos(math.radians(min(abs(centro[0]) + graus, 90))), 0.0)
+    limite_m = graus * METROS_POR_GRAU * cos_lat - haversine_m(lat, lng, *centro)
+    return ordenados[k - 1]['distancia_m'] <= limite_m * 0.99
+
+
+def cooperativas_proximas(ponto, k, tipos=()):
+    """As `k` cooperativas geocodificadas mais próximas do ponto, com `distancia_m`.
+
+    `tipos` restringe às cooperativas que aceitam todos os tipos de resíduo informados.
+    """
+    k = min(max(k, 1), K_MAXIMO)
+    tipos = sorted(set(tipos))
+    lat, lng = ponto.y, ponto.x
+    celula = getattr(settings, 'COOPERATIVAS_CELULA_GRAUS', 0.01)
+    linha, coluna = math.floor(lat / celula), math.floor(lng / celula)
+    centro = ((linha + 0.5) * celula, (coluna + 0.5) * celula)
+
+    chave = f"cooperativas_proximas:{_versao()}:{celula}:{linha}:{coluna}:{','.join(tipos)}"
+    candidatos = cache.get(chave)
+    if candidatos is None:
+        ponto_centro = Point(centro[1], centro[0], srid=4326)
+        candidatos = _buscar(ponto_centro, tipos, CANDIDATOS_POR_CELULA)
+        cache.set(chave, candidatos, getattr(settings, 'COOPERATIVAS_CACHE_TTL', 300))
+
+    ordenados = _com_distancias(candidatos, lat, lng)
+    if len(ordenados) >= k and not _cobertos(candidatos, ordenados, k, centro, lat, lng):
+        ordenados = _com_distancias(_buscar(ponto, tipos, k), lat, lng)
+    return ordenados[:k]
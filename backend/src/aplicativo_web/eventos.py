@@ -0,0 +1,141 @@
+# backend/src/aplicativo_web/eventos.py
+"""Eventos de solicitações em tempo real (Server-Sent Events sobre ASGI).
+
+As views de escrita publicam `solicitacao_criada`, `solicitacao_aceita` e
+`status_alterado` após o commit; o broadcaster entrega cada evento às conexões abertas
+em `coletas/eventos/` cujo filtro (usuário e área) o aceita. O broadcaster padrão vive
+no processo (um worker ASGI); `EVENTOS_BROADCASTER` permite trocá-lo.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .geo import haversine_m
+from .models import SolicitacaoColeta
+
+logger = logging.getLogger(__name__)
+
+SOLICITACAO_CRIADA = 'solicitacao_criada'
+SOLICITACAO_ACEITA = 'solicitacao_aceita'
+STATUS_ALTERADO = 'status_alterado'
+
+
+class FiltroEventos:
+    """Decide quais eventos uma conexão recebe.
+
+    Produtor: só as próprias solicitações. Coletor: as que aceitou e, se houver ponto,
+    as que estão dentro do raio (sem ponto, todas). Cooperativa: só por área.
+    """
+
+    def __init__(self, user_type, user_id, ponto=None, raio_m=None):
+        self.user_type = user_type
+        self.user_id = user_id
+        self.ponto = ponto
+        self.raio_m = raio_m
+
+    def aceita(self, evento):
+        if self.user_type == 'produtor':
+            return evento['produtor_id'] == self.user_id
+        if self.user_type == 'coletor' and evento['coletor_id'] == self.user_id:
+            return True
+        if self.ponto is None:
+            return self.user_type == 'coletor'
+        if evento['lat'] is None:
+            return False
+        distancia = haversine_m(self.ponto.y, self.ponto.x, evento['lat'], evento['lng'])
+        return distancia <= self.raio_m
+
+
+class Assinatura:
+    def __init__(self, filtro, tamanho_fila):
+        self.filtro = filtro
+        self.loop = asyncio.get_running_loop()
+        self.fila = asyncio.Queue(maxsize=tamanho_fila)
+
+    def entregar(self, evento):
+        # roda no loop da conexão; cliente lento perde o evento mais antigo, não trava ninguém
+        if self.fila.full():
+            self.fila.get_nowait()
+        self.fila.put_nowait(evento)
+
+
+class BroadcasterEmProcesso:
+    """Distribui eventos para as assinaturas abertas neste processo.
+
+    `publicar` pode ser chamado de qualquer thread (views síncronas); a entrega é
+    agendada no event loop de cada conexão com `call_soon_threadsafe`.
+    """
+
+    def __init__(self):
+        self.tamanho_fila = getattr(settings, 'EVENTOS_TAMANHO_FILA', 100)
+        self._assinaturas = set()
+        self._lock = threading.Lock()
+
+    def assinar(self, filtro):
+        assinatura = Assinatura(filtro, self.tamanho_fila)
+        with self._lock:
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def tem_assinantes(self):
+        return bool(self._assinaturas)
+
+    def publicar(self, evento):
+        with self._lock:
+            destinos = [a for a in self._assinaturas if a.filtro.aceita(evento)]
+        for assinatura in destinos:
+            try:
+                assinatura.loop.call_soon_threadsafe(assinatura.entregar, evento)
+            except RuntimeError:
+                # loop já encerrado: conexão caiu sem passar pelo cancelar
+                self.cancelar(assinatura)
+
+
+@functools.lru_cache(maxsize=None)
+def _instanciar_broadcaster(backend):
+    return import_string(backend)()
+
+
+def get_broadcaster():
+    backend = getattr(settings, 'EVENTOS_BROADCASTER', 'aplicativo_web.eventos.BroadcasterEmProcesso')
+    return _instanciar_broadcaster(backend)
+
+
+def _publicar_agora(tipo, ids):
+    broadcaster = get_broadcaster()
+    if not broadcaster.tem_assinantes():
+        return
+    linhas = SolicitacaoColeta.objects.filter(pk__in=ids).values(
+        'id', 'status', 'produtor_id', 'coletor_id', 'produtor__geom')
+    for linha in linhas:
+        geom = linha.pop('produtor__geom')
+        broadcaster.publicar({
+            'tipo': tipo, **linha,
+            'lat': geom.y if geom else None, 'lng': geom.x if geom else None,
+        })
+
+
+def publicar_solicitacoes(tipo, ids):
+    """Publica um evento por solicitação depois do commit da transação corrente.
+
+    Os dados são lidos numa única consulta para o lote todo, e só se houver assinantes.
+    """
+    ids = list(ids)
+
+    def publicar():
+        try:
+            _publicar_agora(tipo, ids)
+        except Exception:
+            logger.exception("Falha ao publicar eventos %s", tipo)
+
+    transaction.on_commit(publicar)
@@ -0,0 +1,59 @@
+# backend/src/aplicativo_web/geo.py
+"""Helpers espaciais (PostGIS) compartilhados pelas views de busca por proximidade."""
+
+import math
+
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.geos import Point
+from django.db.models import FloatField, Func, Value
+
+# Metros por grau de latitude (aproximação esférica usada só no pré-filtro)
+METROS_POR_GRAU = 111_320.0
+
+
+class DistanciaKNN(Func):
+    """Operador KNN do PostGIS (`geom <-> ponto`).
+
+    Usado em `order_by` para que o PostgreSQL percorra o índice GiST em ordem de
+    proximidade e pare no LIMIT, em vez de calcular a distância de todas as linhas.
+    """
+    arg_joiner = ' <-> '
+    template = '(%(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, campo, ponto, **extra):
+        super().__init__(campo, Value(ponto, output_field=PointField(srid=4326)), **extra)
+
+
+def raio_em_graus(ponto, raio_m):
+    """Converte um raio em metros para graus, sempre para mais.
+
+    Em SRID 4326 o `dwithin` só aceita graus; como o grau de longitude encolhe com a
+    latitude, dividimos pelo cosseno para que o pré-filtro nunca perca pontos.
+    O corte exato em metros é feito depois com `distance_lte`.
+    """
+    cos_lat = max(math.cos(math.radians(ponto.y)), 0.01)
+    return raio_m / (METROS_POR_GRAU * cos_lat)
+
+
+def ponto_dos_parametros(params):
+    """Lê `lat`/`lng` da query string. Retorna None se ausentes; ValueError se inválidos."""
+    lat = params.get('lat')
+    lng = params.get('lng', params.get('lon'))
+    if lat in (None, '') or lng in (None, ''):
+        return None
+    lat, lng = float(lat), float(lng)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('Coordenadas fora do intervalo válido.')
+    return Point(lng, lat, srid=4326)
+
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Distância em metros entre dois pontos (lat/lon em graus) sobre a esfera."""
+    r = 6_371_000.0
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
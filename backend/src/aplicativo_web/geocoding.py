@@ -0,0 +1,331 @@
+# backend/src/aplicativo_web/geocoding.py
+"""Geocodificação de endereços e fila de geocodificação em segundo plano.
+
+O cadastro salva a conta imediatamente e apenas enfileira uma `TarefaGeocodificacao`;
+o worker (`manage.py processar_geocodificacao`) resolve as tarefas e preenche `geom`.
+O backend de geocodificação é configurável por `GEOCODER_BACKEND`; o padrão é o
+`GeocoderComCache`, que envolve o geocodificador real (`GEOCODER_UPSTREAM`).
+"""
+
+import functools
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .cooperativas import invalidar_cooperativas_proximas
+from .metricas import medir
+from .rastreamento import span
+from .models import Produtor, Cooperativa, SolicitacaoColeta, TarefaGeocodificacao, CacheGeocodificacao, VersaoListagem
+
+logger = logging.getLogger(__name__)
+
+# Tipos de conta com endereço completo que podem ser geocodificados
+MODELOS_GEOCODIFICAVEIS = {
+    'produtor': Produtor,
+    'cooperativa': Cooperativa,
+}
+
+
+class GeocodingIndisponivel(Exception):
+    """Falha transitória do geocodificador (rede, timeout, HTTP != 200); a tarefa é repetida."""
+
+
+class NominatimGeocoder:
+    url = "https://nominatim.openstreetmap.org/search"
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'GEOCODER_TIMEOUT', 5)
+        # política do Nominatim: no máximo 1 requisição por segundo
+        self.intervalo_minimo = getattr(settings, 'GEOCODER_INTERVALO_MINIMO', 1.0)
+        self._lock = threading.Lock()
+        self._ultima = 0.0
+
+    def _aguardar_vez(self):
+        with self._lock:
+            espera = self._ultima + self.intervalo_minimo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            self._ultima = time.monotonic()
+
+    def geocode(self, rua, numero, bairro, cidade, estado, cep):
+        """Retorna um Point (lon, lat) ou None se o endereço não for encontrado."""
+        endereco = f"{rua} {numero}, {bairro}, {cidade}, {estado}, {cep}, Brasil"
+        params = {"q": endereco, "format": "json", "limit": 1}
+        with medir('geocodificacao'), span('geocodificacao', backend='nominatim'):
+            self._aguardar_vez()
+            try:
+                r = requests.get(self.url, params=params, headers={"User-Agent": "ReciclaAi"},
+                                 timeout=self.timeout)
+            except requests.RequestException as e:
+                raise GeocodingIndisponivel(str(e)) from e
+
+        if r.status_code != 200:
+            raise GeocodingIndisponivel(f"HTTP {r.status_code}")
+        dados = r.json()
+        if not dados:
+            return None
+        return Point(float(dados[0]["lon"]), float(dados[0]["lat"]), srid=4326)
+
+
+class GeocoderLocal:
+    """Geocodificador determinístico e sem rede, para testes e desenvolvimento.
+
+    Deriva do CEP um ponto estável dentro do território brasileiro.
+    """
+
+    def geocode(self, rua, numero, bairro, cidade, estado, cep):
+        if not cep:
+            return None
+        h = hashlib.sha256(str(cep).encode()).digest()
+        lat = -33.0 + (h[0] << 8 | h[1]) / 65535 * 38.0    # -33 .. 5
+        lon = -73.0 + (h[2] << 8 | h[3]) / 65535 * 38.0    # -73 .. -35
+        return Point(lon, lat, srid=4326)
+
+
+# --- Cache de geocodificação ---
+
+ABREVIACOES = {
+    'r': 'rua', 'av': 'avenida', 'trav': 'travessa', 'tv': 'travessa', 'al': 'alameda',
+    'pca': 'praca', 'rod': 'rodovia', 'estr': 'estrada', 'q': 'quadra', 'qd': 'quadra',
+    'n': '', 'no': '', 'num': '', 'sn': 's/n',
+}
+
+
+def _normalizar_texto(valor):
+    texto = unicodedata.normalize('NFKD', str(valor or '')).encode('ascii', 'ignore').decode()
+    palavras = re.sub(r'[^a-z0-9/]+', ' ', texto.lower()).split()
+    return ' '.join(filter(None, (ABREVIACOES.get(p, p) for p in palavras)))
+
+
+def normalizar_endereco(rua, numero, bairro, cidade, estado, cep):
+    """Forma canônica do endereço: sem acento, caixa, pontuação ou abreviações de logradouro.
+
+    O bairro fica de fora de propósito: é o campo mais digitado de formas diferentes e
+    não muda o resultado quando CEP, rua e número coincidem.
+    """
+    cep = re.sub(r'\D', '', str(cep or ''))
+    partes = (cep, _normalizar_texto(rua), _normalizar_texto(numero),
+              _normalizar_texto(cidade), _normalizar_texto(estado))
+    return '|'.join(partes)
+
+
+class GeocoderComCache:
+    """Envolve o geocodificador real com três camadas.
+
+    1. LRU em memória com TTL (inclusive para "não encontrado", o cache negativo);
+    2. tabela `CacheGeocodificacao`, compartilhada entre processos e reinícios;
+    3. coalescência: buscas simultâneas da mesma chave esperam uma única chamada ao upstream.
+
+    Falhas transitórias (`GeocodingIndisponivel`) nunca são cacheadas.
+    """
+
+    def __init__(self, upstream=None):
+        self.upstream = upstream or import_string(
+            getattr(settings, 'GEOCODER_UPSTREAM', 'aplicativo_web.geocoding.NominatimGeocoder'))()
+        self.tamanho = getattr(settings, 'GEOCODE_CACHE_TAMANHO', 10000)
+        self.ttl = timedelta(seconds=getattr(settings, 'GEOCODE_CACHE_TTL', 30 * 86400))
+        self.ttl_negativo = timedelta(seconds=getattr(settings, 'GEOCODE_CACHE_TTL_NEGATIVO', 86400))
+        self._lru = OrderedDict()
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def geocode(self, rua, numero, bairro, cidade, estado, cep):
+        endereco = normalizar_endereco(rua, numero, bairro, cidade, estado, cep)
+        chave = hashlib.sha256(endereco.encode()).hexdigest()
+
+        with self._lock:
+            encontrado, ponto = self._lru_get(chave)
+            if encontrado:
+                return ponto
+            futuro = self._em_andamento.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_andamento[chave] = Future()
+
+        if not lider:
+            with span('geocodificacao_espera'):
+                return futuro.result()
+
+        try:
+            with span('geocodificacao_cache'):
+                ponto, expira_em = self._buscar(chave, endereco, rua, numero, bairro, cidade, estado, cep)
+        except BaseException as e:
+            with self._lock:
+                del self._em_andamento[chave]
+            futuro.set_exception(e)
+            raise
+        with self._lock:
+            self._lru_put(chave, ponto, expira_em)
+            del self._em_andamento[chave]
+        futuro.set_result(ponto)
+        return ponto
+
+    def _buscar(self, chave, endereco, rua, numero, bairro, cidade, estado, cep):
+        agora = timezone.now()
+        registro = CacheGeocodificacao.objects.filter(chave=chave).first()
+        if registro is not None and registro.expira_em > agora:
+            return registro.geom, registro.expira_em
+
+        ponto = self.upstream.geocode(rua, numero, bairro, cidade, estado, cep)
+        expira_em = agora + (self.ttl if ponto is not None else self.ttl_negativo)
+        CacheGeocodificacao.objects.update_or_create(
+            chave=chave,
+            defaults={'endereco_normalizado': endereco[:255], 'cep': endereco.split('|', 1)[0],
+                      'geom': ponto, 'expira_em': expira_em})
+        return ponto, expira_em
+
+    def _lru_get(self, chave):
+        entrada = self._lru.get(chave)
+        if entrada is None:
+            return False, None
+        ponto, expira_em = entrada
+        if expira_em <= timezone.now():
+            del self._lru[chave]
+            return False, None
+        self._lru.move_to_end(chave)
+        return True, ponto
+
+    def _lru_put(self, chave, ponto, expira_em):
+        self._lru[chave] = (ponto, expira_em)
+        self._lru.move_to_end(chave)
+        while len(self._lru) > self.tamanho:
+            self._lru.popitem(last=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _instanciar_geocoder(backend):
+    return import_string(backend)()
+
+
+def get_geocoder():
+    """Instância única por backend, para que LRU, coalescência e limite de taxa valham no processo todo."""
+    backend = getattr(settings, 'GEOCODER_BACKEND', 'aplicativo_web.geocoding.GeocoderComCache')
+    return _instanciar_geocoder(backend)
+
+
+def geocode_address(rua, numero, bairro, cidade, estado, cep):
+    return get_geocoder().geocode(rua, numero, bairro, cidade, estado, cep)
+
+
+# --- Fila de geocodificação ---
+
+
+def tipo_da_instancia(instancia):
+    for tipo, modelo in MODELOS_GEOCODIFICAVEIS.items():
+        if isinstance(instancia, modelo):
+            return tipo
+    raise ValueError(f"{type(instancia).__name__} não é geocodificável.")
+
+
+def enfileirar_geocodificacao(instancia):
+    """Agenda a geocodificação de um Produtor/Cooperativa (idempotente enquanto pendente)."""
+    tarefa, _ = TarefaGeocodificacao.objects.get_or_create(
+        tipo=tipo_da_instancia(instancia), objeto_id=instancia.pk, status='PENDENTE')
+    return tarefa
+
+
+def _backoff(tentativas):
+    base = getattr(settings, 'GEOCODING_BACKOFF_BASE', 30)
+    teto = getattr(settings, 'GEOCODING_BACKOFF_MAXIMO', 3600)
+    return timedelta(seconds=min(base * 2 ** (tentativas - 1), teto))
+
+
+def _reservada(tarefa):
+    """A tarefa enquanto ainda é deste worker: pendente e com a tentativa que ele reservou.
+    Se a reserva venceu e outro worker a pegou, `tentativas` já mudou.
+    """
+    return TarefaGeocodificacao.objects.filter(pk=tarefa.pk, status='PENDENTE', tentativas=tarefa.tentativas)
+
+
+def _concluir(tarefa, ponto, erro):
+    """Grava o resultado numa transação curta: a tarefa e o `geom` do registro juntos."""
+    modelo = MODELOS_GEOCODIFICAVEIS[tarefa.tipo]
+    with transaction.atomic():
+        if not _reservada(tarefa).update(status='CONCLUIDA', ultimo_erro=erro):
+            return
+        if ponto is None:
+            return
+        if tarefa.tipo == 'produtor':
+            # lat/lng do produtor aparecem nas listagens: invalida os ETags delas. Antes de
+            # travar o produtor, na mesma ordem das transições (versão, depois produtor).
+            VersaoListagem.objects.incrementar(VersaoListagem.SOLICITACOES)
+        # Atualiza só a coluna geom (e só se ninguém a preencheu nesse meio tempo)
+        atualizados = modelo.objects.filter(pk=tarefa.objeto_id, geom__isnull=True).update(geom=ponto)
+        if atualizados and tarefa.tipo == 'produtor':
+            SolicitacaoColeta.objects.filter(produtor_id=tarefa.objeto_id).update(atualizado_em=Now())
+        elif atualizados:
+            VersaoListagem.objects.incrementar(VersaoListagem.COOPERATIVAS)
+            transaction.on_commit(invalidar_cooperativas_proximas)
+
+
+def _executar(tarefa, geocoder):
+    """Lê o endereço e geocodifica, sem transação aberta (a chamada de rede pode demorar)."""
+    endereco = (
+        MODELOS_GEOCODIFICAVEIS[tarefa.tipo].objects.filter(pk=tarefa.objeto_id)
+        .values('rua', 'numero', 'bairro', 'cidade', 'estado', 'cep').first()
+    )
+    if endereco is None:
+        _concluir(tarefa, None, 'Registro removido antes da geocodificação.')
+        return
+    ponto = geocoder.geocode(**endereco)
+    _concluir(tarefa, ponto, None if ponto is not None else 'Endereço não encontrado.')
+
+
+def _reagendar(tarefa, erro, max_tentativas):
+    if tarefa.tentativas >= max_tentativas:
+        atualizados = _reservada(tarefa).update(status='FALHOU', ultimo_erro=str(erro)[:255])
+        if atualizados:
+            logger.warning("Geocodificação de %s #%s falhou: %s", tarefa.tipo, tarefa.objeto_id, erro)
+    else:
+        _reservada(tarefa).update(ultimo_erro=str(erro)[:255],
+                                  proxima_tentativa=timezone.now() + _backoff(tarefa.tentativas))
+
+
+def processar_tarefas(limite=50, geocoder=None):
+    """Processa até `limite` tarefas vencidas. Retorna quantas foram processadas.
+
+    As tarefas são reservadas numa transação curta (SELECT ... FOR UPDATE SKIP LOCKED),
+    que conta a tentativa e empurra `proxima_tentativa` para daqui a
+    `GEOCODING_RESERVA` segundos: outros workers não as pegam enquanto a reserva vale,
+    e um worker que morrer as devolve à fila quando ela vence. A geocodificação roda sem
+    transação aberta e cada resultado é gravado na sua própria transação, então nenhuma
+    trava (da tarefa ou do produtor/cooperativa) fica presa durante a chamada de rede.
+    Falhas transitórias são reagendadas com backoff exponencial até
+    `GEOCODING_MAX_TENTATIVAS`.
+    """
+    geocoder = geocoder or get_geocoder()
+    max_tentativas = getattr(settings, 'GEOCODING_MAX_TENTATIVAS', 5)
+    reserva = timedelta(seconds=getattr(settings, 'GEOCODING_RESERVA', 600))
+
+    with transaction.atomic():
+        tarefas = list(
+            TarefaGeocodificacao.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='PENDENTE', proxima_tentativa__lte=timezone.now())
+            .order_by('proxima_tentativa')[:limite]
+        )
+        TarefaGeocodificacao.objects.filter(pk__in=[tarefa.pk for tarefa in tarefas]).update(
+            tentativas=F('tentativas') + 1, proxima_tentativa=timezone.now() + reserva)
+
+    for tarefa in tarefas:
+        tarefa.tentativas += 1
+        try:
+            _executar(tarefa, geocoder)
+        except Exception as e:
+            _reagendar(tarefa, e, max_tentativas)
+    return len(tarefas)
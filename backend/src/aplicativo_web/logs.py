@@ -0,0 +1,89 @@
+# backend/src/aplicativo_web/logs.py
+"""Logs estruturados (uma linha JSON por registro) sem bloquear a requisição.
+
+`HandlerEmFila` só enfileira o registro; uma thread (`QueueListener`) formata e escreve
+no destino. Com a fila cheia o registro é descartado e contado, em vez de a requisição
+esperar pelo stdout. `FiltroRequisicao` acrescenta o id da requisição corrente.
+Configurado em `LOGGING` no settings.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+from .rastreamento import request_id_atual
+
+# atributos padrão de LogRecord; o resto veio de `extra=` e entra no JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+class FiltroRequisicao(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_atual()
+        return True
+
+
+class FormatadorJSON(logging.Formatter):
+    def format(self, record):
+        dados = {
+            'momento': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_info:
+            dados['excecao'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados['excecao'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class HandlerEmFila(logging.Handler):
+    """Enfileira os registros para uma thread que os escreve em `stream` (padrão stderr).
+
+    Os filtros rodam aqui, na thread da requisição (o id da requisição está na
+    ContextVar); a formatação roda na thread de escrita. Não herda de QueueHandler para
+    não cair no tratamento especial que o dictConfig dá a ele a partir do Python 3.12.
+    """
+
+    def __init__(self, tamanho=10000, stream=None):
+        super().__init__()
+        self.fila = queue.Queue(maxsize=tamanho)
+        self.descartados = 0
+        self.destino = logging.StreamHandler(stream or sys.stderr)
+        self.destino.setFormatter(FormatadorJSON())
+        self.listener = logging.handlers.QueueListener(self.fila, self.destino)
+        self.listener.start()
+
+    def close(self):
+        # chamado pelo logging.shutdown na saída: escreve o que ainda está na fila
+        if getattr(self.listener, '_thread', None) is not None:
+            self.listener.stop()
+        super().close()
+
+    def setFormatter(self, fmt):
+        # o formatador vale para o destino, que é quem formata
+        self.destino.setFormatter(fmt)
+
+    def emit(self, record):
+        # mensagem e exceção resolvidas antes de trocar de thread, numa cópia: outros
+        # handlers do mesmo registro ainda veem o original
+        try:
+            record = copy.copy(record)
+            record.msg, record.args = record.getMessage(), None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            self.fila.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+        except Exception:
+            self.handleError(record)
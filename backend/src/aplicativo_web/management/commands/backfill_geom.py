@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from aplicativo_web.geocoding import MODELOS_GEOCODIFICAVEIS, processar_tarefas
+from aplicativo_web.models import TarefaGeocodificacao
+
+
+class Command(BaseCommand):
+    help = "Enfileira a geocodificação de todos os produtores e cooperativas com `geom` nulo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Tamanho dos lotes de inserção na fila.')
+        parser.add_argument('--processar', action='store_true',
+                            help='Processa a fila em seguida, sem esperar o worker.')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        for tipo, modelo in MODELOS_GEOCODIFICAVEIS.items():
+            ids = modelo.objects.filter(geom__isnull=True).values_list('pk', flat=True)
+            candidatos = enfileirados = 0
+            buffer = []
+            for pk in ids.iterator(chunk_size=lote):
+                buffer.append(pk)
+                if len(buffer) >= lote:
+                    enfileirados += self._inserir(tipo, buffer)
+                    candidatos += len(buffer)
+                    buffer = []
+            if buffer:
+                enfileirados += self._inserir(tipo, buffer)
+                candidatos += len(buffer)
+            self.stdout.write(f"{tipo}: {enfileirados} registro(s) sem geom enfileirado(s) "
+                              f"({candidatos - enfileirados} já na fila).")
+
+        if options['processar']:
+            total = 0
+            while True:
+                processadas = processar_tarefas(limite=lote)
+                total += processadas
+                if not processadas:
+                    break
+            self.stdout.write(f"{total} tarefa(s) processada(s).")
+        self.stdout.write(self.style.SUCCESS("Backfill concluído."))
+
+    def _inserir(self, tipo, ids):
+        """Enfileira `ids` e retorna quantas tarefas entraram de fato.
+
+        ON CONFLICT DO NOTHING: quem já tem tarefa pendente é ignorado pelo índice único
+        parcial e não entra no `rowcount`.
+        """
+        tabela = TarefaGeocodificacao._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {tabela} (tipo, objeto_id, status, tentativas, proxima_tentativa, criada_em) "
+                f"SELECT %s, unnest(%s::integer[]), 'PENDENTE', 0, now(), now() ON CONFLICT DO NOTHING",
+                [tipo, ids])
+            return cursor.rowcount
@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from aplicativo_web.benchmark import CENARIOS, comparar, executar_cenario, sincrona_vs_assincrona
+from aplicativo_web.massa import massa_existente, semear_massa
+from aplicativo_web.models import Coletor, Cooperativa, ItemColeta, Produtor, SolicitacaoColeta
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Benchmark de carga das rotas da API com clientes concorrentes: p50/p95/p99 e "
+            "requisições por segundo por rota, salvos em JSON para comparar execuções.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semear', action='store_true',
+                            help='Cria a massa de dados antes, se ainda não existir.')
+        parser.add_argument('--produtores', type=int, default=100_000)
+        parser.add_argument('--coletores', type=int, default=2_000)
+        parser.add_argument('--cooperativas', type=int, default=500)
+        parser.add_argument('--itens', type=int, default=1_000_000)
+        parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+        parser.add_argument('--requisicoes', type=int, default=1000, help='Requisições medidas por rota.')
+        parser.add_argument('--aquecimento', type=int, default=50, help='Requisições descartadas por rota.')
+        parser.add_argument('--clientes', type=int, nargs='+', default=[8],
+                            help='Clientes concorrentes; com vários valores, cada rota roda em cada um '
+                                 '(resultado em <rota>@<clientes>).')
+        parser.add_argument('--asgi', action='store_true',
+                            help='Clientes como corrotinas num único event loop, pelo handler ASGI '
+                                 '(capacidade de um worker); compare <rota> com <rota>_async.')
+        parser.add_argument('--url', help='Servidor já rodando (ex.: http://localhost:8000); '
+                                          'sem ela, as requisições rodam no próprio processo.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--saida', help='Arquivo JSON do resultado (padrão: benchmark-<data>.json).')
+        parser.add_argument('--comparar', help='Resultado anterior para mostrar a variação.')
+
+    def handle(self, *args, **options):
+        # call_command(clientes=8) chega como int
+        niveis = options['clientes'] if isinstance(options['clientes'], list) else [options['clientes']]
+        if options['asgi'] and options['url']:
+            raise CommandError("--asgi mede no próprio processo; não combina com --url.")
+        if options['semear']:
+            if massa_existente():
+                self.stdout.write("Massa já existe; semeadura pulada.")
+            else:
+                criados = semear_massa(options['produtores'], options['coletores'], options['cooperativas'],
+                                       options['itens'], seed=options['seed'])
+                self.stdout.write(f"Massa criada: {criados}")
+
+        resultado = {
+            'gerado_em': timezone.now().isoformat(),
+            'commit': _commit(),
+            'modo': 'http' if options['url'] else ('asgi' if options['asgi'] else 'processo'),
+            'url': options['url'],
+            'clientes': niveis if len(niveis) > 1 else niveis[0],
+            'requisicoes': options['requisicoes'],
+            'seed': options['seed'],
+            'massa': {
+                'produtores': Produtor.objects.count(),
+                'coletores': Coletor.objects.count(),
+                'cooperativas': Cooperativa.objects.count(),
+                'itens': ItemColeta.objects.count(),
+                'solicitacoes_por_status': dict(
+                    SolicitacaoColeta.objects.order_by().values_list('status').annotate(n=Count('id'))),
+            },
+            'endpoints': {},
+        }
+
+        for clientes in niveis:
+            for nome in options['cenarios']:
+                try:
+                    dados = executar_cenario(CENARIOS[nome](), options['requisicoes'], clientes,
+                                             aquecimento=options['aquecimento'], url_base=options['url'],
+                                             seed=options['seed'], asgi=options['asgi'])
+                except ValueError as e:
+                    raise CommandError(f"{nome}: {e}")
+                chave = nome if len(niveis) == 1 else f"{nome}@{clientes}"
+                resultado['endpoints'][chave] = dados
+                self.stdout.write(
+                    f"{chave}: {dados['rps']} req/s, p50 {dados['p50_ms']} ms, p95 {dados['p95_ms']} ms, "
+                    f"p99 {dados['p99_ms']} ms, status {dados['status']}")
+
+        for chave, par in sincrona_vs_assincrona(resultado['endpoints']).items():
+            self.stdout.write(
+                f"{chave} síncrona x assíncrona: {par['rps_sincrona']} x {par['rps_assincrona']} req/s "
+                f"(razão {par['rps_razao']}), p99 {par['p99_sincrona_ms']} x {par['p99_assincrona_ms']} ms")
+
+        saida = Path(options['saida'] or f"benchmark-{timezone.now():%Y%m%d-%H%M%S}.json")
+        saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {os.fspath(saida)}"))
+
+        if options['comparar']:
+            anterior = json.loads(Path(options['comparar']).read_text())
+            for nome, variacao in comparar(anterior, resultado).items():
+                partes = ', '.join(f"{chave} {valor:+.1f}%" for chave, valor in variacao.items())
+                self.stdout.write(f"{nome} contra {options['comparar']}: {partes}")
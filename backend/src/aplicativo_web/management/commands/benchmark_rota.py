@@ -0,0 +1,52 @@
+import random
+import statistics
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from aplicativo_web.rotas import otimizar_rota
+
+
+class Command(BaseCommand):
+    help = ("Mede a otimização de rotas com paradas sintéticas (sem banco): tempo de cálculo "
+            "e quilômetros economizados em relação à ordem por -id.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paradas', type=int, default=200)
+        parser.add_argument('--repeticoes', type=int, default=5)
+        parser.add_argument('--raio-km', type=float, default=10.0,
+                            help='Meia largura da área das paradas.')
+        parser.add_argument('--janela-horas', type=float, default=3.0,
+                            help='Duração das janelas; 0 para janelas que nunca fecham.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        partida = timezone.now()
+        graus = options['raio_km'] / 111.32
+        tempos, distancias, originais, completas = [], [], [], 0
+
+        for _ in range(options['repeticoes']):
+            paradas = []
+            for i in range(options['paradas']):
+                if options['janela_horas']:
+                    inicio = partida + timedelta(hours=rng.uniform(0, 10))
+                    fim = inicio + timedelta(hours=options['janela_horas'])
+                else:
+                    inicio, fim = partida, partida + timedelta(days=7)
+                paradas.append({'id': i, 'lat': -5.09 + rng.uniform(-graus, graus),
+                                'lng': -42.80 + rng.uniform(-graus, graus), 'inicio': inicio, 'fim': fim})
+            rota = otimizar_rota(paradas, partida, (-5.09, -42.80))
+            tempos.append(rota['tempo_calculo_ms'])
+            distancias.append(rota['distancia_total_m'] / 1000)
+            originais.append(rota['distancia_ordem_original_m'] / 1000)
+            completas += rota['otimizacao_completa']
+
+        economia = 1 - sum(distancias) / sum(originais)
+        self.stdout.write(
+            f"{options['paradas']} paradas x {options['repeticoes']}: "
+            f"cálculo mediana {statistics.median(tempos):.1f} ms, máximo {max(tempos):.1f} ms; "
+            f"{statistics.mean(distancias):.1f} km contra {statistics.mean(originais):.1f} km "
+            f"na ordem original ({economia:.0%} a menos); "
+            f"2-opt convergiu em {completas}/{options['repeticoes']}.")
@@ -0,0 +1,38 @@
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from aplicativo_web.senhas import medir_verificacoes
+
+
+class Command(BaseCommand):
+    help = ("Mede logins por segundo (e por núcleo) da verificação de senha para cada número de "
+            "iterações do PBKDF2, para escolher SENHAS_PBKDF2_ITERACOES.")
+
+    def add_arguments(self, parser):
+        atual = getattr(settings, 'SENHAS_PBKDF2_ITERACOES', 1_000_000)
+        parser.add_argument('--iteracoes', type=int, nargs='+',
+                            default=sorted({100_000, 300_000, 600_000, 1_000_000, atual}))
+        parser.add_argument('--threads', type=int,
+                            default=getattr(settings, 'SENHAS_THREADS', None) or os.cpu_count() or 1,
+                            help='Verificações simultâneas (padrão: o tamanho do pool de senhas).')
+        parser.add_argument('--duracao', type=float, default=3.0, help='Segundos medidos por configuração.')
+        parser.add_argument('--saida', help='Salva o resultado em JSON.')
+
+    def handle(self, *args, **options):
+        atual = getattr(settings, 'SENHAS_PBKDF2_ITERACOES', 1_000_000)
+        resultados = []
+        for iteracoes in options['iteracoes']:
+            dados = medir_verificacoes(iteracoes, options['threads'], options['duracao'])
+            resultados.append(dados)
+            marca = ' (atual)' if iteracoes == atual else ''
+            self.stdout.write(
+                f"{iteracoes:>9} iterações{marca}: {dados['logins_por_segundo']} logins/s, "
+                f"{dados['logins_por_segundo_por_nucleo']} por núcleo, {dados['latencia_ms']} ms por login")
+        if options['saida']:
+            Path(options['saida']).write_text(json.dumps(
+                {'nucleos': os.cpu_count(), 'resultados': resultados}, indent=2, ensure_ascii=False))
+            self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {options['saida']}"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from aplicativo_web.models import Produtor
+from aplicativo_web.vouchers import PremioDesconhecido, emitir_vouchers, premio
+
+
+class Command(BaseCommand):
+    help = "Emite vouchers de uma campanha em massa, debitando os pontos de cada produtor."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--premio', required=True, help='Chave do prêmio em RECOMPENSAS_CATALOGO.')
+        parser.add_argument('--produtores', default='',
+                            help='Ids separados por vírgula.')
+        parser.add_argument('--todos-com-saldo', action='store_true',
+                            help='Todos os produtores com saldo para ao menos uma unidade.')
+        parser.add_argument('--quantidade', type=int, default=1, help='Vouchers por produtor.')
+        parser.add_argument('--lote', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            custo = premio(options['premio'])['custo_pontos']
+        except PremioDesconhecido:
+            raise CommandError(f"Prêmio desconhecido: {options['premio']}")
+
+        ids = [int(pk) for pk in options['produtores'].split(',') if pk.strip()]
+        if options['todos_com_saldo']:
+            ids += Produtor.objects.filter(saldo_pontos__gte=custo).values_list('pk', flat=True)
+        if not ids:
+            raise CommandError("Informe --produtores ou --todos-com-saldo.")
+
+        vouchers, sem_saldo = emitir_vouchers(
+            {pk: options['quantidade'] for pk in ids}, options['premio'], lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"{len(vouchers)} voucher(s) emitido(s)."))
+        if sem_saldo:
+            self.stdout.write(self.style.WARNING(f"{len(sem_saldo)} produtor(es) sem saldo suficiente."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from aplicativo_web.senhas import migrar_senhas_legadas
+
+
+class Command(BaseCommand):
+    help = ("Converte para hash as senhas ainda em texto puro. Opcional: o login já regrava "
+            "cada conta que entra; isto cobre as que não entram há tempo.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500)
+
+    def handle(self, *args, **options):
+        convertidas = migrar_senhas_legadas(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"Senhas convertidas: {convertidas}"))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from aplicativo_web.geocoding import processar_tarefas
+
+
+class Command(BaseCommand):
+    help = "Worker da fila de geocodificação: preenche `geom` de produtores e cooperativas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=50,
+                            help='Tarefas reservadas por lote.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Continua rodando, consultando a fila periodicamente.')
+        parser.add_argument('--intervalo', type=float, default=5.0,
+                            help='Segundos de espera quando a fila está vazia (com --loop).')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processadas = processar_tarefas(limite=options['limite'])
+            total += processadas
+            if processadas:
+                self.stdout.write(f"{processadas} tarefa(s) processada(s).")
+            if processadas < options['limite']:
+                if not options['loop']:
+                    break
+                time.sleep(options['intervalo'])
+        self.stdout.write(self.style.SUCCESS(f"Total: {total} tarefa(s)."))
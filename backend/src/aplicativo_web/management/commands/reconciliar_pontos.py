@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from aplicativo_web.pontos import corrigir_saldo, divergencias_de_saldo
+
+
+class Command(BaseCommand):
+    help = "Confere `saldo_pontos` de todos os produtores contra a soma do livro-razão de pontos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corrigir', action='store_true',
+                            help='Iguala os saldos divergentes à soma dos lançamentos.')
+
+    def handle(self, *args, **options):
+        divergentes = divergencias_de_saldo()
+        for produtor_id, saldo, soma in divergentes:
+            self.stdout.write(f"produtor #{produtor_id}: saldo {saldo}, lançamentos {soma}")
+            if options['corrigir']:
+                corrigir_saldo(produtor_id)
+
+        if not divergentes:
+            self.stdout.write(self.style.SUCCESS("Todos os saldos batem com o livro-razão."))
+        elif options['corrigir']:
+            self.stdout.write(self.style.SUCCESS(f"{len(divergentes)} saldo(s) corrigido(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(divergentes)} saldo(s) divergente(s); rode com --corrigir para ajustar."))
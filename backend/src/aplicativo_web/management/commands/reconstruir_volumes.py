@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from aplicativo_web.volumes import armazenados, calcular_volumes, divergencias, reconstruir_volumes
+
+
+class Command(BaseCommand):
+    help = "Recalcula os totais diários de volume (`volume_residuo_diario`) a partir dos itens."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true',
+                            help='Só compara os totais gravados com os calculados, sem alterar nada.')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Tamanho dos lotes de inserção.')
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            diferentes = divergencias(calcular_volumes(), armazenados())
+            for chave in diferentes[:20]:
+                self.stdout.write(f"divergente: {chave}")
+            estilo = self.style.WARNING if diferentes else self.style.SUCCESS
+            self.stdout.write(estilo(f"{len(diferentes)} total(is) divergente(s)."))
+            return
+
+        linhas = reconstruir_volumes(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"{linhas} total(is) diário(s) reconstruído(s)."))
@@ -0,0 +1,40 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aplicativo_web.massa import REFERENCIA, MassaJaExiste, semear_massa
+
+
+class Command(BaseCommand):
+    help = ("Gera uma massa sintética determinística (produtores, coletores, cooperativas, "
+            "solicitações e itens) com COPY, em volta de capitais brasileiras, sem geocodificar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--produtores', type=int, default=100_000)
+        parser.add_argument('--coletores', type=int, default=2_000)
+        parser.add_argument('--cooperativas', type=int, default=500)
+        parser.add_argument('--itens', type=int, default=1_000_000,
+                            help='Itens de coleta; as solicitações são cerca da metade.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=50_000, help='Linhas por bloco de COPY.')
+        parser.add_argument('--referencia', type=datetime.fromisoformat, default=REFERENCIA,
+                            help=f'Data de referência das coletas (padrão: {REFERENCIA.date()}).')
+
+    def handle(self, *args, **options):
+        if options['produtores'] < 1:
+            raise CommandError("--produtores deve ser pelo menos 1.")
+        referencia = options['referencia']
+        if referencia.tzinfo is None:
+            referencia = referencia.replace(tzinfo=timezone.utc)
+        inicio = time.perf_counter()
+        try:
+            criados = semear_massa(options['produtores'], options['coletores'], options['cooperativas'],
+                                   options['itens'], seed=options['seed'], lote=options['lote'],
+                                   referencia=referencia)
+        except MassaJaExiste as e:
+            raise CommandError(str(e))
+        decorrido = time.perf_counter() - inicio
+        linhas = sum(criados.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{linhas} linhas em {decorrido:.1f} s ({linhas / decorrido:,.0f} linhas/s): {criados}"))
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from aplicativo_web.transicoes import tempos_entre_status
+
+# (de, para) medidos por padrão: espera pelo aceite e tempo até a confirmação
+ETAPAS = (('SOLICITADA', 'ACEITA'), ('ACEITA', 'CONFIRMADA'), ('SOLICITADA', 'CONFIRMADA'))
+
+
+def _duracao(segundos):
+    if segundos is None:
+        return '-'
+    return str(timedelta(seconds=round(segundos)))
+
+
+class Command(BaseCommand):
+    help = ("Tempos entre status das solicitações (p50/p90/p99), calculados a partir do "
+            "histórico de status.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=7,
+                            help='Considera as transições dos últimos N dias (0 = todas).')
+
+    def handle(self, *args, **options):
+        desde = timezone.now() - timedelta(days=options['dias']) if options['dias'] else None
+        for de, para in ETAPAS:
+            t = tempos_entre_status(de, para, desde)
+            self.stdout.write(f"{de} -> {para}: {t['n']} solicitações, p50 {_duracao(t['p50_s'])}, "
+                              f"p90 {_duracao(t['p90_s'])}, p99 {_duracao(t['p99_s'])}")
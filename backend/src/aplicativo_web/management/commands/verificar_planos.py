@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from aplicativo_web.planos import contexto, semear, verificar_planos
+
+
+class Command(BaseCommand):
+    help = ("Roda EXPLAIN nas consultas quentes sobre uma massa semeada (desfeita ao final) "
+            "e falha se alguma usar varredura sequencial.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitacoes', type=int, default=5000,
+                            help='Tamanho da massa semeada.')
+        parser.add_argument('--sem-semear', action='store_true',
+                            help='Usa só os dados já existentes na base.')
+        parser.add_argument('--planejador-livre', action='store_true',
+                            help='Não desliga enable_seqscan: mostra o plano que a base real escolheria.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if not options['sem_semear']:
+                semear(options['solicitacoes'])
+            resultado = verificar_planos(contexto(), forcar_indices=not options['planejador_livre'])
+            transaction.set_rollback(True)
+
+        reprovadas = []
+        for nome, (plano, tabelas) in resultado.items():
+            resumo = f"{nome}: {plano['Node Type']} (custo {plano['Total Cost']})"
+            if tabelas:
+                reprovadas.append(nome)
+                self.stdout.write(self.style.ERROR(f"{resumo} - Seq Scan em {', '.join(tabelas)}"))
+            else:
+                self.stdout.write(resumo)
+
+        if reprovadas:
+            raise CommandError(f"Varredura sequencial em {len(reprovadas)} consulta(s): {', '.join(reprovadas)}.")
+        self.stdout.write(self.style.SUCCESS(f"{len(resultado)} consultas usam índices."))
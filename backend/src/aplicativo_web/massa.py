@@ -0,0 +1,225 @@
+# backend/src/aplicativo_web/massa.py
+"""Massa de dados sintética e determinística (`manage.py semear_massa`).
+
+As linhas são geradas em Python a partir de uma semente e carregadas com `COPY ... FROM
+STDIN`, em blocos, sem passar pelos models, serializers ou pelo geocodificador: milhões
+de linhas levam minutos, não horas. Os pontos seguem uma normal em volta de capitais
+brasileiras, com peso proporcional à população, como numa base real.
+
+As contas semeadas usam emails `massa-<tipo><n>@exemplo.com` e a senha `SENHA_MASSA`,
+para que os benchmarks possam fazer login com elas. O hash é calculado uma vez e repetido
+em todas as contas (mesmo sal): o custo do login é o real, o da carga não. Totais derivados (volumes diários,
+pontos) não são gerados; rode `reconstruir_volumes` depois, se precisar deles.
+"""
+
+import io
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from .models import (Coletor, Cooperativa, HistoricoStatusSolicitacao, ItemColeta, Produtor, SolicitacaoColeta,
+                     VersaoListagem)
+
+SENHA_MASSA = 'massa-senha'
+# Datas da massa são relativas a esta referência, não ao relógio: mesma semente, mesma massa
+REFERENCIA = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# (cidade, UF, latitude, longitude, população em milhares, raio típico em km)
+CIDADES = (
+    ('São Paulo', 'SP', -23.55, -46.63, 11450, 25),
+    ('Rio de Janeiro', 'RJ', -22.91, -43.20, 6211, 20),
+    ('Brasília', 'DF', -15.79, -47.88, 2817, 20),
+    ('Fortaleza', 'CE', -3.73, -38.52, 2428, 12),
+    ('Salvador', 'BA', -12.97, -38.50, 2418, 12),
+    ('Belo Horizonte', 'MG', -19.92, -43.94, 2315, 12),
+    ('Manaus', 'AM', -3.12, -60.02, 2063, 12),
+    ('Curitiba', 'PR', -25.43, -49.27, 1773, 10),
+    ('Recife', 'PE', -8.05, -34.88, 1488, 8),
+    ('Porto Alegre', 'RS', -30.03, -51.23, 1332, 10),
+    ('Belém', 'PA', -1.46, -48.50, 1303, 8),
+    ('Teresina', 'PI', -5.09, -42.80, 866, 8),
+)
+# Fração de cada status entre as solicitações semeadas
+STATUS_PESOS = {'SOLICITADA': 0.15, 'ACEITA': 0.10, 'CONFIRMADA': 0.65, 'CANCELADA': 0.10}
+TIPOS = ('Plástico', 'Metal', 'Papel', 'Vidro')
+UNIDADES = ('KG', 'UN', 'VOLUME')
+NULO = r'\N'
+
+
+class MassaJaExiste(Exception):
+    """A base já tem contas da massa; semear de novo repetiria emails e documentos."""
+
+
+def email_massa(tipo, n):
+    return f"massa-{tipo}{n}@exemplo.com"
+
+
+def massa_existente():
+    """Quantos produtores da massa já existem na base."""
+    return Produtor.objects.filter(email__startswith='massa-p').count()
+
+
+def sortear_cidade(rng):
+    return rng.choices(CIDADES, weights=[c[4] for c in CIDADES])[0]
+
+
+def ponto_aleatorio(rng, cidade=None):
+    """(lat, lng) perto do centro de uma cidade: normal com desvio de metade do raio."""
+    _, _, lat, lng, _, raio_km = cidade or sortear_cidade(rng)
+    desvio_graus = raio_km / 2 / 111.32
+    return (lat + rng.gauss(0, desvio_graus),
+            lng + rng.gauss(0, desvio_graus) / math.cos(math.radians(lat)))
+
+
+def _ewkt(ponto):
+    return f"SRID=4326;POINT({ponto[1]:.6f} {ponto[0]:.6f})"
+
+
+def _texto(valor):
+    if valor is None:
+        return NULO
+    return str(valor).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def _copiar(modelo, colunas, linhas, lote):
+    """COPY em blocos de `lote` linhas (formato texto), pela conexão do Django."""
+    sql = f"COPY {modelo._meta.db_table} ({', '.join(colunas)}) FROM STDIN"
+    with connection.cursor() as cursor:
+        bruto = cursor.cursor
+        bloco = []
+
+        def enviar():
+            dados = ''.join(bloco)
+            if hasattr(bruto, 'copy'):  # psycopg 3
+                with bruto.copy(sql) as copy:
+                    copy.write(dados)
+            else:  # psycopg2
+                bruto.copy_expert(sql, io.StringIO(dados))
+            bloco.clear()
+
+        for linha in linhas:
+            bloco.append('\t'.join(_texto(v) for v in linha) + '\n')
+            if len(bloco) >= lote:
+                enviar()
+        if bloco:
+            enviar()
+
+
+def _proximo_id(cursor, modelo):
+    coluna = modelo._meta.pk.column
+    cursor.execute(f"SELECT COALESCE(MAX({coluna}), 0) + 1 FROM {modelo._meta.db_table}")
+    return cursor.fetchone()[0]
+
+
+def _ajustar_sequencia(cursor, modelo):
+    tabela, coluna = modelo._meta.db_table, modelo._meta.pk.column
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, %s), (SELECT MAX({coluna}) FROM {tabela}))",
+        [tabela, coluna])
+
+
+def semear_massa(produtores, coletores, cooperativas, itens, seed=42, lote=50_000, referencia=REFERENCIA):
+    """Gera e carrega a massa. Retorna as contagens criadas.
+
+    Cada solicitação recebe de 1 a 3 itens (2 em média), então há cerca de `itens // 2`
+    solicitações. 10% dos produtores ficam sem `geom` (endereço não geocodificado). Os
+    ids são atribuídos aqui, a partir do maior existente, e as sequências ajustadas no
+    fim; as tabelas ficam travadas para escrita durante a carga. As coletas vão de 90 dias
+    antes a 3 dias depois de `referencia`.
+    """
+    if massa_existente():
+        raise MassaJaExiste("A base já tem a massa sintética.")
+    rng = random.Random(seed)
+    senha = make_password(SENHA_MASSA)
+    modelos = (Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta, HistoricoStatusSolicitacao)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for modelo in modelos:
+                cursor.execute(f"LOCK TABLE {modelo._meta.db_table} IN EXCLUSIVE MODE")
+            ids = {modelo: _proximo_id(cursor, modelo) for modelo in modelos}
+
+        def contas(quantidade):
+            for i in range(quantidade):
+                cidade = sortear_cidade(rng)
+                yield i, cidade, ponto_aleatorio(rng, cidade)
+
+        def linhas_produtores():
+            for i, cidade, ponto in contas(produtores):
+                yield (ids[Produtor] + i, f"Produtor {i}", email_massa('p', i), senha,
+                       f"(00) 9{rng.randrange(10 ** 8):08d}", f"m{i:013d}",
+                       f"{rng.randrange(10 ** 5):05d}-{rng.randrange(1000):03d}", f"Rua {rng.randrange(1, 500)}",
+                       str(rng.randrange(1, 3000)), 'Centro', cidade[0], cidade[1],
+                       _ewkt(ponto) if rng.random() < 0.9 else None, 0, 0, 0, 0)
+
+        def linhas_coletores():
+            for i, cidade, ponto in contas(coletores):
+                yield (ids[Coletor] + i, f"Coletor {i}", email_massa('c', i), senha, f"m{i:010d}",
+                       cidade[0], cidade[1], _ewkt(ponto), 0, 0, 0)
+
+        def linhas_cooperativas():
+            for i, cidade, ponto in contas(cooperativas):
+                tipos = rng.sample(TIPOS, rng.randint(0, 2))
+                yield (ids[Cooperativa] + i, f"Cooperativa {i}", email_massa('k', i), senha,
+                       f"m{i:013d}", cidade[0], cidade[1], _ewkt(ponto), '{' + ','.join(tipos) + '}')
+
+        _copiar(Produtor, ('id', 'nome', 'email', 'senha', 'telefone', 'cpf_cnpj', 'cep', 'rua', 'numero',
+                           'bairro', 'cidade', 'estado', 'geom', 'nota_avaliacao_atual', 'total_avaliacoes',
+                           'soma_avaliacoes', 'saldo_pontos'), linhas_produtores(), lote)
+        _copiar(Coletor, ('id', 'nome', 'email', 'senha', 'cpf', 'cidade', 'estado', 'geom',
+                          'nota_avaliacao_atual', 'total_avaliacoes', 'soma_avaliacoes'), linhas_coletores(), lote)
+        _copiar(Cooperativa, ('id', 'nome_empresa', 'email', 'senha', 'cnpj', 'cidade', 'estado', 'geom',
+                              'tipos_residuo_aceitos'), linhas_cooperativas(), lote)
+        if cooperativas:
+            VersaoListagem.objects.incrementar(VersaoListagem.COOPERATIVAS)
+
+        # quantos itens cada solicitação terá, decidido antes para as duas cargas baterem
+        itens_por_solicitacao = []
+        restantes = itens
+        while restantes > 0:
+            n = min(rng.randint(1, 3), restantes)
+            itens_por_solicitacao.append(n)
+            restantes -= n
+        statuses, pesos = list(STATUS_PESOS), list(STATUS_PESOS.values())
+
+        def linhas_solicitacoes():
+            for i in range(len(itens_por_solicitacao)):
+                status = rng.choices(statuses, pesos)[0]
+                inicio = referencia + timedelta(hours=rng.uniform(-24 * 90, 72))
+                fim = inicio + timedelta(hours=rng.choice((2, 4, 8)))
+                coletor = None if status == 'SOLICITADA' or not coletores else ids[Coletor] + rng.randrange(coletores)
+                yield (ids[SolicitacaoColeta] + i, ids[Produtor] + rng.randrange(produtores), coletor,
+                       inicio.isoformat(), fim.isoformat(), status, None, inicio.isoformat(), 0)
+
+        def linhas_itens():
+            proximo = ids[ItemColeta]
+            for i, quantidade in enumerate(itens_por_solicitacao):
+                for _ in range(quantidade):
+                    yield (proximo, ids[SolicitacaoColeta] + i, rng.randint(1, 100), rng.choice(TIPOS),
+                           rng.choice(UNIDADES))
+                    proximo += 1
+
+        _copiar(SolicitacaoColeta, ('id', 'produtor_id', 'coletor_id', 'inicio_coleta', 'fim_coleta', 'status',
+                                    'observacoes', 'atualizado_em', 'versao'), linhas_solicitacoes(), lote)
+        VersaoListagem.objects.incrementar(VersaoListagem.SOLICITACOES)
+        # linha de partida do histórico (versão 0, status atual), como na migração
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {HistoricoStatusSolicitacao._meta.db_table} (id_solicitacao, versao, "
+                f"status_anterior, status_novo, origem, criado_em) SELECT id, 0, NULL, status, 'massa', "
+                f"atualizado_em FROM {SolicitacaoColeta._meta.db_table} WHERE id >= %s",
+                [ids[SolicitacaoColeta]])
+        _copiar(ItemColeta, ('id_item', 'id_solicitacao', 'quantidade', 'tipo_residuo', 'unidade_medida'),
+                linhas_itens(), lote)
+
+        with connection.cursor() as cursor:
+            for modelo in modelos:
+                _ajustar_sequencia(cursor, modelo)
+
+    with connection.cursor() as cursor:
+        for modelo in modelos:
+            cursor.execute(f"ANALYZE {modelo._meta.db_table}")
+    return {'produtores': produtores, 'coletores': coletores, 'cooperativas': cooperativas,
+            'solicitacoes': len(itens_por_solicitacao), 'itens': itens}
@@ -0,0 +1,268 @@
+# backend/src/aplicativo_web/metricas.py
+"""Métricas de desempenho por requisição: header `Server-Timing` e endpoint `/metrics`.
+
+`MetricasMiddleware` mede o tempo total de cada requisição e, com a ajuda de ganchos
+baratos, quanto dele foi gasto em consultas ao banco, em serialização (serializers que
+herdam `SerializacaoMedida` e a renderização JSON) e no geocodificador externo (`medir`).
+A medição corrente fica numa ContextVar, que também vale dentro de `sync_to_async`.
+Fora de uma requisição os ganchos não fazem nada.
+
+Os histogramas são agregados em memória, por processo, com um único lock por
+requisição; cada worker expõe os próprios números em `/metrics` (formato texto do
+Prometheus), e o Prometheus soma as instâncias.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+_medicao = ContextVar('medicao', default=None)
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_CONSULTAS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+# o método vem do cliente: fora destes, o rótulo é OTHER (séries em número limitado)
+METODOS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+def medicao_atual():
+    """Medição da requisição corrente (None fora de requisição)."""
+    return _medicao.get()
+
+
+class Medicao:
+    """Acumuladores de uma requisição."""
+    __slots__ = ('consultas', 'db', 'serializacao', 'geocodificacao', 'ativas')
+
+    def __init__(self):
+        self.consultas = 0
+        self.db = self.serializacao = self.geocodificacao = 0.0
+        self.ativas = set()
+
+
+class medir:
+    """Soma à fase (`serializacao` ou `geocodificacao`) da requisição corrente o tempo do bloco.
+
+    Blocos aninhados da mesma fase contam uma vez só (o mais externo).
+    """
+    __slots__ = ('fase', 'medicao', 'inicio')
+
+    def __init__(self, fase):
+        self.fase = fase
+
+    def __enter__(self):
+        medicao = _medicao.get()
+        if medicao is None or self.fase in medicao.ativas:
+            self.medicao = None
+            return
+        medicao.ativas.add(self.fase)
+        self.medicao = medicao
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        if self.medicao is not None:
+            decorrido = time.perf_counter() - self.inicio
+            setattr(self.medicao, self.fase, getattr(self.medicao, self.fase) + decorrido)
+            self.medicao.ativas.discard(self.fase)
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """Execute wrapper instalado em toda conexão (ver `instalar_em_conexao`)."""
+    medicao = _medicao.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.db += time.perf_counter() - inicio
+        medicao.consultas += 1
+
+
+def instalar_em_conexao(sender, connection, **kwargs):
+    """Receiver de `connection_created`.
+
+    O wrapper fica permanente na conexão, em vez de ser posto pelo middleware a cada
+    requisição, porque em views assíncronas as consultas rodam em outra thread, com outro
+    objeto de conexão.
+    """
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+class SerializacaoMedida:
+    """Mixin de serializer: o tempo de `to_representation` entra em `serializacao`."""
+
+    def to_representation(self, instance):
+        with medir('serializacao'):
+            return super().to_representation(instance)
+
+
+class JSONRendererMedido(JSONRenderer):
+    """JSONRenderer cuja codificação entra em `serializacao`."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with medir('serializacao'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+# --- Agregação ---
+
+
+def _rotulos(nomes, valores):
+    def escapar(valor):
+        return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return ','.join(f'{nome}="{escapar(valor)}"' for nome, valor in zip(nomes, valores))
+
+
+class Histograma:
+    def __init__(self, nome, ajuda, limites, rotulos):
+        self.nome, self.ajuda, self.limites, self.rotulos = nome, ajuda, limites, rotulos
+        # valores dos rótulos -> [contagem por balde (não acumulada)..., +Inf], soma
+        self.series = {}
+
+    def observar(self, valores, valor):
+        serie = self.series.get(valores)
+        if serie is None:
+            serie = self.series[valores] = [[0] * (len(self.limites) + 1), 0.0]
+        serie[0][bisect.bisect_left(self.limites, valor)] += 1
+        serie[1] += valor
+
+    def exposicao(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        for valores, (baldes, soma) in sorted(self.series.items()):
+            rotulos = _rotulos(self.rotulos, valores)
+            acumulado = 0
+            for limite, contagem in zip((*self.limites, '+Inf'), baldes):
+                acumulado += contagem
+                linhas.append(f'{self.nome}_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+            linhas.append(f"{self.nome}_sum{{{rotulos}}} {soma}")
+            linhas.append(f"{self.nome}_count{{{rotulos}}} {acumulado}")
+        return linhas
+
+
+class Contador:
+    def __init__(self, nome, ajuda, rotulos):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self.series = {}
+
+    def incrementar(self, valores):
+        self.series[valores] = self.series.get(valores, 0) + 1
+
+    def exposicao(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        for valores, total in sorted(self.series.items()):
+            linhas.append(f"{self.nome}{{{_rotulos(self.rotulos, valores)}}} {total}")
+        return linhas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        rotulos = ('endpoint', 'metodo')
+        self.requisicoes = Contador(
+            'reciclaai_requisicoes_total', 'Requisições atendidas.', ('endpoint', 'metodo', 'status'))
+        self.duracao = Histograma(
+            'reciclaai_requisicao_segundos', 'Tempo total da requisição.', LIMITES_SEGUNDOS, rotulos)
+        self.db = Histograma(
+            'reciclaai_requisicao_db_segundos', 'Tempo em consultas ao banco por requisição.',
+            LIMITES_SEGUNDOS, rotulos)
+        self.consultas = Histograma(
+            'reciclaai_requisicao_db_consultas', 'Consultas ao banco por requisição.', LIMITES_CONSULTAS, rotulos)
+        self.serializacao = Histograma(
+            'reciclaai_requisicao_serializacao_segundos', 'Tempo de serialização e renderização por requisição.',
+            LIMITES_SEGUNDOS, rotulos)
+        self.geocodificacao = Histograma(
+            'reciclaai_requisicao_geocodificacao_segundos', 'Tempo no geocodificador externo por requisição.',
+            LIMITES_SEGUNDOS, rotulos)
+        self._lock = threading.Lock()
+
+    def registrar(self, endpoint, metodo, status, total, medicao):
+        valores = (endpoint, metodo)
+        with self._lock:
+            self.requisicoes.incrementar((endpoint, metodo, str(status)))
+            self.duracao.observar(valores, total)
+            self.db.observar(valores, medicao.db)
+            self.consultas.observar(valores, medicao.consultas)
+            self.serializacao.observar(valores, medicao.serializacao)
+            self.geocodificacao.observar(valores, medicao.geocodificacao)
+
+    def exposicao(self):
+        with self._lock:
+            linhas = []
+            for metrica in (self.requisicoes, self.duracao, self.db, self.consultas, self.serializacao,
+                            self.geocodificacao):
+                linhas.extend(metrica.exposicao())
+        return '\n'.join(linhas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+def _endpoint(request):
+    # a rota (com os conversores) e não o path, para não criar uma série por id
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'nao_encontrado'
+
+
+def _metodo(request):
+    return request.method if request.method in METODOS else 'OTHER'
+
+
+def server_timing(total, medicao):
+    partes = [f"total;dur={total * 1000:.1f}",
+              f'db;dur={medicao.db * 1000:.1f};desc="{medicao.consultas} consultas"',
+              f"serializacao;dur={medicao.serializacao * 1000:.1f}"]
+    if medicao.geocodificacao:
+        partes.append(f"geocodificacao;dur={medicao.geocodificacao * 1000:.1f}")
+    return ', '.join(partes)
+
+
+class MetricasMiddleware:
+    """Mede cada requisição; deve ficar no topo de MIDDLEWARE para cobrir os demais.
+
+    Em respostas em streaming (SSE) o tempo vai até a resposta ser devolvida, não até o
+    fim do stream.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+        # expõe consultas e tempos a qualquer cliente: por padrão, só com DEBUG
+        self.server_timing = getattr(settings, 'METRICAS_SERVER_TIMING', settings.DEBUG)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        medicao = Medicao()
+        token = _medicao.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self._concluir(request, response, time.perf_counter() - inicio, medicao)
+
+    async def __acall__(self, request):
+        medicao = Medicao()
+        token = _medicao.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self._concluir(request, response, time.perf_counter() - inicio, medicao)
+
+    def _concluir(self, request, response, total, medicao):
+        registro.registrar(_endpoint(request), _metodo(request), response.status_code, total, medicao)
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(total, medicao)
+        return response
+
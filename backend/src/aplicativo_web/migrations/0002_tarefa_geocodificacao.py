@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaGeocodificacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('produtor', 'Produtor'), ('cooperativa', 'Cooperativa')], max_length=20)),
+                ('objeto_id', models.IntegerField()),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('CONCLUIDA', 'Concluída'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=20)),
+                ('tentativas', models.IntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_erro', models.CharField(blank=True, max_length=255, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'tarefa_geocodificacao',
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='tarefa_geo_fila_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'PENDENTE')), fields=('tipo', 'objeto_id'), name='tarefa_geo_pendente_unica')],
+            },
+        ),
+    ]
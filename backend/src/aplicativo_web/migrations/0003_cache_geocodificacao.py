@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0002_tarefa_geocodificacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheGeocodificacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=64, unique=True)),
+                ('endereco_normalizado', models.CharField(max_length=255)),
+                ('cep', models.CharField(blank=True, db_index=True, max_length=9)),
+                ('geom', django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326)),
+                ('expira_em', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'cache_geocodificacao',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0003_cache_geocodificacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitacaocoleta',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:49
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0004_solicitacao_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cooperativa',
+            name='tipos_residuo_aceitos',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, default=list, size=None),
+        ),
+    ]
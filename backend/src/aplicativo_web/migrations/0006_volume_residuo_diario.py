@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0005_cooperativa_tipos_residuo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolumeResiduoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidade', models.CharField(choices=[('produtor', 'Produtor'), ('coletor', 'Coletor'), ('cidade', 'Cidade')], max_length=20)),
+                ('chave', models.CharField(max_length=120)),
+                ('tipo_residuo', models.CharField(choices=[('Vidro', 'Vidro'), ('Metal', 'Metal'), ('Papel', 'Papel'), ('Plástico', 'Plástico')], max_length=50)),
+                ('unidade_medida', models.CharField(choices=[('KG', 'KG'), ('UN', 'UN'), ('VOLUME', 'VOLUME')], max_length=10)),
+                ('dia', models.DateField()),
+                ('itens', models.IntegerField(default=0)),
+                ('quantidade_solicitada', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade_confirmada', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade_cancelada', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'volume_residuo_diario',
+                'constraints': [models.UniqueConstraint(fields=('entidade', 'chave', 'tipo_residuo', 'unidade_medida', 'dia'), name='volume_residuo_chave_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0006_volume_residuo_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coletor',
+            name='soma_avaliacoes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='produtor',
+            name='soma_avaliacoes',
+            field=models.IntegerField(default=0),
+        ),
+        # contas com notas anteriores: a soma sai da média já gravada
+        migrations.RunSQL(
+            [
+                "UPDATE produtor SET soma_avaliacoes = ROUND(nota_avaliacao_atual * total_avaliacoes)",
+                "UPDATE coletor SET soma_avaliacoes = ROUND(nota_avaliacao_atual * total_avaliacoes)",
+            ],
+            migrations.RunSQL.noop,
+        ),
+        migrations.CreateModel(
+            name='Avaliacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('avaliador', models.CharField(choices=[('produtor', 'Produtor'), ('coletor', 'Coletor')], max_length=20)),
+                ('nota', models.PositiveSmallIntegerField()),
+                ('comentario', models.CharField(blank=True, max_length=255, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('solicitacao', models.ForeignKey(db_column='id_solicitacao', on_delete=django.db.models.deletion.CASCADE, related_name='avaliacoes', to='aplicativo_web.solicitacaocoleta')),
+            ],
+            options={
+                'db_table': 'avaliacao',
+                'constraints': [models.UniqueConstraint(fields=('solicitacao', 'avaliador'), name='avaliacao_unica_por_lado'), models.CheckConstraint(condition=models.Q(('nota__gte', 1), ('nota__lte', 5)), name='avaliacao_nota_valida')],
+            },
+        ),
+    ]
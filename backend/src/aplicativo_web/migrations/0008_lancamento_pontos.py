@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0007_avaliacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LancamentoPontos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('COLETA', 'Crédito por coleta'), ('ESTORNO', 'Estorno de coleta'), ('RESGATE', 'Resgate de recompensa'), ('AJUSTE', 'Ajuste')], max_length=20)),
+                ('pontos', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('chave_idempotencia', models.CharField(max_length=100, unique=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('produtor', models.ForeignKey(db_column='id_produtor', on_delete=django.db.models.deletion.CASCADE, related_name='lancamentos', to='aplicativo_web.produtor')),
+                ('solicitacao', models.ForeignKey(blank=True, db_column='id_solicitacao', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lancamentos', to='aplicativo_web.solicitacaocoleta')),
+            ],
+            options={
+                'db_table': 'lancamento_pontos',
+                'indexes': [models.Index(fields=['produtor', '-id'], name='lancamento_produtor_idx')],
+            },
+        ),
+    ]
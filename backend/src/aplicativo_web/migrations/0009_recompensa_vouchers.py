@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0008_lancamento_pontos'),
+    ]
+
+    operations = [
+        # números dos códigos de voucher (ver aplicativo_web/vouchers.py)
+        migrations.RunSQL(
+            "CREATE SEQUENCE IF NOT EXISTS recompensa_voucher_seq",
+            "DROP SEQUENCE IF EXISTS recompensa_voucher_seq",
+        ),
+        migrations.AddField(
+            model_name='recompensa',
+            name='custo_pontos',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='recompensa',
+            name='emitido_em',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='recompensa',
+            name='resgatado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
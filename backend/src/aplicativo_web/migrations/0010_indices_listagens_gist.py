@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:00
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0009_recompensa_vouchers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='coletor',
+            name='geom',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AlterField(
+            model_name='cooperativa',
+            name='geom',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AlterField(
+            model_name='produtor',
+            name='geom',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AlterField(
+            model_name='solicitacaocoleta',
+            name='coletor',
+            field=models.ForeignKey(blank=True, db_column='coletor_id', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='coletas', to='aplicativo_web.coletor'),
+        ),
+        migrations.AlterField(
+            model_name='solicitacaocoleta',
+            name='produtor',
+            field=models.ForeignKey(db_column='produtor_id', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='solicitacoes', to='aplicativo_web.produtor'),
+        ),
+        migrations.AddIndex(
+            model_name='coletor',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='coletor_geom_gist'),
+        ),
+        migrations.AddIndex(
+            model_name='cooperativa',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='cooperativa_geom_gist'),
+        ),
+        migrations.AddIndex(
+            model_name='produtor',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='produtor_geom_gist'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaocoleta',
+            index=models.Index(fields=['status', '-id'], name='solicitacao_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaocoleta',
+            index=models.Index(fields=['produtor', '-id'], name='solicitacao_produtor_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaocoleta',
+            index=models.Index(fields=['coletor', '-id'], name='solicitacao_coletor_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaocoleta',
+            index=models.Index(condition=models.Q(('status', 'SOLICITADA')), fields=['-id'], name='solicitacao_aberta_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0010_indices_listagens_gist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitacaocoleta',
+            name='versao',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='HistoricoStatusSolicitacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('versao', models.PositiveIntegerField()),
+                ('status_anterior', models.CharField(blank=True, choices=[('SOLICITADA', 'Solicitada'), ('ACEITA', 'Aceita'), ('CANCELADA', 'Cancelada'), ('CONFIRMADA', 'Confirmada')], max_length=20, null=True)),
+                ('status_novo', models.CharField(choices=[('SOLICITADA', 'Solicitada'), ('ACEITA', 'Aceita'), ('CANCELADA', 'Cancelada'), ('CONFIRMADA', 'Confirmada')], max_length=20)),
+                ('origem', models.CharField(max_length=20)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('solicitacao', models.ForeignKey(db_column='id_solicitacao', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='historico', to='aplicativo_web.solicitacaocoleta')),
+            ],
+            options={
+                'db_table': 'historico_status_solicitacao',
+                'indexes': [models.Index(fields=['status_novo', 'criado_em'], name='historico_status_criado_idx')],
+                'constraints': [models.UniqueConstraint(fields=('solicitacao', 'versao'), name='historico_status_versao_unica')],
+            },
+        ),
+        # solicitações anteriores: uma linha de partida com o status atual (sem a trajetória)
+        migrations.RunSQL(
+            "INSERT INTO historico_status_solicitacao (id_solicitacao, versao, status_anterior, status_novo, "
+            "origem, criado_em) SELECT id, 0, NULL, status, 'migracao', atualizado_em FROM solicitacao_coleta",
+            migrations.RunSQL.noop,
+        ),
+    ]
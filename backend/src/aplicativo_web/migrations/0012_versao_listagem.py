@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aplicativo_web', '0011_historico_status_versao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoListagem',
+            fields=[
+                ('nome', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('versao', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'versao_listagem',
+            },
+        ),
+    ]
@@ -1,8 +1,17 @@
 # backend/src/aplicativo_web/models.py
 
 from django.contrib.gis.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GistIndex
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.db import connection
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from .geo import raio_em_graus
+
 class Coletor(models.Model):
     id = models.AutoField(primary_key=True)
     nome = models.CharField(max_length=100)
@@ -13,13 +22,19 @@ class Coletor(models.Model):
     cep = models.CharField(max_length=9, blank=True, null=True)
     cidade = models.CharField(max_length=100, blank=True, null=True)
     estado = models.CharField(max_length=2, blank=True, null=True)
-    geom = models.PointField(srid=4326, blank=True, null=True)
+    # índice GiST declarado em Meta.indexes, com nome fixo
+    geom = models.PointField(srid=4326, blank=True, null=True, spatial_index=False)
     # NOVOS CAMPOS:
     nota_avaliacao_atual = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     total_avaliacoes = models.IntegerField(default=0)
+    # soma exata das notas: a média é sempre recalculada dela, sem acumular arredondamento
+    soma_avaliacoes = models.IntegerField(default=0)
 
     class Meta:
         db_table = "coletor"
+        indexes = [
+            GistIndex(fields=['geom'], name='coletor_geom_gist'),
+        ]
     def __str__(self):
         return f"{self.nome} ({self.email})"
 
@@ -36,10 +51,16 @@ class Cooperativa(models.Model):
     bairro = models.CharField(max_length=100, blank=True, null=True)
     cidade = models.CharField(max_length=100, blank=True, null=True)
     estado = models.CharField(max_length=2, blank=True, null=True)
-    geom = models.PointField(srid=4326, blank=True, null=True)
+    # índice GiST declarado em Meta.indexes, com nome fixo
+    geom = models.PointField(srid=4326, blank=True, null=True, spatial_index=False)
+    # Tipos de resíduo (ItemColeta.TIPO_RESIDUO_CHOICES) recebidos; vazio = aceita todos
+    tipos_residuo_aceitos = ArrayField(models.CharField(max_length=50), blank=True, default=list)
 
     class Meta:
         db_table = "cooperativa"
+        indexes = [
+            GistIndex(fields=['geom'], name='cooperativa_geom_gist'),
+        ]
     def __str__(self):
         return self.nome_empresa
 
@@ -57,32 +78,82 @@ class Produtor(models.Model):
     bairro = models.CharField(max_length=100, blank=True, null=True)
     cidade = models.CharField(max_length=100, blank=True, null=True)
     estado = models.CharField(max_length=2, blank=True, null=True)
-    geom = models.PointField(srid=4326, blank=True, null=True)
+    # índice GiST declarado em Meta.indexes, com nome fixo
+    geom = models.PointField(srid=4326, blank=True, null=True, spatial_index=False)
     # NOVOS CAMPOS:
     nota_avaliacao_atual = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     total_avaliacoes = models.IntegerField(default=0)
+    # soma exata das notas: a média é sempre recalculada dela, sem acumular arredondamento
+    soma_avaliacoes = models.IntegerField(default=0)
     saldo_pontos = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
     class Meta:
         db_table = "produtor"
+        indexes = [
+            GistIndex(fields=['geom'], name='produtor_geom_gist'),
+        ]
     def __str__(self):
         return f"{self.nome} ({self.email})"
 
+class SolicitacaoColetaQuerySet(models.QuerySet):
+    def para_listagem(self):
+        """Produtor e coletor via JOIN e `itens_count` numa subquery correlacionada.
+        A subquery (em vez de Count + GROUP BY) preserva ORDER BY/LIMIT, inclusive a ordem por distância.
+        """
+        contagem = (
+            ItemColeta.objects.filter(solicitacao=OuterRef('pk')).order_by()
+            .values('solicitacao').annotate(total=Count('*')).values('total')
+        )
+        return self.select_related('produtor', 'coletor').annotate(
+            itens_count=Coalesce(Subquery(contagem), 0))
+
+    def proximas_de(self, ponto, raio_m):
+        """Solicitações cujo produtor está a até `raio_m` metros do ponto, da mais próxima
+        para a mais distante, com a distância anotada em `distancia`.
+
+        O índice GiST de `produtor.geom` serve o corte pelo raio. A ordem não vem dele: a
+        coluna é de outra tabela e há o filtro de status, então o PostgreSQL ordena as
+        candidatas dentro do raio. Por isso a ordem usa a própria `distancia`, em metros,
+        e o raio é limitado pelas views.
+        """
+        return (
+            self.filter(
+                # pré-filtro pelo índice (graus, sempre maior que o raio) + corte exato em metros
+                produtor__geom__dwithin=(ponto, raio_em_graus(ponto, raio_m)),
+                produtor__geom__distance_lte=(ponto, D(m=raio_m)),
+            )
+            .annotate(distancia=Distance('produtor__geom', ponto))
+            .order_by('distancia')
+        )
+
+    def para_detalhe(self):
+        """Produtor e coletor via JOIN e todos os itens numa única consulta extra."""
+        return self.select_related('produtor', 'coletor').prefetch_related('itens')
+
+
 class SolicitacaoColeta(models.Model):
     STATUS_CHOICES = [
         ('SOLICITADA', 'Solicitada'), ('ACEITA', 'Aceita'), ('CANCELADA', 'Cancelada'),
         ('CONFIRMADA', 'Confirmada'),
     ]
+    # sem índice próprio: os compostos (produtor, -id) e (coletor, -id) começam por elas
     produtor = models.ForeignKey(
-        Produtor, on_delete=models.CASCADE, related_name="solicitacoes", db_column='produtor_id')
+        Produtor, on_delete=models.CASCADE, related_name="solicitacoes", db_column='produtor_id',
+        db_index=False)
     coletor = models.ForeignKey(Coletor, on_delete=models.SET_NULL, null=True,
-                                 blank=True, related_name="coletas", db_column='coletor_id')
+                                 blank=True, related_name="coletas", db_column='coletor_id', db_index=False)
     inicio_coleta = models.DateTimeField(default=timezone.now)
     fim_coleta = models.DateTimeField(default=timezone.now)
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default='SOLICITADA')
     # CAMPO ADICIONADO DE VOLTA:
     observacoes = models.CharField(max_length=200, blank=True, null=True) 
+    # Last-Modified do detalhe; UPDATEs em massa devem setar atualizado_em=Now()
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+    # Incrementada a cada transição de status (compare-and-set em transicoes.py)
+    versao = models.PositiveIntegerField(default=0)
+
+    objects = SolicitacaoColetaQuerySet.as_manager()
 
     def __str__(self):
         nome_produtor = self.produtor.nome if self.produtor else 'Produtor Desconhecido'
@@ -90,6 +161,45 @@ class SolicitacaoColeta(models.Model):
     class Meta:
         db_table = 'solicitacao_coleta'
         ordering = ['-id']
+        indexes = [
+            # listagens filtram por uma coluna e paginam por -id (cursor)
+            models.Index(fields=['status', '-id'], name='solicitacao_status_id_idx'),
+            models.Index(fields=['produtor', '-id'], name='solicitacao_produtor_id_idx'),
+            models.Index(fields=['coletor', '-id'], name='solicitacao_coletor_id_idx'),
+            # a fila de disponíveis é uma fração pequena da tabela
+            models.Index(fields=['-id'], condition=models.Q(status='SOLICITADA'), name='solicitacao_aberta_idx'),
+        ]
+
+class HistoricoStatusSolicitacao(models.Model):
+    """Histórico (só inserção) dos status de uma solicitação: uma linha por transição,
+    gravada no mesmo comando que a muda (ver transicoes.py). `versao` é a da solicitação
+    depois da transição; a criação é a versão 0, sem status anterior.
+    """
+    solicitacao = models.ForeignKey(
+        SolicitacaoColeta, related_name='historico', db_column='id_solicitacao', on_delete=models.CASCADE,
+        db_index=False)
+    versao = models.PositiveIntegerField()
+    status_anterior = models.CharField(max_length=20, choices=SolicitacaoColeta.STATUS_CHOICES,
+                                       blank=True, null=True)
+    status_novo = models.CharField(max_length=20, choices=SolicitacaoColeta.STATUS_CHOICES)
+    # quem fez a transição: 'criacao', 'aceite', 'aceite_proxima' ou 'api'; linhas de
+    # partida de cargas e da migração: 'massa', 'planos', 'migracao'
+    origem = models.CharField(max_length=20)
+    criado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'historico_status_solicitacao'
+        constraints = [
+            # linha do tempo de uma solicitação, em ordem
+            models.UniqueConstraint(fields=['solicitacao', 'versao'], name='historico_status_versao_unica'),
+        ]
+        indexes = [
+            # métricas de SLA: entradas num status dentro de um período
+            models.Index(fields=['status_novo', 'criado_em'], name='historico_status_criado_idx'),
+        ]
+
+    def __str__(self):
+        return f"Solicitação #{self.solicitacao_id} v{self.versao}: {self.status_anterior} -> {self.status_novo}"
 
 class ItemColeta(models.Model):
     # NOVOS CHOICES BASEADOS NO SQL DUMP:
@@ -114,6 +224,55 @@ class ItemColeta(models.Model):
     def __str__(self):
         return f"{self.tipo_residuo} ({self.quantidade} {self.unidade_medida}) - Solicitação #{self.solicitacao.id}"
 
+class Avaliacao(models.Model):
+    """Nota dada por um lado da coleta ao outro (produtor avalia o coletor e vice-versa)."""
+    AVALIADOR_CHOICES = [
+        ('produtor', 'Produtor'), ('coletor', 'Coletor'),
+    ]
+    solicitacao = models.ForeignKey(
+        SolicitacaoColeta, related_name='avaliacoes', db_column='id_solicitacao', on_delete=models.CASCADE)
+    avaliador = models.CharField(max_length=20, choices=AVALIADOR_CHOICES)
+    nota = models.PositiveSmallIntegerField()
+    comentario = models.CharField(max_length=255, blank=True, null=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'avaliacao'
+        constraints = [
+            models.UniqueConstraint(fields=['solicitacao', 'avaliador'], name='avaliacao_unica_por_lado'),
+            models.CheckConstraint(condition=models.Q(nota__gte=1, nota__lte=5), name='avaliacao_nota_valida'),
+        ]
+
+    def __str__(self):
+        return f"Avaliação do {self.avaliador} na solicitação #{self.solicitacao_id}: {self.nota}"
+
+class LancamentoPontos(models.Model):
+    """Livro-razão (só inserção) dos pontos do produtor; `Produtor.saldo_pontos` é a soma dele."""
+    TIPO_CHOICES = [
+        ('COLETA', 'Crédito por coleta'), ('ESTORNO', 'Estorno de coleta'),
+        ('RESGATE', 'Resgate de recompensa'), ('AJUSTE', 'Ajuste'),
+    ]
+    produtor = models.ForeignKey(
+        Produtor, related_name='lancamentos', db_column='id_produtor', on_delete=models.CASCADE)
+    solicitacao = models.ForeignKey(
+        SolicitacaoColeta, related_name='lancamentos', db_column='id_solicitacao',
+        on_delete=models.SET_NULL, null=True, blank=True)
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    # positivo credita, negativo debita
+    pontos = models.DecimalField(max_digits=10, decimal_places=2)
+    # repetir a mesma operação gera a mesma chave, e o índice único descarta a repetição
+    chave_idempotencia = models.CharField(max_length=100, unique=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'lancamento_pontos'
+        indexes = [
+            models.Index(fields=['produtor', '-id'], name='lancamento_produtor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.pontos} pts - Produtor #{self.produtor_id}"
+
 # NOVA TABELA ADICIONADA:
 class Recompensa(models.Model):
     STATUS_CHOICES = [
@@ -125,6 +284,139 @@ class Recompensa(models.Model):
     nome_premio = models.CharField(max_length=100)
     loja_parceira = models.CharField(max_length=100)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    custo_pontos = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    emitido_em = models.DateTimeField(default=timezone.now)
+    resgatado_em = models.DateTimeField(blank=True, null=True)
 
     class Meta:
-        db_table = 'recompensa'
\ No newline at end of file
+        db_table = 'recompensa'
+
+
+class TarefaGeocodificacao(models.Model):
+    """Fila de geocodificação preenchida no cadastro e consumida pelo worker."""
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'), ('CONCLUIDA', 'Concluída'), ('FALHOU', 'Falhou'),
+    ]
+    TIPO_CHOICES = [
+        ('produtor', 'Produtor'), ('cooperativa', 'Cooperativa'),
+    ]
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    objeto_id = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+    tentativas = models.IntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.CharField(max_length=255, blank=True, null=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tarefa_geocodificacao'
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='tarefa_geo_fila_idx'),
+        ]
+        constraints = [
+            # no máximo uma tarefa pendente por registro
+            models.UniqueConstraint(fields=['tipo', 'objeto_id'], condition=models.Q(status='PENDENTE'),
+                                    name='tarefa_geo_pendente_unica'),
+        ]
+
+    def __str__(self):
+        return f"Geocodificação {self.tipo} #{self.objeto_id} - {self.status}"
+
+
+
+class CacheGeocodificacao(models.Model):
+    """Cache persistente de geocodificação por endereço normalizado (geom nulo = não encontrado)."""
+    chave = models.CharField(max_length=64, unique=True)
+    endereco_normalizado = models.CharField(max_length=255)
+    cep = models.CharField(max_length=9, blank=True, db_index=True)
+    geom = models.PointField(srid=4326, blank=True, null=True)
+    expira_em = models.DateTimeField()
+
+    class Meta:
+        db_table = 'cache_geocodificacao'
+
+    def __str__(self):
+        return self.endereco_normalizado
+
+
+class VolumeResiduoDiario(models.Model):
+    """Totais diários de resíduo por entidade, mantidos por `aplicativo_web.volumes`."""
+    ENTIDADE_CHOICES = [
+        ('produtor', 'Produtor'), ('coletor', 'Coletor'), ('cidade', 'Cidade'),
+    ]
+    entidade = models.CharField(max_length=20, choices=ENTIDADE_CHOICES)
+    # id do produtor/coletor ou 'Cidade/UF'
+    chave = models.CharField(max_length=120)
+    tipo_residuo = models.CharField(max_length=50, choices=ItemColeta.TIPO_RESIDUO_CHOICES)
+    unidade_medida = models.CharField(max_length=10, choices=ItemColeta.UNIDADE_MEDIDA_CHOICES)
+    dia = models.DateField()
+    itens = models.IntegerField(default=0)
+    quantidade_solicitada = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade_confirmada = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade_cancelada = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'volume_residuo_diario'
+        constraints = [
+            # alvo do ON CONFLICT e índice das consultas por entidade/chave/período
+            models.UniqueConstraint(fields=['entidade', 'chave', 'tipo_residuo', 'unidade_medida', 'dia'],
+                                    name='volume_residuo_chave_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidade} {self.chave} {self.dia}: {self.tipo_residuo} {self.unidade_medida}"
+
+
+class VersaoListagemQuerySet(models.QuerySet):
+    def incrementar(self, nome):
+        """Avança a versão da listagem `nome`, na transação da escrita que a altera.
+
+        O UPSERT trava a linha até o commit: outra escrita espera por ele, então as
+        versões saem na ordem dos commits (um timestamp da transação não sai).
+        """
+        tabela = VersaoListagem._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {tabela} (nome, versao) VALUES (%s, 1) "
+                f"ON CONFLICT (nome) DO UPDATE SET versao = {tabela}.versao + 1", [nome])
+
+    def atual(self, nome):
+        return self.filter(nome=nome).values_list('versao', flat=True).first() or 0
+
+    async def aatual(self, nome):
+        return await self.filter(nome=nome).values_list('versao', flat=True).afirst() or 0
+
+
+class VersaoListagem(models.Model):
+    """Versão de uma listagem, o marcador do seu ETag (ver `condicional`).
+
+    `save()`/`delete()` dos modelos de `LISTAGEM_DO_MODELO` a incrementam por sinal
+    (cadastro, admin). Escritas em massa (`update`, `bulk_create`, SQL) não disparam
+    sinais e chamam `VersaoListagem.objects.incrementar` explicitamente.
+    """
+    COOPERATIVAS = 'cooperativas'
+    # todas as listagens de solicitações (disponíveis, do produtor, do coletor)
+    SOLICITACOES = 'solicitacoes'
+
+    nome = models.CharField(max_length=30, primary_key=True)
+    versao = models.BigIntegerField(default=0)
+
+    objects = VersaoListagemQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'versao_listagem'
+
+    def __str__(self):
+        return f"{self.nome} v{self.versao}"
+
+
+LISTAGEM_DO_MODELO = {
+    Cooperativa: VersaoListagem.COOPERATIVAS,
+    SolicitacaoColeta: VersaoListagem.SOLICITACOES,
+    ItemColeta: VersaoListagem.SOLICITACOES,
+}
+
+
+def incrementar_listagem(sender, **kwargs):
+    """Receptor de post_save/post_delete (ligado em `apps.ready`)."""
+    VersaoListagem.objects.incrementar(LISTAGEM_DO_MODELO[sender])
@@ -0,0 +1,39 @@
+# backend/src/aplicativo_web/pagination.py
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+
+
+class IdCursorPagination(CursorPagination):
+    """Paginação por cursor (keyset) sobre `-id`.
+
+    Cada página é um `WHERE id < <cursor> ORDER BY id DESC LIMIT n`, então o custo
+    não cresce com a profundidade da página (sem OFFSET) e não há COUNT(*).
+    O cliente escolhe o tamanho com `page_size`, limitado por `PAGINACAO_MAX_PAGE_SIZE`.
+    """
+    ordering = '-id'
+    page_size = getattr(settings, 'PAGINACAO_PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'PAGINACAO_MAX_PAGE_SIZE', 100)
+
+    async def apaginate_queryset(self, queryset, request):
+        """`paginate_queryset` para as views assíncronas. `request` é o HttpRequest do Django.
+
+        É o próprio algoritmo do DRF (cursor, página + 1 para saber se há próxima, links),
+        rodado fora do event loop, então `get_paginated_response` devolve o mesmo corpo
+        da view síncrona. Como no ORM assíncrono, as consultas ocupam uma thread só
+        enquanto rodam.
+        """
+        return await sync_to_async(self.paginate_queryset)(queryset, Request(request))
+
+
+class CooperativaCursorPagination(IdCursorPagination):
+    """Cooperativas continuam listadas em ordem crescente de id."""
+    ordering = 'id'
+
+
+class RecompensaCursorPagination(IdCursorPagination):
+    """Recompensa usa `id_recompensa` como chave primária."""
+    ordering = '-id_recompensa'
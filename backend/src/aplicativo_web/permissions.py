@@ -1,56 +1,39 @@
 # backend/src/aplicativo_web/permissions.py
 
 from rest_framework import permissions
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
-class IsProdutor(permissions.BasePermission):
-    message = "Acesso negado. Token inválido, expirado ou usuário não é um Produtor."
+
+class _PerfilPermission(permissions.BasePermission):
+    """Base das permissões por perfil: lê o payload já validado pelo `CachedJWTAuthentication`."""
+    user_type = None
+    nome_perfil = None
 
     def has_permission(self, request, view):
-        print("\n--- Verificando permissão IsProdutor ---") 
-        auth_header = request.headers.get('Authorization')
-        print(f"Cabeçalho Authorization recebido: {auth_header}")
-
-        #Pegar o token manualmente do header
-        if not auth_header or not auth_header.startswith('Bearer '):
-            print("DEBUG: Cabeçalho Authorization ausente ou mal formatado.")
-            self.message = "Credenciais de autenticação (token Bearer) não fornecidas ou mal formatadas."
+        payload = request.auth
+        if not isinstance(payload, dict):
+            self.message = getattr(request, 'erro_token', None) or (
+                "Credenciais de autenticação (token Bearer) não fornecidas ou mal formatadas.")
             return False
 
-        # Pega a parte do token DEPOIS de "Bearer "
-        raw_token = auth_header.split(' ')[1] 
-        print(f"DEBUG: Token extraído: {raw_token[:10]}...") # Mostra só o início do token
-
-        jwt_authenticator = JWTAuthentication()
-
-        try:
-            print("DEBUG: Tentando validar o token extraído...") 
-            validated_token = jwt_authenticator.get_validated_token(raw_token)
-            print("DEBUG: Token validado com sucesso.") 
-
-            payload = validated_token.payload
-            user_type = payload.get('user_type')
-            user_id = payload.get('user_id') 
-            print(f"DEBUG: Payload do token: user_id={user_id}, user_type={user_type}") 
-
-            is_produtor = user_type == 'produtor'
-            print(f"DEBUG: É produtor? {is_produtor}") 
-
-            if is_produtor and user_id is not None:
-                request.auth_payload = payload 
-                print("DEBUG: Permissão CONCEDIDA.") 
-                return True 
-            else:
-                 print("DEBUG: Permissão NEGADA (Não é produtor ou falta user_id).") 
-                 self.message = "Acesso permitido apenas para usuários Produtores."
-                 return False 
-
-        except (InvalidToken, TokenError) as e:
-            print(f"DEBUG: Erro de Token: {e}") 
-            self.message = f"Token inválido ou expirado: {e}"
+        if payload.get('user_type') != self.user_type or payload.get('user_id') is None:
+            self.message = f"Acesso permitido apenas para usuários {self.nome_perfil}."
             return False
-        except Exception as e:
-            print(f"DEBUG: Erro inesperado na permissão: {e}") 
-            self.message = "Erro interno ao verificar permissão."
-            return False
\ No newline at end of file
+        return True
+
+
+class IsProdutor(_PerfilPermission):
+    message = "Acesso negado. Token inválido, expirado ou usuário não é um Produtor."
+    user_type = 'produtor'
+    nome_perfil = 'Produtores'
+
+
+class IsColetor(_PerfilPermission):
+    message = "Acesso negado. Token inválido, expirado ou usuário não é um Coletor."
+    user_type = 'coletor'
+    nome_perfil = 'Coletores'
+
+
+class IsCooperativa(_PerfilPermission):
+    message = "Acesso negado. Token inválido, expirado ou usuário não é uma Cooperativa."
+    user_type = 'cooperativa'
+    nome_perfil = 'Cooperativas'
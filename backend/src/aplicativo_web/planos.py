@@ -0,0 +1,192 @@
+# backend/src/aplicativo_web/planos.py
+"""Verificação dos planos das consultas quentes (`manage.py verificar_planos`).
+
+Cada consulta de `CONSULTAS_QUENTES` é montada como a view correspondente a monta e
+passada por `EXPLAIN (FORMAT JSON)`. Uma consulta reprova se algum nó do plano for
+`Seq Scan`. Por padrão a checagem roda com `enable_seqscan = off`: o planejador só
+recorre à varredura sequencial quando nenhum índice serve a consulta. Assim o resultado
+não depende do tamanho da tabela, e um índice removido ou uma consulta que deixou de
+usá-lo aparece mesmo numa base pequena.
+"""
+
+import json
+import random
+from datetime import timedelta
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from .geo import DistanciaKNN
+from .models import (Coletor, Cooperativa, HistoricoStatusSolicitacao, ItemColeta, LancamentoPontos, Produtor,
+                     Recompensa, SolicitacaoColeta)
+from .transicoes import registrar_criacao
+
+# Página de listagem como a paginação por cursor pede (page_size + 1)
+PAGINA = 21
+RAIO_M = 5000
+
+
+def _disponiveis(ctx):
+    return SolicitacaoColeta.objects.para_listagem().filter(status='SOLICITADA').order_by('-id')[:PAGINA]
+
+
+def _disponiveis_pagina(ctx):
+    return (SolicitacaoColeta.objects.para_listagem()
+            .filter(status='SOLICITADA', id__lt=ctx['cursor']).order_by('-id')[:PAGINA])
+
+
+def _disponiveis_proximas(ctx):
+    return (SolicitacaoColeta.objects.para_listagem().filter(status='SOLICITADA')
+            .proximas_de(ctx['ponto'], RAIO_M)[:50])
+
+
+def _minhas_solicitacoes(ctx):
+    return (SolicitacaoColeta.objects.para_listagem()
+            .filter(produtor_id=ctx['produtor_id']).order_by('-id')[:PAGINA])
+
+
+def _minhas_coletas(ctx):
+    return (SolicitacaoColeta.objects.select_related('produtor', 'coletor')
+            .filter(coletor_id=ctx['coletor_id']).order_by('-id')[:PAGINA])
+
+
+def _rota_coletor(ctx):
+    return (SolicitacaoColeta.objects.filter(coletor_id=ctx['coletor_id'], status='ACEITA')
+            .order_by('-id').values('id', 'inicio_coleta', 'fim_coleta', 'produtor__geom'))
+
+
+def _itens_da_pagina(ctx):
+    return ItemColeta.objects.filter(solicitacao_id__in=ctx['pagina'])
+
+
+def _cooperativas_proximas(ctx):
+    return (Cooperativa.objects.filter(geom__isnull=False)
+            .order_by(DistanciaKNN('geom', ctx['ponto'])).values('id', 'geom')[:40])
+
+
+def _extrato_pontos(ctx):
+    return LancamentoPontos.objects.filter(produtor_id=ctx['produtor_id']).order_by('-id')[:PAGINA]
+
+
+def _recompensas(ctx):
+    return Recompensa.objects.filter(id_produtor_id=ctx['produtor_id']).order_by('-id_recompensa')[:PAGINA]
+
+
+def _historico_solicitacao(ctx):
+    return HistoricoStatusSolicitacao.objects.filter(solicitacao_id=ctx['pagina'][0]).order_by('versao')
+
+
+def _entradas_no_status(ctx):
+    # base das métricas de SLA (transicoes.tempos_entre_status)
+    return HistoricoStatusSolicitacao.objects.filter(
+        status_novo='ACEITA', criado_em__gte=timezone.now() - timedelta(days=7))
+
+
+CONSULTAS_QUENTES = {
+    'disponiveis': _disponiveis,
+    'disponiveis_pagina': _disponiveis_pagina,
+    'disponiveis_proximas': _disponiveis_proximas,
+    'minhas_solicitacoes': _minhas_solicitacoes,
+    'minhas_coletas': _minhas_coletas,
+    'rota_coletor': _rota_coletor,
+    'itens_da_pagina': _itens_da_pagina,
+    'cooperativas_proximas': _cooperativas_proximas,
+    'extrato_pontos': _extrato_pontos,
+    'recompensas': _recompensas,
+    'historico_solicitacao': _historico_solicitacao,
+    'entradas_no_status': _entradas_no_status,
+}
+
+
+def semear(solicitacoes=5000, seed=42):
+    """Massa sintética para os planos: poucas solicitações abertas, como em produção.
+
+    Deve rodar dentro de uma transação que o chamador desfaz. Termina com ANALYZE para
+    que o planejador veja as estatísticas da massa.
+    """
+    rng = random.Random(seed)
+    agora = timezone.now()
+    prefixo = f"pl{rng.randrange(10 ** 4)}"  # cabe no cpf (14)
+
+    def ponto():
+        return Point(-42.80 + rng.uniform(-0.2, 0.2), -5.09 + rng.uniform(-0.2, 0.2), srid=4326)
+
+    produtores = Produtor.objects.bulk_create([
+        Produtor(nome=f"Produtor {i}", email=f"{prefixo}p{i}@exemplo.com", senha='x',
+                 cpf_cnpj=f"{prefixo}p{i}", cidade='Teresina', estado='PI', geom=ponto())
+        for i in range(max(solicitacoes // 20, 1))
+    ])
+    coletores = Coletor.objects.bulk_create([
+        Coletor(nome=f"Coletor {i}", email=f"{prefixo}c{i}@exemplo.com", senha='x',
+                cpf=f"{prefixo}c{i}", geom=ponto())
+        for i in range(max(solicitacoes // 100, 1))
+    ])
+    Cooperativa.objects.bulk_create([
+        Cooperativa(nome_empresa=f"Cooperativa {i}", email=f"{prefixo}k{i}@exemplo.com", senha='x',
+                    cnpj=f"{prefixo}k{i}", geom=ponto())
+        for i in range(50)
+    ])
+    novas = []
+    for _ in range(solicitacoes):
+        s = rng.choices(['SOLICITADA', 'ACEITA', 'CONFIRMADA', 'CANCELADA'], weights=[1, 1, 7, 1])[0]
+        inicio = agora + timedelta(hours=rng.uniform(-720, 48))
+        novas.append(SolicitacaoColeta(
+            produtor=rng.choice(produtores), status=s, inicio_coleta=inicio,
+            fim_coleta=inicio + timedelta(hours=3),
+            coletor=None if s == 'SOLICITADA' else rng.choice(coletores)))
+    novas = SolicitacaoColeta.objects.bulk_create(novas)
+    ItemColeta.objects.bulk_create([
+        ItemColeta(solicitacao=s, quantidade=rng.randint(1, 50)) for s in novas for _ in range(2)
+    ])
+    registrar_criacao(novas, origem='planos')
+    with connection.cursor() as cursor:
+        for modelo in (Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta, HistoricoStatusSolicitacao):
+            cursor.execute(f"ANALYZE {modelo._meta.db_table}")
+
+
+def contexto():
+    """Parâmetros das consultas tirados da base (produtor e coletor com mais linhas)."""
+    produtor_id = (SolicitacaoColeta.objects.order_by().values('produtor_id')
+                   .annotate(n=Count('id')).order_by('-n').values_list('produtor_id', flat=True).first())
+    coletor_id = (SolicitacaoColeta.objects.filter(coletor__isnull=False).order_by().values('coletor_id')
+                  .annotate(n=Count('id')).order_by('-n').values_list('coletor_id', flat=True).first())
+    ponto = (Produtor.objects.filter(geom__isnull=False).values_list('geom', flat=True).first()
+             or Point(-42.80, -5.09, srid=4326))
+    pagina = list(SolicitacaoColeta.objects.order_by('-id').values_list('id', flat=True)[:PAGINA])
+    return {
+        'produtor_id': produtor_id or 0,
+        'coletor_id': coletor_id or 0,
+        'ponto': ponto,
+        'cursor': pagina[len(pagina) // 2] if pagina else 0,
+        'pagina': pagina or [0],
+    }
+
+
+def varreduras_sequenciais(plano):
+    """Tabelas varridas sequencialmente em algum nó do plano (inclusive subplanos)."""
+    tabelas = []
+    pendentes = [plano]
+    while pendentes:
+        no = pendentes.pop()
+        if no.get('Node Type') == 'Seq Scan':
+            tabelas.append(no.get('Relation Name'))
+        pendentes.extend(no.get('Plans', []))
+    return tabelas
+
+
+def verificar_planos(ctx, forcar_indices=True, consultas=None):
+    """EXPLAIN de cada consulta quente. Retorna {nome: (plano raiz, tabelas varridas)}.
+
+    Com `forcar_indices`, desliga `enable_seqscan` só dentro da transação corrente
+    (SET LOCAL); o chamador deve estar num `transaction.atomic()`.
+    """
+    if forcar_indices:
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    resultado = {}
+    for nome, montar in (consultas or CONSULTAS_QUENTES).items():
+        plano = json.loads(montar(ctx).explain(format='json'))[0]['Plan']
+        resultado[nome] = (plano, varreduras_sequenciais(plano))
+    return resultado
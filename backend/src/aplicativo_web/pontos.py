@@ -0,0 +1,116 @@
+# backend/src/aplicativo_web/pontos.py
+"""Pontos do produtor: livro-razão `LancamentoPontos` com saldo em `Produtor.saldo_pontos`.
+
+Todo crédito ou débito é um lançamento com chave de idempotência única, gravado na
+mesma transação do incremento atômico do saldo (`saldo_pontos = saldo_pontos + x`).
+Ler o saldo é ler uma coluna. `manage.py reconciliar_pontos` confere o saldo contra a
+soma dos lançamentos.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import ItemColeta, LancamentoPontos, Produtor
+
+CENTAVO = Decimal('0.01')
+
+
+class SaldoInsuficiente(Exception):
+    """O débito deixaria o saldo do produtor negativo."""
+
+
+def pontos_da_solicitacao(solicitacao_id):
+    """Pontos de uma coleta: quantidade de cada item x pontos do tipo x fator da unidade."""
+    por_tipo = getattr(settings, 'PONTOS_POR_TIPO', {})
+    fator_unidade = getattr(settings, 'PONTOS_FATOR_UNIDADE', {})
+    itens = (
+        ItemColeta.objects.filter(solicitacao_id=solicitacao_id).order_by()
+        .values('tipo_residuo', 'unidade_medida').annotate(total=Sum('quantidade'))
+    )
+    pontos = sum(
+        (linha['total'] * Decimal(str(por_tipo.get(linha['tipo_residuo'], 0)))
+         * Decimal(str(fator_unidade.get(linha['unidade_medida'], 0))) for linha in itens),
+        Decimal('0'),
+    )
+    return pontos.quantize(CENTAVO)
+
+
+def lancar(produtor_id, pontos, tipo, chave, solicitacao_id=None, permitir_negativo=False):
+    """Grava o lançamento e aplica ao saldo. Retorna False se `chave` já foi lançada.
+
+    Débitos (pontos < 0) só passam se houver saldo (`UPDATE ... WHERE saldo_pontos >= x`);
+    senão levanta SaldoInsuficiente e nada é gravado.
+    """
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                LancamentoPontos.objects.create(
+                    produtor_id=produtor_id, solicitacao_id=solicitacao_id, tipo=tipo,
+                    pontos=pontos, chave_idempotencia=chave)
+        except IntegrityError:
+            return False
+
+        produtor = Produtor.objects.filter(pk=produtor_id)
+        if pontos < 0 and not permitir_negativo:
+            produtor = produtor.filter(saldo_pontos__gte=-pontos)
+        if not produtor.update(saldo_pontos=F('saldo_pontos') + pontos):
+            raise SaldoInsuficiente(f"Saldo insuficiente para debitar {-pontos} pontos.")
+    return True
+
+
+def ajustar_pontos_por_status(solicitacao, anterior, novo):
+    """Credita a coleta ao entrar em CONFIRMADA e estorna ao sair dela.
+
+    A chave é 'coleta:<id>:<n>', com n = lançamentos que a coleta já tem: PATCHes
+    repetidos ou simultâneos geram a mesma chave e só o primeiro é gravado. Chamar com
+    a solicitação travada, na transação da mudança de status.
+    """
+    if (anterior == 'CONFIRMADA') == (novo == 'CONFIRMADA'):
+        return None
+    lancados = LancamentoPontos.objects.filter(
+        solicitacao_id=solicitacao.pk, tipo__in=['COLETA', 'ESTORNO']).aggregate(n=Count('id'), liquido=Sum('pontos'))
+    liquido = lancados['liquido'] or Decimal('0')
+    chave = f"coleta:{solicitacao.pk}:{lancados['n']}"
+
+    if novo == 'CONFIRMADA' and liquido == 0:
+        pontos = pontos_da_solicitacao(solicitacao.pk)
+        if pontos > 0:
+            lancar(solicitacao.produtor_id, pontos, 'COLETA', chave, solicitacao.pk)
+            return pontos
+    elif anterior == 'CONFIRMADA' and liquido > 0:
+        # o produtor pode já ter gastado os pontos: o estorno entra mesmo assim
+        lancar(solicitacao.produtor_id, -liquido, 'ESTORNO', chave, solicitacao.pk, permitir_negativo=True)
+        return -liquido
+    return None
+
+
+def divergencias_de_saldo():
+    """Produtores cujo saldo difere da soma dos lançamentos, numa única consulta.
+
+    Retorna [(produtor_id, saldo gravado, soma do livro-razão)].
+    """
+    soma = (
+        LancamentoPontos.objects.filter(produtor=OuterRef('pk')).order_by()
+        .values('produtor').annotate(total=Sum('pontos')).values('total')
+    )
+    return list(
+        Produtor.objects.annotate(soma=Coalesce(Subquery(soma), Value(Decimal('0')), output_field=DecimalField()))
+        .exclude(saldo_pontos=F('soma')).order_by('pk').values_list('pk', 'saldo_pontos', 'soma')
+    )
+
+
+def corrigir_saldo(produtor_id):
+    """Iguala o saldo à soma dos lançamentos.
+
+    Trava o produtor antes de somar: um crédito em andamento que já travou a linha
+    termina antes e entra na soma; um que ainda não travou soma o seu incremento depois.
+    """
+    with transaction.atomic():
+        Produtor.objects.select_for_update().filter(pk=produtor_id).values_list('pk').first()
+        soma = LancamentoPontos.objects.filter(produtor_id=produtor_id).aggregate(total=Sum('pontos'))['total']
+        Produtor.objects.filter(pk=produtor_id).update(saldo_pontos=soma or Decimal('0'))
+    return soma or Decimal('0')
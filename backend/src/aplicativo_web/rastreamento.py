@@ -0,0 +1,161 @@
+# backend/src/aplicativo_web/rastreamento.py
+"""Id de requisição e rastreamento amostrado (spans de autenticação, banco e geocodificação).
+
+Toda requisição recebe um id (o `X-Request-ID` recebido, se válido, ou um novo),
+devolvido no header de mesmo nome e incluído em todo log emitido durante ela (ver
+`logs.FiltroRequisicao`). Só uma fração das requisições (`RASTREAMENTO_AMOSTRAGEM`,
+ou as que pedem com `X-Rastrear: 1` em DEBUG) coleta spans; nas demais, `span()` custa
+uma leitura de ContextVar. Ao fim de uma requisição amostrada, os spans vão num único
+registro de log. Requisições acima de `RASTREAMENTO_LENTO_MS` sempre geram uma linha
+de resumo com os tempos já medidos por `metricas`, amostradas ou não.
+"""
+
+import logging
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metricas import medicao_atual
+
+logger = logging.getLogger(__name__)
+
+_rastro = ContextVar('rastro', default=None)
+ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+MAXIMO_SPANS = 200
+
+
+class Rastro:
+    __slots__ = ('request_id', 'amostrado', 'inicio', 'spans', 'descartados')
+
+    def __init__(self, request_id, amostrado):
+        self.request_id = request_id
+        self.amostrado = amostrado
+        self.inicio = time.perf_counter()
+        self.spans = []
+        self.descartados = 0
+
+    def adicionar(self, nome, inicio, fim, atributos):
+        if len(self.spans) >= MAXIMO_SPANS:
+            self.descartados += 1
+            return
+        self.spans.append({'nome': nome, 'inicio_ms': round((inicio - self.inicio) * 1000, 2),
+                           'duracao_ms': round((fim - inicio) * 1000, 2), **atributos})
+
+
+def request_id_atual():
+    rastro = _rastro.get()
+    return rastro.request_id if rastro is not None else None
+
+
+class span:
+    """Marca um trecho da requisição corrente: `with span('geocodificacao', cep=...)`.
+
+    Não faz nada quando a requisição não foi amostrada ou fora de requisição.
+    """
+    __slots__ = ('nome', 'atributos', 'rastro', 'inicio')
+
+    def __init__(self, nome, **atributos):
+        self.nome = nome
+        self.atributos = atributos
+
+    def __enter__(self):
+        rastro = _rastro.get()
+        self.rastro = rastro if rastro is not None and rastro.amostrado else None
+        if self.rastro is not None:
+            self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_erro, erro, tb):
+        if self.rastro is not None:
+            if tipo_erro is not None:
+                self.atributos['erro'] = tipo_erro.__name__
+            self.rastro.adicionar(self.nome, self.inicio, time.perf_counter(), self.atributos)
+
+
+def rastrear_consulta(execute, sql, params, many, context):
+    """Execute wrapper: um span por consulta nas requisições amostradas (só o SQL, sem parâmetros)."""
+    rastro = _rastro.get()
+    if rastro is None or not rastro.amostrado:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        rastro.adicionar('db', inicio, time.perf_counter(), {'sql': sql[:200]})
+
+
+def instalar_em_conexao(sender, connection, **kwargs):
+    """Receiver de `connection_created` (ver `metricas.instalar_em_conexao`)."""
+    if rastrear_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(rastrear_consulta)
+
+
+class RastreamentoMiddleware:
+    """Abre o rastro da requisição; deve vir logo depois de `MetricasMiddleware`."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+        self.amostragem = getattr(settings, 'RASTREAMENTO_AMOSTRAGEM', 0.01)
+        self.lento = getattr(settings, 'RASTREAMENTO_LENTO_MS', 1000) / 1000
+
+    def _abrir(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not ID_VALIDO.match(request_id):
+            request_id = uuid.uuid4().hex
+        forcado = settings.DEBUG and request.headers.get('X-Rastrear') == '1'
+        return Rastro(request_id, forcado or random.random() < self.amostragem)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        rastro = self._abrir(request)
+        token = _rastro.set(rastro)
+        try:
+            response = self.get_response(request)
+            self._concluir(request, response, rastro)
+        finally:
+            _rastro.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        rastro = self._abrir(request)
+        token = _rastro.set(rastro)
+        try:
+            response = await self.get_response(request)
+            self._concluir(request, response, rastro)
+        finally:
+            _rastro.reset(token)
+        return response
+
+    def _concluir(self, request, response, rastro):
+        response['X-Request-ID'] = rastro.request_id
+        total = time.perf_counter() - rastro.inicio
+        if not rastro.amostrado and total < self.lento:
+            return
+        match = getattr(request, 'resolver_match', None)
+        dados = {
+            'metodo': request.method,
+            'endpoint': match.route if match is not None else None,
+            'status': response.status_code,
+            'duracao_ms': round(total * 1000, 2),
+        }
+        medicao = medicao_atual()
+        if medicao is not None:
+            dados.update(db_ms=round(medicao.db * 1000, 2), consultas=medicao.consultas,
+                         serializacao_ms=round(medicao.serializacao * 1000, 2),
+                         geocodificacao_ms=round(medicao.geocodificacao * 1000, 2))
+        if rastro.amostrado:
+            dados.update(spans=rastro.spans, spans_descartados=rastro.descartados)
+            logger.info("rastro %s %s", request.method, request.path, extra={'dados': dados})
+        else:
+            logger.warning("requisição lenta %s %s", request.method, request.path, extra={'dados': dados})
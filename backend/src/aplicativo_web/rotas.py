@@ -0,0 +1,174 @@
+# backend/src/aplicativo_web/rotas.py
+"""Ordem de visita das coletas aceitas por um coletor.
+
+Heurística clássica para roteamento com janelas de tempo: construção pelo vizinho mais
+próximo (preferindo quem ainda cabe na janela) seguida de 2-opt até não haver melhora ou
+acabar o orçamento de tempo (`ROTA_ORCAMENTO_MS`). O custo de uma rota é a distância
+total mais uma penalidade por minuto de atraso além de `fim_coleta`; chegar antes de
+`inicio_coleta` só faz o coletor esperar. As distâncias são em linha reta (haversine);
+os tempos de deslocamento usam `ROTA_FATOR_DESVIO` para aproximar o trajeto pelas ruas.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+
+from .geo import haversine_m
+
+# Metros equivalentes a cada segundo de atraso: 1 km por minuto atrasado
+PENALIDADE_ATRASO_M_POR_S = 1000 / 60
+
+
+def _parametros():
+    return {
+        'velocidade': getattr(settings, 'ROTA_VELOCIDADE_KMH', 25) / 3.6,
+        'fator_desvio': getattr(settings, 'ROTA_FATOR_DESVIO', 1.3),
+        'atendimento': getattr(settings, 'ROTA_TEMPO_ATENDIMENTO_MIN', 10) * 60,
+        'orcamento': getattr(settings, 'ROTA_ORCAMENTO_MS', 500) / 1000,
+    }
+
+
+class _Instancia:
+    """Matriz de distâncias e janelas (em segundos desde a partida); o nó 0 é a origem."""
+
+    def __init__(self, origem, paradas, partida, parametros):
+        pontos = [origem] + [(p['lat'], p['lng']) for p in paradas]
+        n = len(pontos)
+        self.distancia = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                d = haversine_m(pontos[i][0], pontos[i][1], pontos[j][0], pontos[j][1])
+                self.distancia[i][j] = self.distancia[j][i] = d
+        self.abre = [0.0] + [(p['inicio'] - partida).total_seconds() for p in paradas]
+        self.fecha = [float('inf')] + [(p['fim'] - partida).total_seconds() for p in paradas]
+        self.segundos_por_metro = parametros['fator_desvio'] / parametros['velocidade']
+        self.atendimento = parametros['atendimento']
+
+    def estado_inicial(self):
+        # (instante, posição, distância acumulada, atraso acumulado)
+        return 0.0, 0, 0.0, 0.0
+
+    def visitar(self, estado, no):
+        t, pos, dist, atraso = estado
+        d = self.distancia[pos][no]
+        chegada = max(t + d * self.segundos_por_metro, self.abre[no])
+        return chegada + self.atendimento, no, dist + d, atraso + max(0.0, chegada - self.fecha[no])
+
+    @staticmethod
+    def custo(estado):
+        return estado[2] + estado[3] * PENALIDADE_ATRASO_M_POR_S
+
+    def estados(self, rota):
+        """estados[k] é o estado antes de visitar rota[k]; o último é o final."""
+        estado = self.estado_inicial()
+        resultado = [estado]
+        for no in rota:
+            estado = self.visitar(estado, no)
+            resultado.append(estado)
+        return resultado
+
+    def custo_a_partir(self, rota, k, estado, limite):
+        """Custo de `rota` reaproveitando o prefixo até k; desiste ao passar de `limite`."""
+        for no in rota[k:]:
+            estado = self.visitar(estado, no)
+            if self.custo(estado) >= limite:
+                return limite
+        return self.custo(estado)
+
+
+def _vizinho_mais_proximo(inst, n):
+    restantes = set(range(1, n + 1))
+    estado = inst.estado_inicial()
+    rota = []
+    while restantes:
+        proximo = min(restantes, key=lambda no: inst.custo(inst.visitar(estado, no)) - inst.custo(estado))
+        restantes.remove(proximo)
+        rota.append(proximo)
+        estado = inst.visitar(estado, proximo)
+    return rota
+
+
+def _dois_opt(inst, rota, prazo, so_encurtando):
+    """Melhora `rota` por reversões de trechos. Retorna (rota, convergiu).
+
+    Com `so_encurtando`, só testa (em O(n) cada) as reversões que encurtam a rota, o que
+    o delta de distância diz em O(1); sem, testa todas, o que só compensa havendo atraso.
+    """
+    d = inst.distancia
+    n = len(rota)
+    estados = inst.estados(rota)
+    custo_atual = inst.custo(estados[-1])
+    melhorou = True
+    while melhorou:
+        melhorou = False
+        for i in range(n - 1):
+            if time.perf_counter() > prazo:
+                return rota, False
+            a = rota[i - 1] if i else 0
+            for j in range(i + 1, n):
+                if so_encurtando:
+                    b, c = rota[i], rota[j]
+                    delta = d[a][c] - d[a][b]
+                    if j + 1 < n:
+                        delta += d[b][rota[j + 1]] - d[c][rota[j + 1]]
+                    if delta >= -1e-6:
+                        continue
+                nova = rota[:i] + rota[i:j + 1][::-1] + rota[j + 1:]
+                custo = inst.custo_a_partir(nova, i, estados[i], custo_atual - 1e-6)
+                if custo < custo_atual - 1e-6:
+                    rota, custo_atual = nova, custo
+                    estados = inst.estados(rota)
+                    melhorou = True
+    return rota, True
+
+
+def otimizar_rota(paradas, partida, origem=None):
+    """Ordena as paradas minimizando distância e atrasos.
+
+    `paradas`: dicts com `id`, `lat`, `lng`, `inicio` e `fim` (datetimes). `origem` é
+    (lat, lng) de onde o coletor sai; sem ela a rota começa na parada de janela mais cedo.
+    Retorna um dict com as paradas na nova ordem (distância do trecho, chegada prevista
+    e atraso de cada uma), a distância total e a da ordem recebida, para comparação.
+    """
+    parametros = _parametros()
+    inicio_calculo = time.perf_counter()
+    if origem is None and paradas:
+        primeira = min(paradas, key=lambda p: p['inicio'])
+        origem = (primeira['lat'], primeira['lng'])
+    inst = _Instancia(origem or (0.0, 0.0), paradas, partida, parametros)
+    n = len(paradas)
+
+    rota = _vizinho_mais_proximo(inst, n)
+    prazo = inicio_calculo + parametros['orcamento']
+    rota, convergiu = _dois_opt(inst, rota, prazo, so_encurtando=True)
+    if convergiu and inst.estados(rota)[-1][3] > 0:
+        # atrasos restantes: reversões que andam mais mas chegam a tempo também valem
+        rota, convergiu = _dois_opt(inst, rota, prazo, so_encurtando=False)
+    original = list(range(1, n + 1))
+    if inst.custo(inst.estados(original)[-1]) < inst.custo(inst.estados(rota)[-1]):
+        rota = original
+
+    estados = inst.estados(rota)
+    ordem = []
+    for k, no in enumerate(rota):
+        antes, depois = estados[k], estados[k + 1]
+        chegada = depois[0] - inst.atendimento
+        parada = paradas[no - 1]
+        ordem.append({
+            'id': parada['id'],
+            'ordem': k + 1,
+            'latitude': parada['lat'],
+            'longitude': parada['lng'],
+            'distancia_trecho_m': round(depois[2] - antes[2], 1),
+            'chegada_prevista': partida + timedelta(seconds=chegada),
+            'atraso_min': round(max(0.0, chegada - inst.fecha[no]) / 60, 1),
+        })
+    return {
+        'paradas': ordem,
+        'distancia_total_m': round(estados[-1][2], 1),
+        'distancia_ordem_original_m': round(inst.estados(original)[-1][2], 1),
+        'atraso_total_min': round(estados[-1][3] / 60, 1),
+        'otimizacao_completa': convergiu,
+        'tempo_calculo_ms': round((time.perf_counter() - inicio_calculo) * 1000, 1),
+    }
@@ -0,0 +1,172 @@
+# backend/src/aplicativo_web/senhas.py
+"""Senhas com hash (hashers do Django), rehash no login e verificação num pool de threads.
+
+O custo do hash fica em `SENHAS_PBKDF2_ITERACOES` (ver `PBKDF2Ajustavel`). Quando o valor
+muda, ou quando a senha ainda está no formato antigo (texto puro), o login bem-sucedido
+regrava a senha no formato atual; não há janela em que contas antigas param de entrar.
+
+A verificação é CPU pura e o `hashlib.pbkdf2_hmac` solta o GIL, então ela roda num pool
+de `SENHAS_THREADS` threads (padrão: uma por núcleo). Com mais hashes simultâneos que
+núcleos, todos ficariam mais lentos sem aumentar a vazão; com o pool, o excedente espera
+na fila e os primeiros terminam no tempo de um hash. `verificar_senha` (login síncrono)
+só limita a concorrência: a thread da requisição espera a fila e o hash. Quem não pode
+bloquear é `averificar_senha` (`async/login/`): o event loop aguarda o pool e segue
+atendendo as outras requisições. `manage.py benchmark_senhas` mede logins/s por núcleo
+para cada número de iterações.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, get_hashers, identify_hasher, make_password, verify_password,
+)
+from django.utils.crypto import constant_time_compare
+
+from .contas import TIPOS_DE_CONTA
+
+MODELOS_POR_TIPO = {user_type: modelo for modelo, user_type, _, _ in TIPOS_DE_CONTA}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PBKDF2Ajustavel(PBKDF2PasswordHasher):
+    """pbkdf2_sha256 com as iterações em `SENHAS_PBKDF2_ITERACOES`.
+
+    Mesmo algoritmo e formato do hasher padrão do Django; só o fator de trabalho vem do
+    settings. Hashes com outro número de iterações continuam válidos e são regravados no
+    próximo login (para mais ou para menos).
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'SENHAS_PBKDF2_ITERACOES', PBKDF2PasswordHasher.iterations)
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            threads = getattr(settings, 'SENHAS_THREADS', None) or os.cpu_count() or 1
+            _pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='senhas')
+        return _pool
+
+
+def e_hash(valor):
+    try:
+        identify_hasher(valor)
+    except ValueError:
+        return False
+    return True
+
+
+def conferir(senha, armazenada):
+    """(correta, novo hash ou None). Só CPU, sem banco: é o que roda no pool.
+
+    `armazenada` None (conta inexistente) ainda custa um hash, para o tempo de resposta
+    não revelar quais emails têm conta. Valores que nenhum hasher reconhece são senhas do
+    formato antigo, comparadas em tempo constante.
+    """
+    if armazenada is None:
+        make_password(senha)
+        return False, None
+    if not e_hash(armazenada):
+        if constant_time_compare(senha, armazenada):
+            return True, make_password(senha)
+        make_password(senha)
+        return False, None
+    correta, atualizar = verify_password(senha, armazenada)
+    return correta, (make_password(senha) if correta and atualizar else None)
+
+
+def _a_regravar(conta, anterior):
+    # condicional: se a senha mudou entre a leitura e aqui, não sobrescreve
+    return MODELOS_POR_TIPO[conta.user_type].objects.filter(pk=conta.pk, senha=anterior)
+
+
+def verificar_senha(conta, senha):
+    """Confere a senha de uma `contas.Conta` (ou None) e regrava o hash se preciso."""
+    armazenada = conta.senha if conta is not None else None
+    correta, novo = _executor().submit(conferir, senha, armazenada).result()
+    if novo is not None:
+        _a_regravar(conta, armazenada).update(senha=novo)
+    return correta
+
+
+async def averificar_senha(conta, senha):
+    """`verificar_senha` para views assíncronas: aguarda o pool sem bloquear o event loop."""
+    armazenada = conta.senha if conta is not None else None
+    correta, novo = await asyncio.get_running_loop().run_in_executor(_executor(), conferir, senha, armazenada)
+    if novo is not None:
+        await _a_regravar(conta, armazenada).aupdate(senha=novo)
+    return correta
+
+
+def _regex_hashes():
+    """Casa com os valores que começam pelo algoritmo de um hasher configurado."""
+    algoritmos = '|'.join(re.escape(hasher.algorithm) for hasher in get_hashers())
+    return rf'^({algoritmos})\$'
+
+
+def migrar_senhas_legadas(lote=500):
+    """Converte as senhas em texto puro que ainda restam (contas sem login desde a troca).
+
+    Os hashes de cada lote são calculados no pool. Retorna {user_type: convertidas}.
+    """
+    convertidas = {}
+    for modelo, user_type, _, _ in TIPOS_DE_CONTA:
+        convertidas[user_type] = 0
+        ultimo = 0
+        while True:
+            linhas = list(
+                modelo.objects.filter(pk__gt=ultimo).exclude(senha__regex=_regex_hashes())
+                .order_by('pk').values_list('pk', 'senha')[:lote])
+            if not linhas:
+                break
+            ultimo = linhas[-1][0]
+            legadas = [(pk, senha) for pk, senha in linhas if not e_hash(senha)]
+            hashes = _executor().map(make_password, [senha for _, senha in legadas])
+            for (pk, senha), novo in zip(legadas, hashes):
+                convertidas[user_type] += modelo.objects.filter(pk=pk, senha=senha).update(senha=novo)
+    return convertidas
+
+
+def medir_verificacoes(iteracoes, threads, duracao=3.0):
+    """Vazão de verificações de senha correta com `iteracoes` de PBKDF2, em `threads` threads.
+
+    Mede só o hash, que domina o custo do login. Retorna logins/s no total e por núcleo
+    (dividido pelo menor entre threads e núcleos) e a latência de uma verificação.
+    """
+    hasher = PBKDF2Ajustavel()
+    codificada = hasher.encode('senha-de-teste', hasher.salt(), iterations=iteracoes)
+    inicio = time.perf_counter()
+    hasher.verify('senha-de-teste', codificada)
+    latencia = time.perf_counter() - inicio
+
+    contagens = [0] * threads
+    fim = time.perf_counter() + duracao
+
+    def trabalhar(indice):
+        while time.perf_counter() < fim:
+            hasher.verify('senha-de-teste', codificada)
+            contagens[indice] += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(trabalhar, range(threads)))
+    decorrido = time.perf_counter() - inicio
+    nucleos = min(threads, os.cpu_count() or 1)
+    por_segundo = sum(contagens) / decorrido
+    return {
+        'iteracoes': iteracoes,
+        'threads': threads,
+        'logins_por_segundo': round(por_segundo, 1),
+        'logins_por_segundo_por_nucleo': round(por_segundo / nucleos, 1),
+        'latencia_ms': round(latencia * 1000, 2),
+    }
@@ -1,48 +1,17 @@
 # backend/src/aplicativo_web/serializers.py
 from rest_framework import serializers
 import re
-from .models import Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta
-from django.contrib.gis.geos import Point
-import requests
-
-def geocode_address(rua, numero, bairro, cidade, estado, cep):
-    endereco = f"{rua} {numero}, {bairro}, {cidade}, {estado}, {cep}, Brasil"
-
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": endereco, "format": "json", "limit": 1}
-
-    r = requests.get(url, params=params, headers={"User-Agent": "ReciclaAi"})
-
-    if r.status_code != 200 or len(r.json()) == 0:
-        return None
-
-    dados = r.json()[0]
-
-    lat = float(dados["lat"])
-    lon = float(dados["lon"])
-
-    return Point(lon, lat, srid=4326)
+from django.contrib.auth.hashers import make_password
+from .models import Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta, LancamentoPontos, Recompensa, VersaoListagem
+from django.db import transaction
+from .geocoding import enfileirar_geocodificacao
+from .cooperativas import invalidar_cooperativas_proximas
+from .volumes import registrar_itens_criados
+from .transicoes import registrar_criacao
+from .metricas import SerializacaoMedida
 
 # --- Serializers de Registro (Atualizados para novos campos) ---
-def create(self, validated_data):
-        try:
-            # Extrai endereço
-            rua = validated_data.get("rua")
-            numero = validated_data.get("numero")
-            bairro = validated_data.get("bairro")
-            cidade = validated_data.get("cidade")
-            estado = validated_data.get("estado")
-            cep = validated_data.get("cep")
-
-            # Tenta geocodificar
-            ponto = geocode_address(rua, numero, bairro, cidade, estado, cep)
-            if ponto:
-                validated_data["geom"] = ponto
-
-            return super().create(validated_data)
 
-        except Exception as e:
-            raise serializers.ValidationError({'detail': str(e)})
 
 class ProdutorRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -63,24 +32,15 @@ class ProdutorRegistrationSerializer(serializers.ModelSerializer):
         }
 
     def create(self, validated_data):
-            try:
-                # Extrai endereço
-                rua = validated_data.get("rua")
-                numero = validated_data.get("numero")
-                bairro = validated_data.get("bairro")
-                cidade = validated_data.get("cidade")
-                estado = validated_data.get("estado")
-                cep = validated_data.get("cep")
-
-                # Tenta geocodificar
-                ponto = geocode_address(rua, numero, bairro, cidade, estado, cep)
-                if ponto:
-                    validated_data["geom"] = ponto
-
-                return super().create(validated_data)
-
-            except Exception as e:
-                raise serializers.ValidationError({'detail': str(e)})
+        try:
+            # Salva já; a geocodificação do endereço fica para o worker em segundo plano
+            with transaction.atomic():
+                produtor = super().create(validated_data)
+                if produtor.geom is None:
+                    enfileirar_geocodificacao(produtor)
+            return produtor
+        except Exception as e:
+            raise serializers.ValidationError({'detail': str(e)})
 
     def validate_cep(self, value):
         """Remove caracteres não numéricos do CEP antes de salvar."""
@@ -88,6 +48,10 @@ class ProdutorRegistrationSerializer(serializers.ModelSerializer):
             return value
         return re.sub(r"\D", "", str(value))
 
+    def validate_senha(self, value):
+        """Grava só o hash (hasher e iterações do settings)."""
+        return make_password(value)
+
 
 class ColetorRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -117,21 +81,34 @@ class ColetorRegistrationSerializer(serializers.ModelSerializer):
             return value
         return re.sub(r"\D", "", str(value))
 
+    def validate_senha(self, value):
+        """Grava só o hash (hasher e iterações do settings)."""
+        return make_password(value)
+
 
 class CooperativaRegistrationSerializer(serializers.ModelSerializer):
+    tipos_residuo_aceitos = serializers.ListField(
+        child=serializers.ChoiceField(choices=ItemColeta.TIPO_RESIDUO_CHOICES), required=False)
+
     class Meta:
         model = Cooperativa
         # ATUALIZADO: 'id' é read_only
         fields = [
             'id', 'nome_empresa', 'email', 'senha', 'telefone', 'cnpj',
-            'cep', 'rua', 'numero', 'bairro', 'cidade', 'estado', 'geom'
+            'cep', 'rua', 'numero', 'bairro', 'cidade', 'estado', 'geom', 'tipos_residuo_aceitos'
         ]
         extra_kwargs = {'senha': {'write_only': True},
                         'id': {'read_only': True}}
 
     def create(self, validated_data):
         try:
-            return super().create(validated_data)
+            with transaction.atomic():
+                cooperativa = super().create(validated_data)
+                if cooperativa.geom is None:
+                    enfileirar_geocodificacao(cooperativa)
+                else:
+                    transaction.on_commit(invalidar_cooperativas_proximas)
+            return cooperativa
         except Exception as e:
             raise serializers.ValidationError({'detail': str(e)})
 
@@ -141,6 +118,10 @@ class CooperativaRegistrationSerializer(serializers.ModelSerializer):
             return value
         return re.sub(r"\D", "", str(value))
 
+    def validate_senha(self, value):
+        """Grava só o hash (hasher e iterações do settings)."""
+        return make_password(value)
+
 # --- Serializer de Login (Sem alterações, mas ajustado para 'cpf_cnpj') ---
 
 
@@ -152,7 +133,7 @@ class LoginSerializer(serializers.Serializer):
 # --- Serializer para Itens (Atualizado) ---
 
 
-class ItemColetaSerializer(serializers.ModelSerializer):
+class ItemColetaSerializer(SerializacaoMedida, serializers.ModelSerializer):
     class Meta:
         model = ItemColeta
         # ATUALIZADO: Campos corretos para criação
@@ -161,11 +142,38 @@ class ItemColetaSerializer(serializers.ModelSerializer):
 # --- Serializer para CRIAR Solicitação (Atualizado) ---
 
 
+class SolicitacaoColetaLoteSerializer(serializers.ListSerializer):
+    """Criação em lote: valida todas as entradas (erros por índice) e grava tudo com
+    INSERTs em massa (solicitações, itens e histórico de status) e um UPSERT dos totais
+    de volume, dentro de uma única transação.
+    """
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                itens_por_solicitacao = [dados.pop('itens') for dados in validated_data]
+                solicitacoes = SolicitacaoColeta.objects.bulk_create(
+                    [SolicitacaoColeta(**dados) for dados in validated_data])
+                VersaoListagem.objects.incrementar(VersaoListagem.SOLICITACOES)
+                itens = [
+                    [ItemColeta(solicitacao=solicitacao, **item) for item in dados_itens]
+                    for solicitacao, dados_itens in zip(solicitacoes, itens_por_solicitacao)
+                ]
+                ItemColeta.objects.bulk_create([item for lista in itens for item in lista], batch_size=1000)
+                registrar_itens_criados(zip(solicitacoes, itens))
+                registrar_criacao(solicitacoes)
+            return solicitacoes
+        except Exception as e:
+            raise serializers.ValidationError(
+                {'detail': f'Erro ao criar solicitações em lote: {str(e)}'})
+
+
 class SolicitacaoColetaCreateSerializer(serializers.ModelSerializer):
     itens = ItemColetaSerializer(many=True)
 
     class Meta:
         model = SolicitacaoColeta
+        list_serializer_class = SolicitacaoColetaLoteSerializer
 
         fields = [
             'inicio_coleta',
@@ -180,9 +188,12 @@ class SolicitacaoColetaCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         try:
             itens_data = validated_data.pop('itens')
-            solicitacao = SolicitacaoColeta.objects.create(**validated_data)
-            for item_data in itens_data:
-                ItemColeta.objects.create(solicitacao=solicitacao, **item_data)
+            with transaction.atomic():
+                solicitacao = SolicitacaoColeta.objects.create(**validated_data)
+                itens = ItemColeta.objects.bulk_create(
+                    [ItemColeta(solicitacao=solicitacao, **item_data) for item_data in itens_data])
+                registrar_itens_criados([(solicitacao, itens)])
+                registrar_criacao([solicitacao])
             return solicitacao
         except Exception as e:
             raise serializers.ValidationError(
@@ -191,7 +202,7 @@ class SolicitacaoColetaCreateSerializer(serializers.ModelSerializer):
 # --- Serializer para LISTAR Solicitações (Atualizado) ---
 
 
-class SolicitacaoColetaListSerializer(serializers.ModelSerializer):
+class SolicitacaoColetaListSerializer(SerializacaoMedida, serializers.ModelSerializer):
     coletor_nome = serializers.CharField(
         source='coletor.nome', read_only=True, allow_null=True)
     itens_count = serializers.SerializerMethodField()
@@ -199,7 +210,7 @@ class SolicitacaoColetaListSerializer(serializers.ModelSerializer):
         source='get_status_display', read_only=True)
 
     # Nested com dados resumidos do produtor (inclui endereço)
-    class ProdutorResumoSerializer(serializers.ModelSerializer):
+    class ProdutorResumoSerializer(SerializacaoMedida, serializers.ModelSerializer):
         latitude = serializers.SerializerMethodField()
         longitude = serializers.SerializerMethodField()
 
@@ -229,10 +240,14 @@ class SolicitacaoColetaListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_itens_count(self, obj):
+        # Querysets montados com `para_listagem()` já trazem a contagem anotada
+        itens_count = getattr(obj, 'itens_count', None)
+        if itens_count is not None:
+            return itens_count
         return obj.itens.count()
 
 
-class SolicitacaoColetaDetailSerializer(serializers.ModelSerializer):
+class SolicitacaoColetaDetailSerializer(SerializacaoMedida, serializers.ModelSerializer):
     """Serializer detalhado de uma solicitação, incluindo os itens (itens de coleta)."""
     coletor_nome = serializers.CharField(
         source='coletor.nome', read_only=True, allow_null=True)
@@ -245,7 +260,43 @@ class SolicitacaoColetaDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = SolicitacaoColeta
         fields = [
-            'id', 'inicio_coleta', 'fim_coleta', 'status', 'status_display',
+            'id', 'inicio_coleta', 'fim_coleta', 'status', 'status_display', 'versao',
             'coletor_nome', 'produtor', 'observacoes', 'itens'
         ]
         read_only_fields = fields
+
+
+class SolicitacaoColetaProximaSerializer(SolicitacaoColetaListSerializer):
+    """Resumo da solicitação acrescido da distância (em metros) até o ponto de busca."""
+    distancia_m = serializers.SerializerMethodField()
+
+    class Meta(SolicitacaoColetaListSerializer.Meta):
+        fields = SolicitacaoColetaListSerializer.Meta.fields + ['distancia_m']
+        read_only_fields = fields
+
+    def get_distancia_m(self, obj):
+        distancia = getattr(obj, 'distancia', None)
+        return round(distancia.m, 1) if distancia is not None else None
+
+
+class AvaliacaoSerializer(serializers.Serializer):
+    nota = serializers.IntegerField(min_value=1, max_value=5)
+    comentario = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+
+
+class LancamentoPontosSerializer(SerializacaoMedida, serializers.ModelSerializer):
+    class Meta:
+        model = LancamentoPontos
+        fields = ['id', 'tipo', 'pontos', 'solicitacao', 'criado_em']
+
+
+class RecompensaSerializer(SerializacaoMedida, serializers.ModelSerializer):
+    class Meta:
+        model = Recompensa
+        fields = ['id_recompensa', 'codigo_voucher', 'nome_premio', 'loja_parceira', 'status',
+                  'custo_pontos', 'emitido_em', 'resgatado_em']
+
+
+class EmissaoVoucherSerializer(serializers.Serializer):
+    premio = serializers.CharField()
+    quantidade = serializers.IntegerField(min_value=1, max_value=50, default=1)
@@ -1,3 +1,1573 @@
-from django.test import TestCase
+import asyncio
+import json
+import logging
+import tempfile
+import threading
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import (
+    Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta, TarefaGeocodificacao, VolumeResiduoDiario,
+    LancamentoPontos, Recompensa, HistoricoStatusSolicitacao,
+)
+from .geocoding import GeocodingIndisponivel, GeocoderComCache, GeocoderLocal, processar_tarefas
+from .pagination import IdCursorPagination
+from .authentication import cache_de_tokens
+from .eventos import BroadcasterEmProcesso, FiltroEventos
+from .geo import haversine_m
+from .benchmark import comparar, percentil, resumir, sincrona_vs_assincrona, token_de_acesso
+from .massa import REFERENCIA, MassaJaExiste, semear_massa
+from .metricas import Histograma, Medicao, _medicao, medir
+from .logs import FiltroRequisicao, HandlerEmFila
+from .planos import contexto, semear, varreduras_sequenciais, verificar_planos
+from .rastreamento import span
+from .senhas import averificar_senha, conferir, medir_verificacoes
+from .transicoes import TRANSICIONADA, aplicar_transicao, mudar_status, tempos_entre_status
+from .rotas import otimizar_rota
+from .views import DisponiveisProximasView
+from .pontos import corrigir_saldo, divergencias_de_saldo, lancar
+from .vouchers import ALFABETO, codigo_do_numero, normalizar_codigo, verificar_chave
+from .volumes import armazenados, calcular_volumes, divergencias, reconstruir_volumes
+
+
+def token_para(user, user_type):
+    """Gera um access token no mesmo formato emitido pelo CustomLoginView."""
+    refresh = RefreshToken()
+    refresh['user_id'] = user.pk
+    refresh['user_type'] = user_type
+    return str(refresh.access_token)
+
+
+class BaseAPITestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.produtor = Produtor.objects.create(
+            nome='Produtor Teste', email='produtor@teste.com', senha='123',
+            cpf_cnpj='11111111111')
+        self.coletor = Coletor.objects.create(
+            nome='Coletor Teste', email='coletor@teste.com', senha='123',
+            cpf='22222222222')
+
+    def autenticar(self, user, user_type):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_para(user, user_type)}')
+
+    def patch_status(self, pk, novo, **extra):
+        """PATCH de status como quem pode pedi-lo: o coletor, ou o produtor para cancelar."""
+        if novo == 'CANCELADA':
+            self.autenticar(self.produtor, 'produtor')
+        else:
+            self.autenticar(self.coletor, 'coletor')
+        return self.client.patch(reverse('atualizar-status-coleta', args=[pk]), {'status': novo, **extra},
+                                 format='json')
+
+    def criar_solicitacoes(self, quantidade, **kwargs):
+        criadas = []
+        for _ in range(quantidade):
+            solicitacao = SolicitacaoColeta.objects.create(produtor=self.produtor, **kwargs)
+            ItemColeta.objects.create(solicitacao=solicitacao, quantidade=2, tipo_residuo='Metal')
+            ItemColeta.objects.create(solicitacao=solicitacao, quantidade=1, tipo_residuo='Papel')
+            criadas.append(solicitacao)
+        return criadas
+
+
+class ConsultasListagemTests(BaseAPITestCase):
+    """O número de consultas das listagens não pode crescer com o número de linhas.
+    (A primeira consulta de cada GET é o validador do GET condicional.)
+    """
+
+    def assertConsultasConstantes(self, url, consultas, **kwargs):
+        self.criar_solicitacoes(1, **kwargs)
+        with self.assertNumQueries(consultas):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+
+        self.criar_solicitacoes(10, **kwargs)
+        with self.assertNumQueries(consultas):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return resp
+
+    def test_minhas_solicitacoes(self):
+        self.autenticar(self.produtor, 'produtor')
+        resp = self.assertConsultasConstantes(reverse('minhas-solicitacoes'), 3)
+        self.assertEqual(resp.data['results'][0]['itens_count'], 2)
+
+    def test_disponiveis(self):
+        resp = self.assertConsultasConstantes(reverse('coletas-disponiveis'), 2)
+        self.assertEqual(resp.data['results'][0]['itens_count'], 2)
+        self.assertEqual(resp.data['results'][0]['produtor']['nome'], 'Produtor Teste')
+
+    def test_minhas_solicitacoes_coletor(self):
+        self.autenticar(self.coletor, 'coletor')
+        resp = self.assertConsultasConstantes(
+            reverse('minhas-solicitacoes-coletor'), 4, coletor=self.coletor, status='ACEITA')
+        self.assertEqual(resp.data['results'][0]['coletor_nome'], 'Coletor Teste')
+        self.assertEqual(len(resp.data['results'][0]['itens']), 2)
+
+    def test_detalhe(self):
+        solicitacao = self.criar_solicitacoes(1, coletor=self.coletor)[0]
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse('coleta-detail', args=[solicitacao.pk]))
+        self.assertEqual(len(resp.data['itens']), 2)
+
+
+class PaginacaoCursorTests(BaseAPITestCase):
+    def test_percorre_paginas_sem_repetir(self):
+        criadas = self.criar_solicitacoes(5)
+        url = reverse('coletas-disponiveis') + '?page_size=2'
+        vistos = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertLessEqual(len(resp.data['results']), 2)
+            vistos += [s['id'] for s in resp.data['results']]
+            url = resp.data['next']
+        self.assertEqual(vistos, sorted((s.id for s in criadas), reverse=True))
+
+    def test_page_size_limitado(self):
+        self.criar_solicitacoes(3)
+        with mock.patch.object(IdCursorPagination, 'max_page_size', 2):
+            resp = self.client.get(reverse('coletas-disponiveis') + '?page_size=100000')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data['results']), 2)
+        self.assertIsNotNone(resp.data['next'])
+
+
+@override_settings(SENHAS_PBKDF2_ITERACOES=1000)
+class LoginTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.cooperativa = Cooperativa.objects.create(
+            nome_empresa='Coop Teste', email='coop@teste.com', senha='123',
+            cnpj='33333333000133')
+
+    def login(self, identifier, password='123'):
+        return self.client.post(reverse('login'), {'email': identifier, 'password': password})
+
+    def test_login_por_email_e_documento(self):
+        casos = [
+            ('produtor@teste.com', 'produtor', 'Produtor Teste'),
+            ('11111111111', 'produtor', 'Produtor Teste'),
+            ('coletor@teste.com', 'coletor', 'Coletor Teste'),
+            ('22222222222', 'coletor', 'Coletor Teste'),
+            ('coop@teste.com', 'cooperativa', 'Coop Teste'),
+            ('33333333000133', 'cooperativa', 'Coop Teste'),
+        ]
+        for identifier, user_type, nome in casos:
+            with self.subTest(identifier=identifier):
+                resp = self.login(identifier)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(resp.data['user_type'], user_type)
+                self.assertEqual(resp.data['name'], nome)
+
+    def test_email_tem_precedencia_sobre_documento(self):
+        # o CPF do produtor é igual ao email do coletor: o email vence
+        Coletor.objects.create(nome='Outro', email='11111111111', senha='123', cpf='44444444444')
+        resp = self.login('11111111111')
+        self.assertEqual(resp.data['user_type'], 'coletor')
+
+    def test_login_usa_uma_consulta(self):
+        with self.assertNumQueries(1):
+            resp = self.login('ninguem@teste.com')
+        self.assertEqual(resp.status_code, 401)
+        with self.assertNumQueries(1):
+            resp = self.login('produtor@teste.com', 'errada')
+        self.assertEqual(resp.status_code, 401)
+
+    def test_login_regrava_senha_antiga_com_hash(self):
+        # a fixture grava '123' em texto puro, como as contas de antes da troca
+        resp = self.login('produtor@teste.com')
+        self.assertEqual(resp.status_code, 200)
+        self.produtor.refresh_from_db()
+        self.assertTrue(self.produtor.senha.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(check_password('123', self.produtor.senha))
+        with self.assertNumQueries(1):  # já no formato atual: nada a regravar
+            self.assertEqual(self.login('produtor@teste.com').status_code, 200)
+        self.assertEqual(self.login('produtor@teste.com', 'errada').status_code, 401)
+
+    def test_login_regrava_hash_com_outro_fator_de_trabalho(self):
+        antigo = make_password('123', hasher='pbkdf2_sha1')
+        Coletor.objects.filter(pk=self.coletor.pk).update(senha=antigo)
+        self.assertEqual(self.login('coletor@teste.com', 'errada').status_code, 401)
+        self.coletor.refresh_from_db()
+        self.assertEqual(self.coletor.senha, antigo)
+        self.assertEqual(self.login('coletor@teste.com').status_code, 200)
+        self.coletor.refresh_from_db()
+        self.assertTrue(self.coletor.senha.startswith('pbkdf2_sha256$1000$'))
+
+    def test_login_assincrono_igual_ao_sincrono(self):
+        url = reverse('login-async')
+        for dados in ({'email': 'coletor@teste.com', 'password': 'errada'},
+                      {'email': 'ninguem@teste.com', 'password': '123'}, {'email': 'coletor@teste.com'}):
+            with self.subTest(dados=dados):
+                sincrona = self.client.post(reverse('login'), dados)
+                resp = self.client.post(url, dados)
+                self.assertEqual(resp.status_code, sincrona.status_code)
+                self.assertEqual(json.loads(resp.content), sincrona.data)
+        self.assertEqual(self.client.post(url, '{', content_type='application/json').status_code, 400)
+
+        # senha antiga em texto puro: entra e é regravada com hash, como no síncrono
+        resp = self.client.post(url, {'email': 'coletor@teste.com', 'password': '123'},
+                                content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        corpo = json.loads(resp.content)
+        self.assertEqual((corpo['user_type'], corpo['name']), ('coletor', 'Coletor Teste'))
+        self.assertEqual(AccessToken(corpo['access'])['user_id'], self.coletor.pk)
+        self.coletor.refresh_from_db()
+        self.assertTrue(self.coletor.senha.startswith('pbkdf2_sha256$1000$'))
+
+    def test_cadastro_grava_hash(self):
+        resp = self.client.post(reverse('register-collector'), {
+            'nome': 'Novo', 'email': 'novo@teste.com', 'senha': 'segredo', 'cpf': '55555555555'})
+        self.assertEqual(resp.status_code, 201)
+        senha = Coletor.objects.get(email='novo@teste.com').senha
+        self.assertNotEqual(senha, 'segredo')
+        self.assertTrue(check_password('segredo', senha))
+        self.assertEqual(self.login('novo@teste.com', 'segredo').status_code, 200)
+
+
+@override_settings(SENHAS_PBKDF2_ITERACOES=1000)
+class ConferirSenhaTests(SimpleTestCase):
+    def test_averificar_nao_bloqueia_o_event_loop(self):
+        def lento(senha, armazenada):
+            time.sleep(0.2)
+            return False, None
+
+        async def cenario():
+            marcas = []
+
+            async def relogio():
+                for _ in range(5):
+                    await asyncio.sleep(0.01)
+                    marcas.append(time.perf_counter())
+
+            async def verificar():
+                correta = await averificar_senha(None, 'x')
+                return correta, time.perf_counter()
+
+            (correta, fim), _ = await asyncio.gather(verificar(), relogio())
+            return correta, fim, marcas
+
+        with mock.patch('aplicativo_web.senhas.conferir', lento):
+            correta, fim, marcas = asyncio.run(cenario())
+        self.assertFalse(correta)
+        # o relógio andou enquanto o hash rodava no pool
+        self.assertLess(marcas[-1], fim)
+
+    def test_texto_puro_confere_e_pede_hash(self):
+        self.assertEqual(conferir('123', 'outra'), (False, None))
+        correta, novo = conferir('123', '123')
+        self.assertTrue(correta)
+        self.assertTrue(check_password('123', novo))
+
+    def test_hash_atual_nao_pede_regravacao(self):
+        self.assertEqual(conferir('123', make_password('123')), (True, None))
+        self.assertEqual(conferir('errada', make_password('123')), (False, None))
+        with override_settings(SENHAS_PBKDF2_ITERACOES=2000):
+            correta, novo = conferir('123', make_password('123'))
+        self.assertTrue(correta)
+        self.assertIsNone(novo)
+
+    def test_iteracoes_diferentes_pedem_regravacao(self):
+        antigo = make_password('123')
+        with override_settings(SENHAS_PBKDF2_ITERACOES=2000):
+            correta, novo = conferir('123', antigo)
+        self.assertTrue(correta)
+        self.assertTrue(novo.startswith('pbkdf2_sha256$2000$'))
+
+    def test_conta_inexistente(self):
+        self.assertEqual(conferir('123', None), (False, None))
+
+    def test_medir_verificacoes(self):
+        dados = medir_verificacoes(1000, threads=2, duracao=0.05)
+        self.assertEqual(dados['iteracoes'], 1000)
+        self.assertGreater(dados['logins_por_segundo'], 0)
+
+
+class GeocoderQueFalha:
+    def geocode(self, **endereco):
+        raise GeocodingIndisponivel('timeout')
+
+
+@override_settings(GEOCODER_BACKEND='aplicativo_web.geocoding.GeocoderLocal')
+class GeocodificacaoTests(TestCase):
+    dados_produtor = {
+        'nome': 'Novo Produtor', 'email': 'novo@teste.com', 'senha': '123',
+        'cpf_cnpj': '55555555555', 'cep': '64000-000', 'rua': 'Rua A', 'numero': '1',
+        'bairro': 'Centro', 'cidade': 'Teresina', 'estado': 'PI',
+    }
+
+    def test_cadastro_enfileira_e_worker_preenche_geom(self):
+        resp = APIClient().post(reverse('register-producer'), self.dados_produtor)
+        self.assertEqual(resp.status_code, 201)
+        produtor = Produtor.objects.get(email='novo@teste.com')
+        self.assertIsNone(produtor.geom)
+        self.assertTrue(TarefaGeocodificacao.objects.filter(
+            tipo='produtor', objeto_id=produtor.pk, status='PENDENTE').exists())
+
+        self.assertEqual(processar_tarefas(), 1)
+        produtor.refresh_from_db()
+        self.assertIsNotNone(produtor.geom)
+        self.assertEqual(TarefaGeocodificacao.objects.get(objeto_id=produtor.pk).status, 'CONCLUIDA')
+
+    @override_settings(GEOCODING_MAX_TENTATIVAS=2)
+    def test_falha_transitoria_reagenda_com_backoff(self):
+        APIClient().post(reverse('register-producer'), self.dados_produtor)
+        self.assertEqual(processar_tarefas(geocoder=GeocoderQueFalha()), 1)
+        tarefa = TarefaGeocodificacao.objects.get()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('PENDENTE', 1))
+        # ainda não venceu o backoff
+        self.assertEqual(processar_tarefas(geocoder=GeocoderQueFalha()), 0)
+
+        TarefaGeocodificacao.objects.update(proxima_tentativa=tarefa.criada_em)
+        processar_tarefas(geocoder=GeocoderQueFalha())
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('FALHOU', 2))
+
+
+    def test_backfill_conta_so_o_que_entrou_na_fila(self):
+        APIClient().post(reverse('register-producer'), self.dados_produtor)  # já enfileirado
+        Produtor.objects.create(nome='Sem geom', email='sem@teste.com', senha='123', cpf_cnpj='66666666666')
+        saida = StringIO()
+        call_command('backfill_geom', stdout=saida)
+        self.assertIn('produtor: 1 registro(s) sem geom enfileirado(s) (1 já na fila)', saida.getvalue())
+        self.assertEqual(TarefaGeocodificacao.objects.filter(status='PENDENTE').count(), 2)
+
+        saida = StringIO()
+        call_command('backfill_geom', stdout=saida)
+        self.assertIn('produtor: 0 registro(s) sem geom enfileirado(s) (2 já na fila)', saida.getvalue())
+
+
+class GeocoderSemTransacao:
+    """Registra se havia transação aberta durante a chamada (que pode levar segundos)."""
+
+    def __init__(self):
+        self.em_transacao = []
+
+    def geocode(self, **endereco):
+        self.em_transacao.append(connection.in_atomic_block)
+        return Point(-42.80, -5.09, srid=4326)
+
+
+class FilaGeocodificacaoTests(TransactionTestCase):
+    def test_geocodifica_sem_transacao_e_respeita_a_reserva(self):
+        produtor = Produtor.objects.create(nome='P', email='p@teste.com', senha='1', cpf_cnpj='1')
+        TarefaGeocodificacao.objects.create(tipo='produtor', objeto_id=produtor.pk)
+        geocoder = GeocoderSemTransacao()
+        self.assertEqual(processar_tarefas(geocoder=geocoder), 1)
+        self.assertEqual(geocoder.em_transacao, [False])
+        produtor.refresh_from_db()
+        self.assertIsNotNone(produtor.geom)
+
+        # a reserva venceu e outro worker pegou a tarefa: o resultado antigo não é gravado
+        outro = Produtor.objects.create(nome='Q', email='q@teste.com', senha='1', cpf_cnpj='2')
+        tarefa = TarefaGeocodificacao.objects.create(tipo='produtor', objeto_id=outro.pk)
+
+        class Atrasado(GeocoderSemTransacao):
+            def geocode(self, **endereco):
+                TarefaGeocodificacao.objects.filter(pk=tarefa.pk).update(tentativas=5)
+                return super().geocode(**endereco)
+
+        self.assertEqual(processar_tarefas(geocoder=Atrasado()), 1)
+        tarefa.refresh_from_db()
+        outro.refresh_from_db()
+        self.assertEqual((tarefa.status, outro.geom), ('PENDENTE', None))
+        self.assertGreater(tarefa.proxima_tentativa, timezone.now())
+
+
+class GeocoderContador:
+    """Upstream falso que conta chamadas e demora um pouco, para exercitar a coalescência."""
+
+    def __init__(self, atraso=0.0):
+        self.chamadas = 0
+        self.atraso = atraso
+        self._local = GeocoderLocal()
+
+    def geocode(self, rua, numero, bairro, cidade, estado, cep):
+        self.chamadas += 1
+        time.sleep(self.atraso)
+        if rua == 'inexistente':
+            return None
+        return self._local.geocode(rua, numero, bairro, cidade, estado, cep)
+
+
+class CacheGeocodificacaoTests(TestCase):
+    def test_enderecos_equivalentes_usam_a_mesma_entrada(self):
+        upstream = GeocoderContador()
+        cache = GeocoderComCache(upstream=upstream)
+        a = cache.geocode('R. São José', 'nº 10', 'Centro', 'Teresina', 'PI', '64000-000')
+        b = cache.geocode('rua sao jose', '10', 'centro', 'TERESINA', 'pi', '64000000')
+        self.assertEqual(a, b)
+        self.assertEqual(upstream.chamadas, 1)
+
+        # outro processo (LRU vazio) encontra a entrada persistida
+        outro = GeocoderComCache(upstream=upstream)
+        self.assertEqual(outro.geocode('Rua São José', '10', '', 'Teresina', 'PI', '64000000'), a)
+        self.assertEqual(upstream.chamadas, 1)
+
+    def test_cache_negativo(self):
+        upstream = GeocoderContador()
+        cache = GeocoderComCache(upstream=upstream)
+        self.assertIsNone(cache.geocode('inexistente', '1', '', 'Teresina', 'PI', '64000000'))
+        self.assertIsNone(cache.geocode('inexistente', '1', '', 'Teresina', 'PI', '64000000'))
+        self.assertEqual(upstream.chamadas, 1)
+
+
+class CoalescenciaGeocodificacaoTests(TransactionTestCase):
+    def test_buscas_simultaneas_fazem_uma_chamada(self):
+        upstream = GeocoderContador(atraso=0.2)
+        cache = GeocoderComCache(upstream=upstream)
+        resultados = []
+
+        def buscar():
+            try:
+                resultados.append(cache.geocode('Rua A', '1', '', 'Teresina', 'PI', '64000000'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buscar) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(upstream.chamadas, 1)
+        self.assertEqual(len(resultados), 8)
+        self.assertEqual(len(set(p.wkt for p in resultados)), 1)
+
+
+class AutenticacaoTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache_de_tokens.clear()
+
+    def test_token_verificado_uma_vez_entre_requisicoes(self):
+        self.autenticar(self.produtor, 'produtor')
+        original = JWTAuthentication.get_validated_token
+        with mock.patch.object(JWTAuthentication, 'get_validated_token',
+                               autospec=True, side_effect=original) as validar:
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('minhas-solicitacoes')).status_code, 200)
+        self.assertEqual(validar.call_count, 1)
+
+    def test_perfis(self):
+        url_produtor = reverse('minhas-solicitacoes')
+        url_coletor = reverse('minhas-solicitacoes-coletor')
+
+        self.assertEqual(self.client.get(url_produtor).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalido')
+        self.assertEqual(self.client.get(url_produtor).status_code, 401)
+        # token inválido não bloqueia endpoints públicos
+        self.assertEqual(self.client.get(reverse('coletas-disponiveis')).status_code, 200)
+
+        self.autenticar(self.coletor, 'coletor')
+        self.assertEqual(self.client.get(url_produtor).status_code, 403)
+        self.assertEqual(self.client.get(url_coletor).status_code, 200)
+
+        self.autenticar(self.produtor, 'produtor')
+        self.assertEqual(self.client.get(url_produtor).status_code, 200)
+        self.assertEqual(self.client.get(url_coletor).status_code, 403)
+
+
+class AceiteConcorrenteTests(TransactionTestCase):
+    """Vários coletores tocando na mesma solicitação ao mesmo tempo: só um pode vencer."""
+    coletores_simultaneos = 20
+
+    def setUp(self):
+        self.produtor = Produtor.objects.create(
+            nome='Produtor', email='p@teste.com', senha='123', cpf_cnpj='1',
+            geom=Point(-42.80, -5.09, srid=4326))
+        self.coletores = [
+            Coletor.objects.create(nome=f'Coletor {i}', email=f'c{i}@teste.com', senha='123', cpf=str(i))
+            for i in range(self.coletores_simultaneos)
+        ]
+
+    def disparar(self, requisicao):
+        """Executa `requisicao(coletor)` em paralelo para todos os coletores; retorna as respostas."""
+        barreira = threading.Barrier(len(self.coletores))
+        respostas = []
+
+        def rodar(coletor):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_para(coletor, "coletor")}')
+            try:
+                barreira.wait()
+                respostas.append(requisicao(client))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=rodar, args=(c,)) for c in self.coletores]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return respostas
+
+    def test_um_unico_vencedor(self):
+        solicitacao = SolicitacaoColeta.objects.create(produtor=self.produtor)
+        url = reverse('coleta-aceitar', args=[solicitacao.pk])
+
+        respostas = self.disparar(lambda client: client.post(url))
+        codigos = sorted(r.status_code for r in respostas)
+
+        self.assertEqual(codigos.count(200), 1)
+        self.assertEqual(codigos.count(409), len(respostas) - 1)
+        solicitacao.refresh_from_db()
+        vencedor = next(r for r in respostas if r.status_code == 200)
+        self.assertEqual(solicitacao.status, 'ACEITA')
+        self.assertEqual(solicitacao.coletor.nome, vencedor.data['coletor_nome'])
+        self.assertEqual(list(solicitacao.historico.values_list('versao', 'status_novo', 'origem')),
+                         [(1, 'ACEITA', 'aceite')])
+
+    def test_aceitar_proxima_distribui_sem_repetir(self):
+        for i in range(5):
+            SolicitacaoColeta.objects.create(produtor=self.produtor, observacoes=str(i))
+        url = reverse('coleta-aceitar-proxima')
+        dados = {'lat': -5.09, 'lng': -42.80, 'raio': 1000}
+
+        respostas = self.disparar(lambda client: client.post(url, dados, format='json'))
+        aceitas = [r.data['id'] for r in respostas if r.status_code == 200]
+        self.assertEqual(len(aceitas), 5)
+        self.assertEqual(len(set(aceitas)), 5)
+        self.assertEqual(sum(r.status_code == 404 for r in respostas), len(respostas) - 5)
+        self.assertFalse(SolicitacaoColeta.objects.filter(status='SOLICITADA').exists())
+
+
+class DisponiveisProximasTests(BaseAPITestCase):
+    LAT, LNG = -5.09, -42.80
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('coletas-disponiveis-proximas')
+        # produtores a leste do ponto: ~0,55 km, ~1,1 km, ~2,2 km e ~11 km
+        self.esperadas = []
+        for i, dlng in enumerate((0.02, 0.005, 0.1, 0.01)):
+            produtor = Produtor.objects.create(
+                nome=f'Vizinho {i}', email=f'vizinho{i}@teste.com', senha='123', cpf_cnpj=f'3333333333{i}',
+                geom=Point(self.LNG + dlng, self.LAT, srid=4326))
+            self.esperadas.append((dlng, SolicitacaoColeta.objects.create(produtor=produtor).pk))
+            # já aceita, no mesmo endereço: nunca aparece
+            SolicitacaoColeta.objects.create(produtor=produtor, coletor=self.coletor, status='ACEITA')
+        self.esperadas = [pk for _, pk in sorted(self.esperadas)]
+
+    def buscar(self, **params):
+        return self.client.get(self.url, {'lat': self.LAT, 'lng': self.LNG, **params})
+
+    def test_da_mais_proxima_para_a_mais_longe_dentro_do_raio(self):
+        resp = self.buscar()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([s['id'] for s in resp.data], self.esperadas[:3])
+        distancias = [s['distancia_m'] for s in resp.data]
+        self.assertEqual(distancias, sorted(distancias))
+        self.assertAlmostEqual(distancias[0], haversine_m(self.LAT, self.LNG, self.LAT, self.LNG + 0.005),
+                               delta=10)
+
+        self.assertEqual([s['id'] for s in self.buscar(raio=1500).data], self.esperadas[:2])
+        self.assertEqual([s['id'] for s in self.buscar(raio=20000).data], self.esperadas)
+        self.assertEqual(self.buscar(raio=100).data, [])
+
+    def test_limite(self):
+        self.assertEqual([s['id'] for s in self.buscar(limite=2).data], self.esperadas[:2])
+        self.assertEqual([s['id'] for s in self.buscar(limite=0).data], self.esperadas[:1])
+        self.assertEqual(len(self.buscar(limite=1000).data), 3)
+        with mock.patch.object(DisponiveisProximasView, 'LIMITE_MAXIMO', 2):
+            self.assertEqual([s['id'] for s in self.buscar(limite=1000).data], self.esperadas[:2])
+
+    def test_parametros_invalidos(self):
+        for params in ({'lat': 'x', 'lng': self.LNG}, {'lat': 91, 'lng': self.LNG},
+                       {'lat': self.LAT, 'lng': self.LNG, 'raio': 'longe'},
+                       {'lat': self.LAT, 'lng': self.LNG, 'limite': 'muitos'},
+                       {'lat': self.LAT}, {}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_sem_coordenadas_usa_a_localizacao_do_coletor(self):
+        self.autenticar(self.coletor, 'coletor')
+        self.assertEqual(self.client.get(self.url).status_code, 400)  # coletor ainda sem geom
+
+        self.coletor.geom = Point(self.LNG + 0.1, self.LAT, srid=4326)
+        self.coletor.save()
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([s['id'] for s in resp.data], self.esperadas[3:])
+        # lat/lng explícitos têm precedência
+        self.assertEqual([s['id'] for s in self.buscar().data], self.esperadas[:3])
+
+        self.autenticar(self.produtor, 'produtor')
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+class SolicitacaoLoteTests(BaseAPITestCase):
+    def entrada(self, itens=4):
+        return {
+            'inicio_coleta': '2025-10-25T09:00:00Z', 'fim_coleta': '2025-10-25T12:00:00Z',
+            'observacoes': 'Portaria',
+            'itens': [{'tipo_residuo': 'Papel', 'quantidade': '1.5', 'unidade_medida': 'KG'}] * itens,
+        }
+
+    def test_lote_grande_usa_poucas_consultas(self):
+        self.autenticar(self.produtor, 'produtor')
+        lote = {'solicitacoes': [self.entrada() for _ in range(25)]}  # 100 itens
+        # produtor + INSERT solicitações + versão das listagens + INSERT itens + UPSERT dos
+        # volumes + INSERT histórico + savepoint/release
+        with self.assertNumQueries(8):
+            resp = self.client.post(reverse('solicitar-coleta-lote'), lote, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['criadas'], 25)
+        self.assertEqual(ItemColeta.objects.filter(solicitacao__produtor=self.produtor).count(), 100)
+
+    def test_erros_por_entrada_e_nada_gravado(self):
+        self.autenticar(self.produtor, 'produtor')
+        invalida = self.entrada()
+        invalida['itens'] = [{'tipo_residuo': 'Madeira', 'quantidade': '1'}]
+        resp = self.client.post(reverse('solicitar-coleta-lote'),
+                                {'solicitacoes': [self.entrada(), invalida]}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data['erros'][0], {})
+        self.assertIn('itens', resp.data['erros'][1])
+        self.assertFalse(SolicitacaoColeta.objects.exists())
+
+
+class EventosTests(SimpleTestCase):
+    def evento(self, **kwargs):
+        base = {'tipo': 'solicitacao_criada', 'id': 1, 'status': 'SOLICITADA',
+                'produtor_id': 10, 'coletor_id': None, 'lat': -5.09, 'lng': -42.80}
+        return {**base, **kwargs}
+
+    def test_filtros_por_usuario_e_area(self):
+        perto = Point(-42.801, -5.091, srid=4326)
+        longe = Point(-43.5, -5.5, srid=4326)
+        self.assertTrue(FiltroEventos('produtor', 10).aceita(self.evento()))
+        self.assertFalse(FiltroEventos('produtor', 11).aceita(self.evento()))
+        self.assertTrue(FiltroEventos('coletor', 7, perto, 1000).aceita(self.evento()))
+        self.assertFalse(FiltroEventos('coletor', 7, longe, 1000).aceita(self.evento()))
+        # o coletor sempre recebe eventos das solicitações que aceitou
+        self.assertTrue(FiltroEventos('coletor', 7, longe, 1000).aceita(self.evento(coletor_id=7)))
+
+    def test_publicacao_de_outra_thread_chega_na_conexao(self):
+        async def cenario():
+            broadcaster = BroadcasterEmProcesso()
+            minha = broadcaster.assinar(FiltroEventos('produtor', 10))
+            outra = broadcaster.assinar(FiltroEventos('produtor', 99))
+            threading.Thread(target=broadcaster.publicar, args=(self.evento(),)).start()
+            recebido = await asyncio.wait_for(minha.fila.get(), timeout=2)
+            self.assertTrue(outra.fila.empty())
+            broadcaster.cancelar(minha)
+            self.assertEqual(broadcaster._assinaturas, {outra})
+            return recebido
+
+        self.assertEqual(asyncio.run(cenario())['id'], 1)
+
+
+class GetCondicionalTests(BaseAPITestCase):
+    def test_lista_sem_mudancas_responde_304_com_uma_consulta(self):
+        self.criar_solicitacoes(3)
+        url = reverse('coletas-disponiveis')
+        resp = self.client.get(url)
+        etag = resp['ETag']
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b'')
+
+        # outra página/consulta tem outro validador
+        self.assertNotEqual(self.client.get(url + '?page_size=1')['ETag'], etag)
+
+        # aceitar uma solicitação muda a lista
+        self.autenticar(self.coletor, 'coletor')
+        pk = SolicitacaoColeta.objects.first().pk
+        self.assertEqual(self.client.post(reverse('coleta-aceitar', args=[pk])).status_code, 200)
+        self.client.credentials()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn(pk, [s['id'] for s in resp.data['results']])
+
+    def test_cooperativas_editadas_mudam_o_etag(self):
+        cooperativa = Cooperativa.objects.create(nome_empresa='Coop', email='k@teste.com', senha='123', cnpj='3')
+        url = reverse('cooperativas-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # edição como a do admin: nada de contagem, maior id ou geom muda
+        cooperativa.nome_empresa = 'Coop Renomeada'
+        cooperativa.tipos_residuo_aceitos = ['Metal']
+        cooperativa.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['results'][0]['nome_empresa'], 'Coop Renomeada')
+
+        etag = resp['ETag']
+        cooperativa.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detalhe_if_modified_since(self):
+        solicitacao = self.criar_solicitacoes(1)[0]
+        url = reverse('coleta-detail', args=[solicitacao.pk])
+        resp = self.client.get(url)
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)
+
+
+class LeiturasAssincronasTests(BaseAPITestCase):
+    """As variantes em `async/` devolvem o mesmo que as views DRF das rotas canônicas."""
+
+    def assertMesmoCorpo(self, nome, *args, consultas=None):
+        sincrona = self.client.get(reverse(nome, args=args))
+        if consultas is None:
+            assincrona = self.client.get(reverse(f'{nome}-async', args=args))
+        else:
+            with self.assertNumQueries(consultas):
+                assincrona = self.client.get(reverse(f'{nome}-async', args=args))
+        self.assertEqual(assincrona.status_code, sincrona.status_code)
+        self.assertEqual(assincrona['Content-Type'], sincrona['Content-Type'])
+        corpo = json.loads(assincrona.content)
+        if isinstance(corpo, dict) and 'results' in corpo:
+            self.assertEqual(corpo['results'], json.loads(sincrona.content)['results'])
+        else:
+            self.assertEqual(corpo, json.loads(sincrona.content))
+        return assincrona
+
+    def test_mesmo_corpo_que_as_views_sincronas(self):
+        solicitacao = self.criar_solicitacoes(2)[0]
+        self.criar_solicitacoes(2, coletor=self.coletor, status='ACEITA')
+        Cooperativa.objects.create(nome_empresa='Coop', email='k@teste.com', senha='123', cnpj='3')
+
+        self.assertMesmoCorpo('coletas-disponiveis', consultas=2)
+        self.assertMesmoCorpo('coleta-detail', solicitacao.pk, consultas=3)
+        self.assertMesmoCorpo('cooperativas-list', consultas=2)
+        self.assertEqual(self.assertMesmoCorpo('coleta-detail', 999999).status_code, 404)
+        self.autenticar(self.produtor, 'produtor')
+        resp = self.assertMesmoCorpo('minhas-solicitacoes', consultas=2)
+        self.assertEqual(len(json.loads(resp.content)['results']), 4)
+        self.autenticar(self.coletor, 'coletor')
+        resp = self.assertMesmoCorpo('minhas-solicitacoes-coletor', consultas=3)
+        self.assertEqual(len(json.loads(resp.content)['results'][0]['itens']), 2)
+
+    def test_paginacao_e_get_condicional(self):
+        criadas = self.criar_solicitacoes(5)
+        url = reverse('coletas-disponiveis-async') + '?page_size=2'
+        vistos = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            corpo = json.loads(resp.content)
+            vistos += [s['id'] for s in corpo['results']]
+            url = corpo['next']
+        self.assertEqual(vistos, sorted((s.id for s in criadas), reverse=True))
+        self.assertEqual(self.client.get(reverse('coletas-disponiveis-async') + '?cursor=x').status_code, 404)
+
+        url = reverse('coletas-disponiveis-async')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertIn('Authorization', resp['Vary'])
+
+    def percorrer(self, nome):
+        """Vai até a última página por `next` e volta por `previous`, nas duas variantes."""
+        def pagina(url):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            corpo = json.loads(resp.content)
+            links = {k: corpo[k] and urlsplit(corpo[k]).query for k in ('next', 'previous')}
+            return corpo['results'], links, corpo
+
+        sincrona = assincrona = '?page_size=2'
+        paginas = 0
+        for direcao in ('next', 'previous'):
+            while True:
+                resultados, links, corpo = pagina(reverse(nome) + sincrona)
+                resultados_async, links_async, corpo_async = pagina(reverse(f'{nome}-async') + assincrona)
+                self.assertEqual(resultados_async, resultados)
+                self.assertEqual(links_async, links)
+                paginas += 1
+                if not corpo[direcao]:
+                    break
+                sincrona, assincrona = f"?{links[direcao]}", f"?{links_async[direcao]}"
+            if direcao == 'next':
+                sincrona, assincrona = f"?{links['previous']}", f"?{links_async['previous']}"
+        return paginas
+
+    def test_paginas_iguais_nos_dois_sentidos(self):
+        self.criar_solicitacoes(5)
+        Cooperativa.objects.bulk_create([
+            Cooperativa(nome_empresa=f'Coop {i}', email=f'coop{i}@teste.com', senha='123', cnpj=f'{i}')
+            for i in range(5)
+        ])
+        # 3 páginas de ida (2, 2, 1) e 2 de volta pelos links `previous`
+        self.assertEqual(self.percorrer('coletas-disponiveis'), 5)
+        self.assertEqual(self.percorrer('cooperativas-list'), 5)
+
+    def test_perfis(self):
+        url = reverse('minhas-solicitacoes-async')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalido')
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(json.loads(resp.content), self.client.get(reverse('minhas-solicitacoes')).data)
+        self.autenticar(self.coletor, 'coletor')
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 403)
+        self.assertEqual(json.loads(resp.content), self.client.get(reverse('minhas-solicitacoes')).data)
+
+
+class LeituraAssincronaSemBancoTests(SimpleTestCase):
+    """Autenticação e permissão decididas antes de qualquer consulta."""
+
+    def test_erros_de_autenticacao(self):
+        client = AsyncClient()
+
+        async def cenario():
+            sem_token = await client.get(reverse('minhas-solicitacoes-async'))
+            perfil_errado = await client.get(
+                reverse('minhas-solicitacoes-coletor-async'),
+                headers={'Authorization': f"Bearer {token_de_acesso(1, 'produtor')}"})
+            metodo = await client.post(reverse('coletas-disponiveis-async'))
+            return sem_token, perfil_errado, metodo
+
+        sem_token, perfil_errado, metodo = asyncio.run(cenario())
+        self.assertEqual(sem_token.status_code, 401)
+        self.assertEqual(sem_token['WWW-Authenticate'], 'Bearer realm="api"')
+        self.assertEqual(perfil_errado.status_code, 403)
+        self.assertEqual(json.loads(perfil_errado.content)['detail'], 'Acesso permitido apenas para usuários Coletores.')
+        self.assertEqual(metodo.status_code, 405)
+
+
+class CooperativasProximasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        tipos = (['Metal'], ['Papel', 'Vidro'], [])
+        Cooperativa.objects.bulk_create([
+            Cooperativa(nome_empresa=f'Coop {i}', email=f'coop{i}@teste.com', senha='123',
+                        cnpj=f'{i:014d}', tipos_residuo_aceitos=tipos[i % 3],
+                        geom=Point(-42.80 + (i % 10) * 0.013, -5.09 + (i // 10) * 0.011, srid=4326))
+            for i in range(60)
+        ])
+
+    def esperado(self, lat, lng, k, tipo=None):
+        cooperativas = [
+            c for c in Cooperativa.objects.all()
+            if tipo is None or not c.tipos_residuo_aceitos or tipo in c.tipos_residuo_aceitos
+        ]
+        cooperativas.sort(key=lambda c: haversine_m(lat, lng, c.geom.y, c.geom.x))
+        return [c.pk for c in cooperativas[:k]]
+
+    def test_k_mais_proximas_com_cache_por_celula(self):
+        url = reverse('cooperativas-proximas')
+        resp = self.client.get(url, {'lat': -5.05, 'lng': -42.76, 'k': 5})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([c['id'] for c in resp.data], self.esperado(-5.05, -42.76, 5))
+        distancias = [c['distancia_m'] for c in resp.data]
+        self.assertEqual(distancias, sorted(distancias))
+
+        # outro ponto da mesma célula: nenhuma consulta e ainda assim a ordem exata
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, {'lat': -5.0542, 'lng': -42.7631, 'k': 5})
+        self.assertEqual([c['id'] for c in resp.data], self.esperado(-5.0542, -42.7631, 5))
+
+    def test_filtro_por_tipo_e_parametros_invalidos(self):
+        url = reverse('cooperativas-proximas')
+        resp = self.client.get(url, {'lat': -5.05, 'lng': -42.76, 'k': 4, 'tipos': 'Metal'})
+        self.assertEqual([c['id'] for c in resp.data], self.esperado(-5.05, -42.76, 4, 'Metal'))
+
+        self.assertEqual(self.client.get(url, {'lat': -5.05, 'lng': -42.76, 'tipos': 'Ouro'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'lat': -5.05}).status_code, 400)
+
+    def test_ponto_longe_dos_candidatos_consulta_direto(self):
+        # célula a centenas de km: os candidatos do centro não garantem a ordem; vale o banco
+        resp = self.client.get(reverse('cooperativas-proximas'), {'lat': -9.0, 'lng': -40.0, 'k': 3})
+        self.assertEqual([c['id'] for c in resp.data], self.esperado(-9.0, -40.0, 3))
+
+
+class RotaTests(SimpleTestCase):
+    def parada(self, id, lat, lng, inicio_h=0, fim_h=48):
+        agora = timezone.now()
+        return {'id': id, 'lat': lat, 'lng': lng,
+                'inicio': agora + timedelta(hours=inicio_h), 'fim': agora + timedelta(hours=fim_h)}
+
+    def test_ordem_por_proximidade_e_janelas(self):
+        # pontos numa reta, embaralhados: a rota deve percorrê-la em ordem
+        ids = [3, 0, 4, 1, 2]
+        paradas = [self.parada(i, -5.0, -42.8 + i * 0.01) for i in ids]
+        rota = otimizar_rota(paradas, timezone.now(), origem=(-5.0, -42.81))
+        self.assertEqual([p['id'] for p in rota['paradas']], [0, 1, 2, 3, 4])
+        self.assertLess(rota['distancia_total_m'], rota['distancia_ordem_original_m'])
+
+        # a mais distante fecha em 30 min: vai primeiro, mesmo andando mais
+        paradas[2] = self.parada(4, -5.0, -42.76, fim_h=0.5)
+        rota = otimizar_rota(paradas, timezone.now(), origem=(-5.0, -42.81))
+        self.assertEqual(rota['paradas'][0]['id'], 4)
+        self.assertEqual(rota['atraso_total_min'], 0)
+
+    @override_settings(ROTA_ORCAMENTO_MS=300)
+    def test_200_paradas_dentro_do_orcamento(self):
+        rng = random.Random(7)
+        paradas = [self.parada(i, -5.09 + rng.uniform(-0.1, 0.1), -42.8 + rng.uniform(-0.1, 0.1),
+                               inicio_h=rng.uniform(0, 10), fim_h=12) for i in range(200)]
+        inicio = time.perf_counter()
+        rota = otimizar_rota(paradas, timezone.now(), origem=(-5.09, -42.8))
+        decorrido = time.perf_counter() - inicio
+        self.assertLess(decorrido, 0.3 + 0.5)
+        self.assertEqual(sorted(p['id'] for p in rota['paradas']), list(range(200)))
+        self.assertLess(rota['distancia_total_m'], rota['distancia_ordem_original_m'] / 3)
+
+
+class RotaColetorViewTests(BaseAPITestCase):
+    def test_so_coletas_aceitas_do_coletor(self):
+        self.produtor.geom = Point(-42.8, -5.09, srid=4326)
+        self.produtor.save()
+        aceitas = self.criar_solicitacoes(2, coletor=self.coletor, status='ACEITA')
+        self.criar_solicitacoes(1, coletor=self.coletor, status='CONFIRMADA')
+        self.criar_solicitacoes(1)
+
+        self.autenticar(self.coletor, 'coletor')
+        resp = self.client.get(reverse('coletas-rota'), {'lat': -5.1, 'lng': -42.81})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(sorted(p['id'] for p in resp.data['paradas']), sorted(s.pk for s in aceitas))
+        self.assertEqual(resp.data['sem_localizacao'], [])
+
+
+class VolumesResiduoTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.produtor.cidade, self.produtor.estado = 'Teresina', 'pi'
+        self.produtor.save()
+
+    def solicitar(self, dia, *itens):
+        self.autenticar(self.produtor, 'produtor')
+        resp = self.client.post(reverse('solicitar-coleta'), {
+            'inicio_coleta': f'{dia}T12:00:00Z', 'fim_coleta': f'{dia}T15:00:00Z',
+            'itens': [{'tipo_residuo': t, 'quantidade': q, 'unidade_medida': 'KG'} for t, q in itens],
+        }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        return SolicitacaoColeta.objects.order_by('-id').values_list('id', flat=True).first()
+
+    def mudar_status(self, pk, novo):
+        self.assertEqual(self.patch_status(pk, novo).status_code, 200)
+
+    def test_totais_incrementais_batem_com_a_reconstrucao(self):
+        a = self.solicitar('2025-10-20', ('Metal', '2.5'), ('Papel', '1'))
+        b = self.solicitar('2025-10-20', ('Metal', '1.5'))
+        c = self.solicitar('2025-10-21', ('Vidro', '4'))
+        SolicitacaoColeta.objects.filter(pk__in=[a, b, c]).update(coletor=self.coletor, status='ACEITA')
+        self.mudar_status(a, 'CONFIRMADA')
+        self.mudar_status(b, 'CANCELADA')
+        self.mudar_status(c, 'CONFIRMADA')
+        self.mudar_status(c, 'ACEITA')  # volta atrás: sai de confirmada
+
+        self.assertEqual(divergencias(calcular_volumes(), armazenados()), [])
+        metal = VolumeResiduoDiario.objects.get(entidade='cidade', chave='Teresina/PI', tipo_residuo='Metal')
+        self.assertEqual((metal.itens, metal.quantidade_solicitada, metal.quantidade_confirmada,
+                          metal.quantidade_cancelada), (2, 4, Decimal('2.5'), Decimal('1.5')))
+
+        # desvio (ex.: edição pelo admin) é corrigido pela reconstrução
+        VolumeResiduoDiario.objects.update(itens=99)
+        self.assertTrue(divergencias(calcular_volumes(), armazenados()))
+        reconstruir_volumes()
+        self.assertEqual(divergencias(calcular_volumes(), armazenados()), [])
+
+    def test_painel_le_so_os_totais(self):
+        self.solicitar('2025-10-20', ('Metal', '2'))
+        self.solicitar('2025-10-21', ('Metal', '3'), ('Papel', '1'))
+        self.autenticar(self.produtor, 'produtor')
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse('dashboard-volumes'))
+        self.assertEqual(resp.data['entidade'], 'produtor')
+        self.assertEqual([(t['tipo_residuo'], t['quantidade_solicitada']) for t in resp.data['totais']],
+                         [('Metal', Decimal('5')), ('Papel', Decimal('1'))])
+
+        resp = self.client.get(reverse('dashboard-volumes'), {'entidade': 'cidade', 'agrupar': 'dia',
+                                                              'de': '2025-10-21'})
+        self.assertEqual({(t['chave'], t['dia'].isoformat()) for t in resp.data['totais']},
+                         {('Teresina/PI', '2025-10-21')})
+        self.assertEqual(self.client.get(reverse('dashboard-volumes'), {'entidade': 'coletor'}).status_code, 403)
+
+
+class AvaliacaoTests(BaseAPITestCase):
+    def test_regras_da_avaliacao(self):
+        solicitacao = self.criar_solicitacoes(1, coletor=self.coletor, status='ACEITA')[0]
+        url = reverse('coleta-avaliar', args=[solicitacao.pk])
+        self.autenticar(self.produtor, 'produtor')
+        self.assertEqual(self.client.post(url, {'nota': 5}, format='json').status_code, 409)
+
+        SolicitacaoColeta.objects.filter(pk=solicitacao.pk).update(status='CONFIRMADA')
+        self.assertEqual(self.client.post(url, {'nota': 6}, format='json').status_code, 400)
+        resp = self.client.post(url, {'nota': 4, 'comentario': 'Pontual'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['avaliado']['total_avaliacoes'], 1)
+        self.assertEqual(self.client.post(url, {'nota': 1}, format='json').status_code, 409)
+
+        # o coletor avalia o produtor na mesma coleta; um estranho não avalia ninguém
+        self.autenticar(self.coletor, 'coletor')
+        self.assertEqual(self.client.post(url, {'nota': 3}, format='json').status_code, 201)
+        outro = Coletor.objects.create(nome='Outro', email='outro@teste.com', senha='1', cpf='3')
+        self.autenticar(outro, 'coletor')
+        self.assertEqual(self.client.post(url, {'nota': 3}, format='json').status_code, 403)
+
+        self.coletor.refresh_from_db()
+        self.produtor.refresh_from_db()
+        self.assertEqual((self.coletor.nota_avaliacao_atual, self.coletor.total_avaliacoes), (Decimal('4.00'), 1))
+        self.assertEqual((self.produtor.nota_avaliacao_atual, self.produtor.total_avaliacoes), (Decimal('3.00'), 1))
+
+
+class AvaliacaoConcorrenteTests(TransactionTestCase):
+    """Muitos produtores avaliando o mesmo coletor ao mesmo tempo: nenhuma nota se perde."""
+    avaliacoes_simultaneas = 30
+
+    def test_sem_atualizacoes_perdidas(self):
+        coletor = Coletor.objects.create(nome='Coletor', email='c@teste.com', senha='1', cpf='1')
+        pedidos = []
+        for i in range(self.avaliacoes_simultaneas):
+            produtor = Produtor.objects.create(nome=f'P{i}', email=f'p{i}@teste.com', senha='1', cpf_cnpj=str(i))
+            solicitacao = SolicitacaoColeta.objects.create(produtor=produtor, coletor=coletor, status='CONFIRMADA')
+            pedidos.append((produtor, solicitacao.pk, i % 5 + 1))
+
+        barreira = threading.Barrier(len(pedidos))
+        codigos = []
+
+        def avaliar(produtor, pk, nota):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_para(produtor, "produtor")}')
+            try:
+                barreira.wait()
+                codigos.append(client.post(reverse('coleta-avaliar', args=[pk]), {'nota': nota},
+                                           format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=avaliar, args=pedido) for pedido in pedidos]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(codigos, [201] * len(pedidos))
+        coletor.refresh_from_db()
+        notas = [nota for _, _, nota in pedidos]
+        self.assertEqual(coletor.total_avaliacoes, len(notas))
+        self.assertEqual(coletor.soma_avaliacoes, sum(notas))
+        self.assertEqual(coletor.nota_avaliacao_atual, round(Decimal(sum(notas)) / len(notas), 2))
+
+
+class PontosTests(BaseAPITestCase):
+    def mudar_status(self, pk, novo):
+        self.assertEqual(self.patch_status(pk, novo).status_code, 200)
+
+    def saldo(self):
+        self.autenticar(self.produtor, 'produtor')
+        with self.assertNumQueries(1):
+            return self.client.get(reverse('pontos-saldo')).data['saldo_pontos']
+
+    def test_credito_idempotente_estorno_e_reconciliacao(self):
+        # 2 UN de Metal + 1 UN de Papel = (2 x 15 + 1 x 5) x 0,2
+        pk = self.criar_solicitacoes(1, coletor=self.coletor, status='ACEITA')[0].pk
+        self.mudar_status(pk, 'CONFIRMADA')
+        self.mudar_status(pk, 'CONFIRMADA')
+        self.assertEqual(self.saldo(), Decimal('7.00'))
+        self.assertEqual(LancamentoPontos.objects.count(), 1)
+
+        self.mudar_status(pk, 'ACEITA')  # confirmação desfeita
+        self.mudar_status(pk, 'ACEITA')
+        self.assertEqual(self.saldo(), Decimal('0.00'))
+        self.mudar_status(pk, 'CONFIRMADA')
+        self.assertEqual(self.saldo(), Decimal('7.00'))
+        self.assertEqual(list(LancamentoPontos.objects.order_by('id').values_list('tipo', flat=True)),
+                         ['COLETA', 'ESTORNO', 'COLETA'])
+        extrato = self.client.get(reverse('pontos-extrato')).data['results']
+        self.assertEqual([lancamento['pontos'] for lancamento in extrato], ['7.00', '-7.00', '7.00'])
+
+        self.assertEqual(divergencias_de_saldo(), [])
+        Produtor.objects.filter(pk=self.produtor.pk).update(saldo_pontos=100)
+        self.assertEqual(divergencias_de_saldo(), [(self.produtor.pk, Decimal('100.00'), Decimal('7.00'))])
+        corrigir_saldo(self.produtor.pk)
+        self.assertEqual(divergencias_de_saldo(), [])
+
+    def test_so_o_coletor_da_coleta_confirma(self):
+        pk = self.criar_solicitacoes(1, coletor=self.coletor, status='ACEITA')[0].pk
+        url = reverse('atualizar-status-coleta', args=[pk])
+        outro = Coletor.objects.create(nome='Outro', email='outro@teste.com', senha='1', cpf='3')
+
+        self.client.credentials()
+        self.assertEqual(self.client.patch(url, {'status': 'CONFIRMADA'}, format='json').status_code, 401)
+        self.autenticar(outro, 'coletor')
+        self.assertEqual(self.client.patch(url, {'status': 'CONFIRMADA'}, format='json').status_code, 403)
+        # o produtor não confirma a própria coleta, e um coletor não cancela
+        self.autenticar(self.produtor, 'produtor')
+        self.assertEqual(self.client.patch(url, {'status': 'CONFIRMADA'}, format='json').status_code, 403)
+        self.autenticar(self.coletor, 'coletor')
+        self.assertEqual(self.client.patch(url, {'status': 'CANCELADA'}, format='json').status_code, 403)
+
+        self.produtor.refresh_from_db()
+        self.assertEqual(self.produtor.saldo_pontos, Decimal('0'))
+        self.assertEqual(LancamentoPontos.objects.count(), 0)
+        self.assertEqual(SolicitacaoColeta.objects.get(pk=pk).status, 'ACEITA')
+
+
+class PontosConcorrenciaTests(TransactionTestCase):
+    def test_patches_simultaneos_creditam_uma_vez(self):
+        produtor = Produtor.objects.create(nome='P', email='p@teste.com', senha='1', cpf_cnpj='1')
+        coletor = Coletor.objects.create(nome='C', email='c@teste.com', senha='1', cpf='1')
+        solicitacao = SolicitacaoColeta.objects.create(produtor=produtor, coletor=coletor, status='ACEITA')
+        ItemColeta.objects.create(solicitacao=solicitacao, quantidade=3, tipo_residuo='Metal', unidade_medida='KG')
+        url = reverse('atualizar-status-coleta', args=[solicitacao.pk])
+        token = token_para(coletor, 'coletor')
+        barreira = threading.Barrier(10)
+
+        def confirmar():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            try:
+                barreira.wait()
+                client.patch(url, {'status': 'CONFIRMADA'}, format='json')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=confirmar) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        produtor.refresh_from_db()
+        self.assertEqual(produtor.saldo_pontos, Decimal('45.00'))
+        self.assertEqual(LancamentoPontos.objects.count(), 1)
+
+
+class TransicoesStatusTests(BaseAPITestCase):
+    mudar_status = BaseAPITestCase.patch_status
+
+    def test_regras_e_historico(self):
+        self.autenticar(self.produtor, 'produtor')
+        resp = self.client.post(reverse('solicitar-coleta'), {
+            'inicio_coleta': '2025-10-20T12:00:00Z', 'fim_coleta': '2025-10-20T15:00:00Z',
+            'itens': [{'tipo_residuo': 'Metal', 'quantidade': '2', 'unidade_medida': 'KG'}],
+        }, format='json')
+        pk = SolicitacaoColeta.objects.get().pk
+
+        # sem passar por ACEITA: não há coletor na coleta para confirmá-la
+        self.assertEqual(self.mudar_status(pk, 'CONFIRMADA').status_code, 403)
+
+        self.autenticar(self.coletor, 'coletor')
+        self.assertEqual(self.client.post(reverse('coleta-aceitar', args=[pk])).status_code, 200)
+        resp = self.mudar_status(pk, 'CONFIRMADA')
+        self.assertEqual(resp.data, {'id': pk, 'status': 'CONFIRMADA', 'versao': 2})
+        self.assertEqual(self.mudar_status(pk, 'CANCELADA').status_code, 200)
+        resp = self.mudar_status(pk, 'ACEITA')  # cancelada é final
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual((resp.data['status'], resp.data['versao']), ('CANCELADA', 3))
+
+        historico = self.client.get(reverse('coleta-historico', args=[pk])).data['historico']
+        self.assertEqual([(h['versao'], h['status_anterior'], h['status_novo'], h['origem']) for h in historico], [
+            (0, None, 'SOLICITADA', 'criacao'),
+            (1, 'SOLICITADA', 'ACEITA', 'aceite'),
+            (2, 'ACEITA', 'CONFIRMADA', 'api'),
+            (3, 'CONFIRMADA', 'CANCELADA', 'api'),
+        ])
+        self.assertEqual(SolicitacaoColeta.objects.get(pk=pk).versao, 3)
+
+    def test_versao_desatualizada_e_conflito(self):
+        solicitacao = self.criar_solicitacoes(1, coletor=self.coletor, status='ACEITA')[0]
+        self.assertEqual(self.mudar_status(solicitacao.pk, 'CONFIRMADA', versao=0).status_code, 200)
+        resp = self.mudar_status(solicitacao.pk, 'CANCELADA', versao=0)
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual((resp.data['status'], resp.data['versao']), ('CONFIRMADA', 1))
+        self.assertEqual(self.mudar_status(solicitacao.pk, 'CANCELADA', versao='x').status_code, 400)
+
+    def test_aceite_so_pelo_endpoint_de_aceite(self):
+        solicitacao = self.criar_solicitacoes(1)[0]
+        resp = self.mudar_status(solicitacao.pk, 'ACEITA')
+        self.assertEqual(resp.status_code, 409)
+        solicitacao.refresh_from_db()
+        self.assertEqual((solicitacao.status, solicitacao.coletor_id, solicitacao.versao), ('SOLICITADA', None, 0))
+
+        # nem pela transição direta uma linha sem coletor vira ACEITA ou CONFIRMADA
+        sem_coletor = self.criar_solicitacoes(1, status='ACEITA')[0]
+        self.assertIsNone(aplicar_transicao(solicitacao.pk, 'SOLICITADA', 'ACEITA', 'teste'))
+        self.assertIsNone(aplicar_transicao(sem_coletor.pk, 'ACEITA', 'CONFIRMADA', 'teste'))
+        self.assertEqual(HistoricoStatusSolicitacao.objects.count(), 0)
+
+    def test_historico_so_para_participantes(self):
+        solicitacao = self.criar_solicitacoes(1, coletor=self.coletor, status='ACEITA')[0]
+        url = reverse('coleta-historico', args=[solicitacao.pk])
+        self.assertEqual(self.client.get(url).status_code, 401)
+        outro = Coletor.objects.create(nome='Outro', email='outro@teste.com', senha='1', cpf='3')
+        self.autenticar(outro, 'coletor')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.autenticar(self.coletor, 'coletor')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.autenticar(self.produtor, 'produtor')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(reverse('coleta-historico', args=[999999])).status_code, 404)
+
+    def test_desistencia_devolve_para_a_fila(self):
+        solicitacao = self.criar_solicitacoes(1, coletor=self.coletor, status='ACEITA')[0]
+        self.assertEqual(self.mudar_status(solicitacao.pk, 'SOLICITADA').status_code, 200)
+        solicitacao.refresh_from_db()
+        self.assertEqual((solicitacao.status, solicitacao.coletor_id), ('SOLICITADA', None))
+
+    def test_tempos_entre_status(self):
+        solicitacoes = self.criar_solicitacoes(3)
+        inicio = timezone.now() - timedelta(hours=5)
+        for minutos, solicitacao in zip((10, 20, 60), solicitacoes):
+            HistoricoStatusSolicitacao.objects.bulk_create([
+                HistoricoStatusSolicitacao(solicitacao=solicitacao, versao=0, status_novo='SOLICITADA',
+                                           origem='criacao', criado_em=inicio),
+                HistoricoStatusSolicitacao(solicitacao=solicitacao, versao=1, status_anterior='SOLICITADA',
+                                           status_novo='ACEITA', origem='aceite',
+                                           criado_em=inicio + timedelta(minutes=minutos)),
+            ])
+        tempos = tempos_entre_status('SOLICITADA', 'ACEITA', desde=inicio)
+        self.assertEqual(tempos['n'], 3)
+        self.assertAlmostEqual(tempos['p50_s'], 20 * 60)
+        self.assertEqual(tempos_entre_status('ACEITA', 'CONFIRMADA')['n'], 0)
+
+
+class TransicaoConcorrenteTests(TransactionTestCase):
+    def test_mesma_versao_so_um_vence(self):
+        produtor = Produtor.objects.create(nome='P', email='p@teste.com', senha='1', cpf_cnpj='1')
+        coletor = Coletor.objects.create(nome='C', email='c@teste.com', senha='1', cpf='1')
+        solicitacao = SolicitacaoColeta.objects.create(produtor=produtor, coletor=coletor, status='ACEITA')
+        url = reverse('atualizar-status-coleta', args=[solicitacao.pk])
+        pedidos = ['CONFIRMADA', 'CANCELADA', 'SOLICITADA'] * 3
+        tokens = {'CANCELADA': token_para(produtor, 'produtor')}
+        barreira = threading.Barrier(len(pedidos))
+        codigos = []
+
+        def mudar(novo):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.get(novo) or token_para(coletor, 'coletor')}")
+            try:
+                barreira.wait()
+                codigos.append(client.patch(url, {'status': novo, 'versao': 0}, format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=mudar, args=(novo,)) for novo in pedidos]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(codigos), [200] + [409] * (len(pedidos) - 1))
+        solicitacao.refresh_from_db()
+        self.assertEqual(solicitacao.versao, 1)
+        self.assertEqual(solicitacao.historico.count(), 1)
+
+
+class VersaoListagemConcorrenteTests(TransactionTestCase):
+    def test_commit_fora_de_ordem_muda_o_etag(self):
+        produtor = Produtor.objects.create(nome='P', email='p@teste.com', senha='1', cpf_cnpj='1')
+        primeira, segunda = [SolicitacaoColeta.objects.create(produtor=produtor) for _ in range(2)]
+        iniciada, liberar = threading.Event(), threading.Event()
+
+        def lenta():
+            # começa antes da outra escrita (now() fica para trás) e confirma depois dela
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                    iniciada.set()
+                    liberar.wait(5)
+                    mudar_status(primeira.pk, 'CANCELADA', 'produtor', produtor.pk)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=lenta)
+        thread.start()
+        self.assertTrue(iniciada.wait(5))
+        self.assertEqual(mudar_status(segunda.pk, 'CANCELADA', 'produtor', produtor.pk)[0], TRANSICIONADA)
+        client = APIClient()
+        url = reverse('coletas-disponiveis')
+        resp = client.get(url)
+        self.assertEqual([s['id'] for s in resp.data['results']], [primeira.pk])
+
+        liberar.set()
+        thread.join()
+        resp = client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['results'], [])
+
+
+class CodigoVoucherTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.primeiro = codigo_do_numero(1)
+
+    def test_codigos_unicos_e_digito_verificador(self):
+        codigos = [codigo_do_numero(n) for n in range(1, 20001)]
+        self.assertEqual(len(set(codigos)), len(codigos))
+        codigo = codigos[0]
+        self.assertEqual(normalizar_codigo(codigo.lower().replace('-', '')), codigo)
+        for i, simbolo in enumerate(codigo.replace('-', '')):
+            trocado = list(codigo.replace('-', ''))
+            trocado[i] = next(c for c in ALFABETO if c != simbolo)
+            self.assertIsNone(normalizar_codigo(''.join(trocado)))
+
+    def test_chave_obrigatoria(self):
+        with override_settings(VOUCHER_CHAVE=None):
+            with self.assertRaises(ImproperlyConfigured):
+                verificar_chave()
+            with self.assertRaises(ImproperlyConfigured):
+                codigo_do_numero(1)
+        # não depende da SECRET_KEY
+        with override_settings(SECRET_KEY='outra-secret-key'):
+            self.assertEqual(codigo_do_numero(1), CodigoVoucherTests.primeiro)
+
+
+class RecompensaTests(BaseAPITestCase):
+    def test_emissao_debita_e_resgate_unico(self):
+        lancar(self.produtor.pk, Decimal('250'), 'AJUSTE', 'teste:inicial')
+        self.autenticar(self.produtor, 'produtor')
+        resp = self.client.post(reverse('recompensas'), {'premio': 'cupom-mercado-10', 'quantidade': 2},
+                                format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(resp.data), 2)
+        self.produtor.refresh_from_db()
+        self.assertEqual(self.produtor.saldo_pontos, Decimal('50.00'))
+        self.assertEqual(divergencias_de_saldo(), [])
+        self.assertEqual(self.client.post(reverse('recompensas'), {'premio': 'cupom-mercado-10'},
+                                          format='json').status_code, 409)
+
+        codigo = resp.data[0]['codigo_voucher']
+        url = reverse('recompensas-resgatar')
+        self.assertEqual(self.client.post(url, {'codigo': codigo.lower()}, format='json').status_code, 200)
+        self.assertEqual(self.client.post(url, {'codigo': codigo}, format='json').status_code, 409)
+        self.assertEqual(self.client.post(url, {'codigo': 'AAAA-AAAA-A'}, format='json').status_code, 404)
+        self.assertEqual(Recompensa.objects.filter(status='RESGATADO').count(), 1)
+
+
+class ResgateConcorrenteTests(TransactionTestCase):
+    def test_codigo_resgatado_uma_unica_vez(self):
+        produtor = Produtor.objects.create(nome='P', email='p@teste.com', senha='1', cpf_cnpj='1')
+        Recompensa.objects.create(id_produtor=produtor, codigo_voucher=codigo_do_numero(1), nome_premio='X',
+                                  loja_parceira='Y', status='ATIVO')
+        barreira = threading.Barrier(10)
+        codigos = []
+
+        def resgatar():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_para(produtor, "produtor")}')
+            try:
+                barreira.wait()
+                codigos.append(client.post(reverse('recompensas-resgatar'), {'codigo': codigo_do_numero(1)},
+                                           format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=resgatar) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(codigos), [200] + [409] * 9)
+
+
+class PlanosConsultasTests(TestCase):
+    def test_consultas_quentes_usam_indices(self):
+        saida = StringIO()
+        call_command('verificar_planos', solicitacoes=500, stdout=saida)
+        self.assertIn('consultas usam índices', saida.getvalue())
+        self.assertFalse(SolicitacaoColeta.objects.exists())  # a massa é desfeita
+
+    def test_detecta_varredura_sequencial(self):
+        semear(200)
+        sem_indice = {'observacoes': lambda ctx: SolicitacaoColeta.objects.filter(observacoes='x')}
+        resultado = verificar_planos(contexto(), consultas=sem_indice)
+        self.assertEqual(resultado['observacoes'][1], ['solicitacao_coleta'])
+
+    def test_varreduras_em_subplanos(self):
+        plano = {'Node Type': 'Limit', 'Plans': [
+            {'Node Type': 'Nested Loop', 'Plans': [
+                {'Node Type': 'Index Scan', 'Relation Name': 'solicitacao_coleta'},
+                {'Node Type': 'Seq Scan', 'Relation Name': 'produtor'},
+            ]},
+        ]}
+        self.assertEqual(varreduras_sequenciais(plano), ['produtor'])
+
+
+class MetricasTests(SimpleTestCase):
+    @override_settings(METRICAS_TOKEN='segredo', METRICAS_SERVER_TIMING=True)
+    def test_server_timing_e_exposicao(self):
+        resposta = self.client.get('/api/')
+        self.assertRegex(resposta['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="0 consultas"')
+        texto = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer segredo').content.decode()
+        self.assertIn('reciclaai_requisicoes_total{endpoint="api/",metodo="GET",status="200"}', texto)
+        self.assertIn('reciclaai_requisicao_segundos_bucket{endpoint="api/",metodo="GET",le="+Inf"}', texto)
+
+    @override_settings(METRICAS_SERVER_TIMING=False, METRICAS_TOKEN='segredo')
+    def test_sem_server_timing_e_metodo_desconhecido(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/'))
+        self.client.generic('INVENTADO', '/api/')
+        texto = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer segredo').content.decode()
+        self.assertIn('metodo="OTHER"', texto)
+        self.assertNotIn('INVENTADO', texto)
+
+    @override_settings(METRICAS_SERVER_TIMING=True)
+    def test_middleware_assincrono(self):
+        resposta = asyncio.run(self.async_client.get('/api/'))
+        self.assertIn('total;dur=', resposta['Server-Timing'])
+
+    @override_settings(METRICAS_TOKEN='segredo')
+    def test_metrics_exige_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        resposta = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(resposta.status_code, 200)
+
+    @override_settings(METRICAS_TOKEN=None)
+    def test_metrics_sem_token_so_com_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_histograma_acumula_baldes(self):
+        histograma = Histograma('h', 'ajuda', (0.1, 1.0), ('endpoint',))
+        for valor in (0.05, 0.1, 0.5, 3):
+            histograma.observar(('x',), valor)
+        linhas = histograma.exposicao()
+        self.assertIn('h_bucket{endpoint="x",le="0.1"} 2', linhas)
+        self.assertIn('h_bucket{endpoint="x",le="1.0"} 3', linhas)
+        self.assertIn('h_bucket{endpoint="x",le="+Inf"} 4', linhas)
+        self.assertIn('h_count{endpoint="x"} 4', linhas)
+
+    def test_medir_aninhado_conta_uma_vez(self):
+        medicao = Medicao()
+        token = _medicao.set(medicao)
+        try:
+            with medir('serializacao'):
+                with medir('serializacao'):
+                    time.sleep(0.01)
+        finally:
+            _medicao.reset(token)
+        self.assertGreaterEqual(medicao.serializacao, 0.01)
+        self.assertLess(medicao.serializacao, 0.02)
+        with medir('serializacao'):  # fora de requisição: nada a medir
+            pass
+
+
+class MetricasConsultasTests(BaseAPITestCase):
+    @override_settings(METRICAS_SERVER_TIMING=True)
+    def test_conta_consultas_da_requisicao(self):
+        self.criar_solicitacoes(3)
+        self.autenticar(self.produtor, 'produtor')
+        resposta = self.client.get(reverse('minhas-solicitacoes'))
+        self.assertIn('desc="3 consultas"', resposta['Server-Timing'])  # como em ConsultasListagemTests
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_percentis_e_resumo(self):
+        latencias = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+        self.assertEqual(percentil(list(range(1, 101)), 99), 99)
+        resumo = resumir(latencias, {'200': 98, '500': 2}, 2.0)
+        self.assertEqual((resumo['p50_ms'], resumo['p95_ms'], resumo['p99_ms']), (50.0, 95.0, 99.0))
+        self.assertEqual((resumo['rps'], resumo['erros']), (50.0, 2))
+
+    def test_comparacao(self):
+        anterior = {'endpoints': {'login': {'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 40, 'rps': 100}}}
+        atual = {'endpoints': {'login': {'p50_ms': 5, 'p95_ms': 20, 'p99_ms': 50, 'rps': 150},
+                               'novo': {'p50_ms': 1, 'p95_ms': 1, 'p99_ms': 1, 'rps': 1}}}
+        self.assertEqual(comparar(anterior, atual),
+                         {'login': {'p50_ms': -50.0, 'p95_ms': 0.0, 'p99_ms': 25.0, 'rps': 50.0}})
+
+    def test_sincrona_vs_assincrona(self):
+        endpoints = {
+            'coletas_disponiveis@8': {'rps': 100, 'p99_ms': 80},
+            'coletas_disponiveis_async@8': {'rps': 150, 'p99_ms': 40},
+            'coletas_minhas_async@8': {'rps': 10, 'p99_ms': 1},
+        }
+        self.assertEqual(sincrona_vs_assincrona(endpoints), {'coletas_disponiveis@8': {
+            'rps_sincrona': 100, 'rps_assincrona': 150, 'rps_razao': 1.5,
+            'p99_sincrona_ms': 80, 'p99_assincrona_ms': 40}})
+
+
+class BenchmarkApiTests(TransactionTestCase):
+    def test_roda_cenarios_com_massa_pequena(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            saida = f"{pasta}/resultado.json"
+            call_command('benchmark_api', semear=True, produtores=30, coletores=5, cooperativas=3, itens=400,
+                         requisicoes=6, aquecimento=2, clientes=3, saida=saida, stdout=StringIO())
+            with open(saida) as arquivo:
+                resultado = json.load(arquivo)
+        self.assertEqual(resultado['massa']['itens'], 400)
+        for nome, dados in resultado['endpoints'].items():
+            self.assertEqual(dados['status'], {'200': 6}, nome)
+
+
+class SemearMassaTests(TestCase):
+    def test_carga_consistente(self):
+        criados = semear_massa(produtores=50, coletores=5, cooperativas=4, itens=301, seed=7, lote=40)
+        self.assertEqual(Produtor.objects.count(), 50)
+        self.assertEqual(ItemColeta.objects.count(), 301)
+        self.assertEqual(SolicitacaoColeta.objects.count(), criados['solicitacoes'])
+        self.assertFalse(SolicitacaoColeta.objects.filter(itens__isnull=True).exists())
+        self.assertFalse(SolicitacaoColeta.objects.filter(status='SOLICITADA', coletor__isnull=False).exists())
+        self.assertTrue(Cooperativa.objects.filter(geom__isnull=False).exists())
+        # datas a partir da referência fixa, não do relógio
+        datas = SolicitacaoColeta.objects.aggregate(primeira=Min('inicio_coleta'), ultima=Max('inicio_coleta'))
+        self.assertGreaterEqual(datas['primeira'], REFERENCIA - timedelta(days=90))
+        self.assertLessEqual(datas['ultima'], REFERENCIA + timedelta(days=3))
+        # sequências ajustadas: o próximo cadastro não colide com os ids carregados
+        Produtor.objects.create(nome='Novo', email='novo@teste.com', senha='1', cpf_cnpj='1')
+        with self.assertRaises(MassaJaExiste):
+            semear_massa(produtores=1, coletores=0, cooperativas=0, itens=0)
+
+
+class RastreamentoTests(SimpleTestCase):
+    def test_request_id_recebido_ou_gerado(self):
+        self.assertEqual(self.client.get('/api/', HTTP_X_REQUEST_ID='abc-123')['X-Request-ID'], 'abc-123')
+        gerado = self.client.get('/api/', HTTP_X_REQUEST_ID='com espaço\n')['X-Request-ID']
+        self.assertRegex(gerado, r'^[0-9a-f]{32}$')
+
+    @override_settings(RASTREAMENTO_AMOSTRAGEM=1.0)
+    def test_requisicao_amostrada_registra_spans(self):
+        class Usuario:
+            pk = 1
+        with self.assertLogs('aplicativo_web.rastreamento', 'INFO') as logs:
+            self.client.get(reverse('recompensas-catalogo'),
+                            HTTP_AUTHORIZATION=f'Bearer {token_para(Usuario, "produtor")}')
+        dados = logs.records[0].dados
+        self.assertEqual(dados['endpoint'], 'api/recompensas/catalogo/')
+        self.assertEqual([s['nome'] for s in dados['spans']], ['autenticacao'])
+
+    @override_settings(RASTREAMENTO_AMOSTRAGEM=0.0)
+    def test_sem_amostragem_nada_e_registrado(self):
+        with self.assertNoLogs('aplicativo_web.rastreamento'):
+            self.client.get('/api/')
+        with span('fora_de_requisicao'):
+            pass
+
+    def test_handler_em_fila_escreve_json_e_descarta_quando_cheio(self):
+        destino = StringIO()
+        handler = HandlerEmFila(tamanho=1, stream=destino)
+        handler.addFilter(FiltroRequisicao())
+        logger = logging.getLogger('aplicativo_web.testes_fila')
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            handler.listener.stop()  # sem consumidor: a fila enche
+            logger.warning("primeiro %s", 1, extra={'dados': {'x': 1}})
+            logger.warning("segundo")
+            self.assertEqual(handler.descartados, 1)
+            handler.listener.start()
+        finally:
+            logger.removeHandler(handler)
+            handler.close()  # esvazia a fila
+        linha = json.loads(destino.getvalue().splitlines()[0])
+        self.assertEqual((linha['mensagem'], linha['dados'], linha['request_id']), ('primeiro 1', {'x': 1}, None))
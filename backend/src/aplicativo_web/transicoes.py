@@ -0,0 +1,184 @@
+# backend/src/aplicativo_web/transicoes.py
+"""Máquina de estados de `SolicitacaoColeta` e histórico de status.
+
+Toda mudança de status passa por `aplicar_transicao`: um único comando que faz o
+compare-and-set (`UPDATE ... WHERE status = <anterior> [AND versao = <lida>]`,
+incrementando `versao`) e, no mesmo comando, insere a linha em
+`HistoricoStatusSolicitacao`. Sem a linha afetada não há histórico; com ela, os dois
+entram juntos. Nada é regravado além das colunas da transição, então um aceite
+simultâneo nunca é sobrescrito.
+"""
+
+from django.db import connection, transaction
+
+from .models import HistoricoStatusSolicitacao, SolicitacaoColeta, VersaoListagem
+from .pontos import ajustar_pontos_por_status
+from .volumes import registrar_mudanca_status
+
+# status atual -> status para os quais pode ir
+TRANSICOES = {
+    'SOLICITADA': {'ACEITA', 'CANCELADA'},
+    # de volta a SOLICITADA quando o coletor desiste (a solicitação volta para a fila)
+    'ACEITA': {'CONFIRMADA', 'CANCELADA', 'SOLICITADA'},
+    # confirmação desfeita ou cancelada depois: os pontos são estornados
+    'CONFIRMADA': {'ACEITA', 'CANCELADA'},
+    'CANCELADA': set(),
+}
+
+# status pedido -> quem pode pedir: o coletor da solicitação confirma, desfaz a
+# confirmação e desiste; o produtor dono cancela. Confirmar credita pontos resgatáveis,
+# então ninguém de fora da coleta muda o status.
+QUEM_PEDE = {
+    'CONFIRMADA': 'coletor',
+    'ACEITA': 'coletor',
+    'SOLICITADA': 'coletor',
+    'CANCELADA': 'produtor',
+}
+CAMPO_DO_PARTICIPANTE = {'produtor': 'produtor_id', 'coletor': 'coletor_id'}
+# aceitar é só por `aceite.aceitar_solicitacao`/`aceitar_proxima`, que gravam o coletor
+# no mesmo UPDATE; pelo PATCH genérico ficaria uma ACEITA sem coletor
+SO_PELO_ACEITE = {('SOLICITADA', 'ACEITA')}
+# status que exigem coletor na linha; o UPDATE não os grava com coletor_id nulo
+COM_COLETOR = {'ACEITA', 'CONFIRMADA'}
+
+TRANSICIONADA = 'transicionada'
+SEM_MUDANCA = 'sem_mudanca'
+NAO_PERMITIDA = 'nao_permitida'
+PELO_ACEITE = 'pelo_aceite'
+NAO_PARTICIPANTE = 'nao_participante'
+CONFLITO = 'conflito'
+NAO_ENCONTRADA = 'nao_encontrada'
+
+TENTATIVAS = 3
+
+
+def permitida(anterior, novo):
+    return novo in TRANSICOES.get(anterior, ())
+
+
+def participa(solicitacao, user_type, user_id):
+    """Se o usuário é o produtor dono ou o coletor designado da solicitação."""
+    campo = CAMPO_DO_PARTICIPANTE.get(user_type)
+    return campo is not None and user_id is not None and getattr(solicitacao, campo) == user_id
+
+
+def aplicar_transicao(pk, anterior, novo, origem, versao=None, **campos):
+    """Compare-and-set do status e linha no histórico, num único comando.
+
+    `campos` são outras colunas da solicitação gravadas junto (ex.: coletor_id). Com
+    `versao`, exige também a versão lida. Retorna a nova versão, ou None se a
+    solicitação não estava mais em `anterior` (ou em outra versão), ou se `novo` exige
+    coletor e a linha não tem um. `atualizado_em` é `clock_timestamp()`: com a linha
+    travada pelo UPDATE, cresce na ordem dos commits (`now()` é o início da transação).
+    Aplicada, incrementa a versão das listagens na mesma transação.
+    """
+    tabela = SolicitacaoColeta._meta.db_table
+    colunas = [SolicitacaoColeta._meta.get_field(nome).column for nome in campos]
+    atribuicoes = ''.join(f", {coluna} = %s" for coluna in colunas)
+    condicao = "id = %s AND status = %s" + (" AND versao = %s" if versao is not None else "")
+    if novo in COM_COLETOR and 'coletor_id' not in campos:
+        condicao += " AND coletor_id IS NOT NULL"
+    sql = (
+        f"WITH alterada AS ("
+        f"UPDATE {tabela} SET status = %s, versao = versao + 1, atualizado_em = clock_timestamp(){atribuicoes} "
+        f"WHERE {condicao} RETURNING id, versao) "
+        f"INSERT INTO {HistoricoStatusSolicitacao._meta.db_table} "
+        f"(id_solicitacao, versao, status_anterior, status_novo, origem, criado_em) "
+        f"SELECT id, versao, %s, %s, %s, now() FROM alterada RETURNING versao"
+    )
+    params = [novo, *campos.values(), pk, anterior]
+    if versao is not None:
+        params.append(versao)
+    params += [anterior, novo, origem]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        linha = cursor.fetchone()
+    if linha is None:
+        return None
+    VersaoListagem.objects.incrementar(VersaoListagem.SOLICITACOES)
+    return linha[0]
+
+
+def registrar_criacao(solicitacoes, origem='criacao'):
+    """Versão 0 do histórico das solicitações recém-criadas, num único INSERT."""
+    HistoricoStatusSolicitacao.objects.bulk_create([
+        HistoricoStatusSolicitacao(solicitacao_id=s.pk, versao=0, status_novo=s.status, origem=origem)
+        for s in solicitacoes
+    ])
+
+
+def mudar_status(pk, novo, user_type, user_id, versao=None, origem='api'):
+    """Leva a solicitação `pk` para `novo`, se a regra permitir. Retorna (resultado, solicitação).
+
+    Só quem `QUEM_PEDE` indica, e participando da solicitação, pede a mudança; os
+    outros recebem NAO_PARTICIPANTE antes de qualquer outra checagem. Aceitar uma
+    solicitação aberta é PELO_ACEITE (ver `SO_PELO_ACEITE`).
+    Leitura sem trava e compare-and-set na versão lida. Com `versao` (a que o cliente
+    viu), qualquer mudança no meio é CONFLITO. Sem ela, uma mudança concorrente faz
+    reler e revalidar a regra, até `TENTATIVAS` vezes. Pedir o status em que a
+    solicitação já está é SEM_MUDANCA. Volumes e pontos são ajustados na mesma transação,
+    com a linha já travada pelo UPDATE.
+    """
+    with transaction.atomic():
+        for _ in range(TENTATIVAS):
+            solicitacao = SolicitacaoColeta.objects.select_related('produtor').filter(pk=pk).first()
+            if solicitacao is None:
+                return NAO_ENCONTRADA, None
+            if (solicitacao.status, novo) in SO_PELO_ACEITE:
+                return PELO_ACEITE, solicitacao
+            if user_type != QUEM_PEDE.get(novo) or not participa(solicitacao, user_type, user_id):
+                return NAO_PARTICIPANTE, solicitacao
+            if versao is not None and solicitacao.versao != versao:
+                return CONFLITO, solicitacao
+            anterior = solicitacao.status
+            if anterior == novo:
+                return SEM_MUDANCA, solicitacao
+            if not permitida(anterior, novo):
+                return NAO_PERMITIDA, solicitacao
+
+            campos = {'coletor_id': None} if novo == 'SOLICITADA' else {}
+            nova_versao = aplicar_transicao(pk, anterior, novo, origem, solicitacao.versao, **campos)
+            if nova_versao is None:
+                if versao is not None:
+                    return CONFLITO, solicitacao
+                continue
+            registrar_mudanca_status(solicitacao, anterior, novo)
+            ajustar_pontos_por_status(solicitacao, anterior, novo)
+            solicitacao.status, solicitacao.versao = novo, nova_versao
+            for nome, valor in campos.items():
+                setattr(solicitacao, nome, valor)
+            return TRANSICIONADA, solicitacao
+        return CONFLITO, solicitacao
+
+
+def linha_do_tempo(pk):
+    """Transições da solicitação em ordem (índice único por solicitação e versão)."""
+    return list(
+        HistoricoStatusSolicitacao.objects.filter(solicitacao_id=pk).order_by('versao')
+        .values('versao', 'status_anterior', 'status_novo', 'origem', 'criado_em'))
+
+
+def tempos_entre_status(de, para, desde=None):
+    """Segundos entre entrar em `de` e, depois, em `para`, por solicitação: n e p50/p90/p99.
+
+    Parte das entradas em `para` (índice por status e data) e procura a última entrada
+    em `de` anterior a ela na mesma solicitação (índice por solicitação e versão).
+    """
+    tabela = HistoricoStatusSolicitacao._meta.db_table
+    filtro = " AND b.criado_em >= %s" if desde is not None else ""
+    sql = (
+        f"SELECT count(*), "
+        f"percentile_cont(0.5) WITHIN GROUP (ORDER BY segundos), "
+        f"percentile_cont(0.9) WITHIN GROUP (ORDER BY segundos), "
+        f"percentile_cont(0.99) WITHIN GROUP (ORDER BY segundos) "
+        f"FROM (SELECT EXTRACT(EPOCH FROM b.criado_em - a.criado_em)::float8 AS segundos "
+        f"FROM {tabela} b CROSS JOIN LATERAL ("
+        f"SELECT criado_em FROM {tabela} a WHERE a.id_solicitacao = b.id_solicitacao "
+        f"AND a.versao < b.versao AND a.status_novo = %s ORDER BY a.versao DESC LIMIT 1) a "
+        f"WHERE b.status_novo = %s{filtro}) t"
+    )
+    params = [de, para] + ([desde] if desde is not None else [])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        n, p50, p90, p99 = cursor.fetchone()
+    return {'de': de, 'para': para, 'n': n, 'p50_s': p50, 'p90_s': p90, 'p99_s': p99}
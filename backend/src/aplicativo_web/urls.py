@@ -1,4 +1,5 @@
 # backend/src/aplicativo_web/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 from .views import (
@@ -16,6 +17,15 @@ from .views import (
     # escolha_cooperativa_view
 )
 
+
+def leitura(rota, sincrona, assincrona, name):
+    """Rota canônica (a view DRF, ou a assíncrona com `LEITURAS_ASSINCRONAS`) e a
+    variante assíncrona sempre disponível em `async/<rota>` (nome `<name>-async`).
+    """
+    canonica = assincrona if getattr(settings, 'LEITURAS_ASSINCRONAS', False) else sincrona
+    return [path(rota, canonica, name=name), path(f'async/{rota}', assincrona, name=f'{name}-async')]
+
+
 urlpatterns = [
     path("", views.index, name="index"),
     path('register/producer/', ProdutorRegisterView.as_view(),
@@ -25,21 +35,43 @@ urlpatterns = [
     path('register/cooperative/', CooperativaRegisterView.as_view(),
          name='register-cooperative'),
     path('login/', CustomLoginView.as_view(), name='login'),
+    path('async/login/', views.login_assincrono, name='login-async'),
     path('coletas/solicitar/', SolicitarColetaView.as_view(),
          name='solicitar-coleta'),
-    path('cooperativas/', CooperativaListView.as_view(), name='cooperativas-list'),
-    path('coletas/minhas/', MinhasSolicitacoesView.as_view(),
-         name='minhas-solicitacoes'),
-    path('coletas/minhas_coletor/', views.MinhasSolicitacoesColetorView.as_view(),
-         name='minhas-solicitacoes-coletor'),
-    path('coletas/disponiveis/', DisponiveisSolicitacoesView.as_view(),
-         name='coletas-disponiveis'),
+    path('coletas/solicitar/lote/', views.SolicitarColetaLoteView.as_view(),
+         name='solicitar-coleta-lote'),
+    *leitura('cooperativas/', CooperativaListView.as_view(), views.cooperativas_assincrona,
+             'cooperativas-list'),
+    path('cooperativas/proximas/', views.CooperativasProximasView.as_view(),
+         name='cooperativas-proximas'),
+    *leitura('coletas/minhas/', MinhasSolicitacoesView.as_view(), views.minhas_solicitacoes_assincrona,
+             'minhas-solicitacoes'),
+    *leitura('coletas/minhas_coletor/', views.MinhasSolicitacoesColetorView.as_view(),
+             views.minhas_solicitacoes_coletor_assincrona, 'minhas-solicitacoes-coletor'),
+    *leitura('coletas/disponiveis/', DisponiveisSolicitacoesView.as_view(), views.disponiveis_assincrona,
+             'coletas-disponiveis'),
+    path('coletas/disponiveis/proximas/', views.DisponiveisProximasView.as_view(),
+         name='coletas-disponiveis-proximas'),
+    path('pontos/', views.SaldoPontosView.as_view(), name='pontos-saldo'),
+    path('pontos/extrato/', views.ExtratoPontosView.as_view(), name='pontos-extrato'),
+    path('recompensas/', views.RecompensasView.as_view(), name='recompensas'),
+    path('recompensas/catalogo/', views.CatalogoRecompensasView.as_view(), name='recompensas-catalogo'),
+    path('recompensas/resgatar/', views.ResgatarVoucherView.as_view(), name='recompensas-resgatar'),
+    path('dashboard/volumes/', views.VolumesResiduoView.as_view(), name='dashboard-volumes'),
+    path('coletas/eventos/', views.eventos_solicitacoes, name='coletas-eventos'),
     path("coletas/<int:pk>/status/", views.AtualizarStatusColetaView.as_view(),
      name="atualizar-status-coleta"),
+    path('coletas/<int:pk>/historico/', views.HistoricoStatusColetaView.as_view(),
+         name='coleta-historico'),
     
-    path('coletas/<int:pk>/', views.SolicitacaoColetaDetailView.as_view(),
-         name='coleta-detail'),
+    *leitura('coletas/<int:pk>/', views.SolicitacaoColetaDetailView.as_view(),
+             views.solicitacao_detalhe_assincrona, 'coleta-detail'),
     path('coletas/<int:pk>/aceitar/',
          views.AcceptSolicitacaoView.as_view(), name='coleta-aceitar'),
+    path('coletas/rota/', views.RotaColetorView.as_view(), name='coletas-rota'),
+    path('coletas/<int:pk>/avaliar/',
+         views.AvaliarSolicitacaoView.as_view(), name='coleta-avaliar'),
+    path('coletas/aceitar_proxima/',
+         views.AceitarProximaSolicitacaoView.as_view(), name='coleta-aceitar-proxima'),
     # path('list_cooperativas/', views.escolha_cooperativa_view, name='list-cooperativas'),
 ]
@@ -1,7 +1,16 @@
 # backend/src/aplicativo_web/views.py
 
-from django.http import FileResponse, Http404, HttpResponse
+import asyncio
+import json
+import logging
+
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from django.db.models import Sum
 from pathlib import Path
 from rest_framework import generics, status
 from rest_framework.response import Response
@@ -10,15 +19,42 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import permissions
 from rest_framework import serializers
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed, NotFound, ParseError
 
 from .serializers import (
     ProdutorRegistrationSerializer, ColetorRegistrationSerializer,
     CooperativaRegistrationSerializer, LoginSerializer,
     SolicitacaoColetaCreateSerializer, SolicitacaoColetaListSerializer,
-    SolicitacaoColetaDetailSerializer
+    SolicitacaoColetaDetailSerializer, SolicitacaoColetaProximaSerializer, AvaliacaoSerializer,
+    LancamentoPontosSerializer, RecompensaSerializer, EmissaoVoucherSerializer,
+)
+from .models import (Produtor, Coletor, Cooperativa, SolicitacaoColeta, ItemColeta, VolumeResiduoDiario, LancamentoPontos,
+                     Recompensa, VersaoListagem)
+from .permissions import IsProdutor, IsColetor
+from .condicional import GetCondicionalMixin, responder_condicional
+from .assincrono import leitura_assincrona, resposta_erro, resposta_json
+from .pagination import IdCursorPagination, CooperativaCursorPagination, RecompensaCursorPagination
+from .contas import aresolver_conta, resolver_conta
+from .senhas import averificar_senha, verificar_senha
+from .cooperativas import cooperativas_proximas, K_MAXIMO as COOPERATIVAS_K_MAXIMO
+from .geo import ponto_dos_parametros
+from .authentication import CachedJWTAuthentication
+from .eventos import (
+    FiltroEventos, get_broadcaster, publicar_solicitacoes,
+    SOLICITACAO_CRIADA, SOLICITACAO_ACEITA, STATUS_ALTERADO,
+)
+from .rotas import otimizar_rota
+from .vouchers import emitir_vouchers, resgatar_voucher, normalizar_codigo, PremioDesconhecido, RESGATADO, JA_RESGATADO
+from .avaliacoes import avaliar, AVALIADA, JA_AVALIADA, NAO_CONFIRMADA, NAO_PARTICIPANTE
+from .volumes import PRODUTOR, COLETOR, CIDADE
+from .aceite import aceitar_solicitacao, aceitar_proxima, ACEITA, NAO_ENCONTRADA
+from .transicoes import (
+    TRANSICOES, TRANSICIONADA, NAO_PERMITIDA, PELO_ACEITE, CONFLITO, mudar_status, linha_do_tempo, participa,
+    NAO_PARTICIPANTE as STATUS_NAO_PARTICIPANTE,
 )
-from .models import Produtor, Coletor, Cooperativa, SolicitacaoColeta
-from .permissions import IsProdutor
+from .metricas import registro as registro_metricas
+
+logger = logging.getLogger(__name__)
 
 # --- Views Originais (Servir Frontend e Teste) ---
 
@@ -35,6 +71,20 @@ def spa(request):
 def index(request):
     return HttpResponse("Olá, mundo. Você está no índice da API.")
 
+
+def metricas(request):
+    """Métricas por requisição no formato texto do Prometheus (aplicativo_web/metricas.py).
+    Exige `Authorization: Bearer <METRICAS_TOKEN>`. Sem `METRICAS_TOKEN` configurado, a
+    rota fica fechada (403), exceto com DEBUG.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(registro_metricas.exposicao(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # --- Views de Cadastro ---
 
 
@@ -49,28 +99,65 @@ class ProdutorRegisterView(generics.CreateAPIView):
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class AtualizarStatusColetaView(APIView):
-    permission_classes = [permissions.AllowAny]
+    """Muda o status pela máquina de estados (`transicoes.TRANSICOES`).
+    Corpo: `{"status": ..., "versao": <opcional>}`. Com `versao` (a do detalhe), a
+    mudança só vale se ninguém mexeu na solicitação desde então. Só o coletor da coleta
+    confirma, desfaz a confirmação ou desiste, e só o produtor dono cancela
+    (`transicoes.QUEM_PEDE`). Aceitar é por `coletas/<pk>/aceitar/`, que grava o coletor.
+    """
+    permission_classes = [IsProdutor | IsColetor]
 
-    def patch(self, request, pk):
-        try:
-            coleta = SolicitacaoColeta.objects.get(pk=pk)
-        except SolicitacaoColeta.DoesNotExist:
-            return Response({"detail": "Coleta não encontrada"}, status=404)
+    ERROS = {
+        NAO_PERMITIDA: ('Transição de status não permitida.', status.HTTP_409_CONFLICT),
+        PELO_ACEITE: ('Para aceitar uma solicitação use coletas/<pk>/aceitar/.', status.HTTP_409_CONFLICT),
+        CONFLITO: ('A solicitação foi alterada por outra requisição; recarregue e tente de novo.',
+                   status.HTTP_409_CONFLICT),
+    }
 
+    def patch(self, request, pk):
         novo_status = request.data.get("status")
 
-        if novo_status not in ["ACEITA", "CONFIRMADA", "CANCELADA", "SOLICITADA"]:
+        if novo_status not in TRANSICOES:
             return Response({"detail": "Status inválido"}, status=400)
+        versao = request.data.get("versao")
+        if versao is not None:
+            try:
+                versao = int(versao)
+            except (TypeError, ValueError):
+                return Response({"detail": "Versão inválida"}, status=400)
 
-        coleta.status = novo_status
-        coleta.save()
+        resultado, coleta = mudar_status(pk, novo_status, request.user.user_type, request.user.pk, versao=versao)
+        if resultado == NAO_ENCONTRADA:
+            return Response({"detail": "Coleta não encontrada"}, status=404)
+        if resultado == STATUS_NAO_PARTICIPANTE:
+            return Response({"detail": "Você não pode levar esta coleta para este status."}, status=403)
+        if resultado in self.ERROS:
+            detalhe, codigo = self.ERROS[resultado]
+            return Response({"detail": detalhe, "status": coleta.status, "versao": coleta.versao}, status=codigo)
+        if resultado == TRANSICIONADA:
+            publicar_solicitacoes(STATUS_ALTERADO, [coleta.id])
 
         return Response({
             "id": coleta.id,
-            "status": coleta.status
+            "status": coleta.status,
+            "versao": coleta.versao,
         })
 
-    
+
+class HistoricoStatusColetaView(APIView):
+    """Linha do tempo de status de uma solicitação (criação e cada transição).
+    Visível só para o produtor dono e o coletor da coleta.
+    """
+    permission_classes = [IsProdutor | IsColetor]
+
+    def get(self, request, pk):
+        coleta = SolicitacaoColeta.objects.filter(pk=pk).only('produtor_id', 'coletor_id').first()
+        if coleta is None:
+            return Response({"detail": "Coleta não encontrada"}, status=404)
+        if not participa(coleta, request.user.user_type, request.user.pk):
+            return Response({"detail": "Você não participa desta coleta."}, status=403)
+        return Response({"id": pk, "historico": linha_do_tempo(pk)})
+
 
 class ColetorRegisterView(generics.CreateAPIView):
     serializer_class = ColetorRegistrationSerializer
@@ -94,18 +181,52 @@ class CooperativaRegisterView(generics.CreateAPIView):
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CooperativaListView(generics.ListAPIView):
+class CooperativaListView(GetCondicionalMixin, generics.ListAPIView):
     """Lista cooperativas cadastradas (para uso pelo frontend)."""
     serializer_class = CooperativaRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CooperativaCursorPagination
+
+    def versao_recurso(self, request):
+        # cadastro, edição no admin, exclusão e geocodificação incrementam a versão
+        return str(VersaoListagem.objects.atual(VersaoListagem.COOPERATIVAS)), None
 
     def get_queryset(self):
         try:
             return Cooperativa.objects.all().order_by('id')
-        except Exception as e:
-            print(f"Erro ao listar cooperativas: {e}")
+        except Exception:
+            logger.exception("Erro ao listar cooperativas")
             return Cooperativa.objects.none()
 
+class CooperativasProximasView(APIView):
+    """As `k` cooperativas mais próximas de `lat`/`lng`, com `distancia_m`, da mais perto
+    para a mais longe. `tipos` (separados por vírgula) restringe às que aceitam todos os
+    tipos de resíduo informados. Resultados cacheados por célula de coordenadas.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    K_PADRAO = 5
+    TIPOS_VALIDOS = {valor for valor, _ in ItemColeta.TIPO_RESIDUO_CHOICES}
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            ponto = ponto_dos_parametros(params)
+            k = int(params.get('k', self.K_PADRAO))
+        except (TypeError, ValueError) as e:
+            return Response({'detail': f'Parâmetros inválidos: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if ponto is None:
+            return Response({'detail': 'Informe lat e lng.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tipos = [t.strip() for t in params.get('tipos', '').split(',') if t.strip()]
+        invalidos = [t for t in tipos if t not in self.TIPOS_VALIDOS]
+        if invalidos:
+            return Response({'detail': f"Tipos de resíduo inválidos: {', '.join(invalidos)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        k = min(max(k, 1), COOPERATIVAS_K_MAXIMO)
+        return Response(cooperativas_proximas(ponto, k, tipos))
+
 # --- View de Login Customizada (Atualizada) ---
 
 
@@ -119,55 +240,53 @@ class CustomLoginView(APIView):
         # Renomeado para 'identifier' para refletir que pode ser email ou documento
         identifier = serializer.validated_data.get('email')
         password = serializer.validated_data.get('password')
-        user = None
-        user_type = None
-
-        # 1) Tenta por email
-        if Produtor.objects.filter(email=identifier).exists():
-            user = Produtor.objects.get(email=identifier)
-            user_type = 'produtor'
-        elif Coletor.objects.filter(email=identifier).exists():
-            user = Coletor.objects.get(email=identifier)
-            user_type = 'coletor'
-        elif Cooperativa.objects.filter(email=identifier).exists():
-            user = Cooperativa.objects.get(email=identifier)
-            user_type = 'cooperativa'
-        else:
-            # 2) Tenta por documento (CPF/CNPJ)
-            # ATUALIZADO: Produtor agora usa 'cpf_cnpj'
-            if Produtor.objects.filter(cpf_cnpj=identifier).exists():
-                user = Produtor.objects.get(cpf_cnpj=identifier)
-                user_type = 'produtor'
-            elif Coletor.objects.filter(cpf=identifier).exists():
-                user = Coletor.objects.get(cpf=identifier)
-                user_type = 'coletor'
-            elif Cooperativa.objects.filter(cnpj=identifier).exists():
-                user = Cooperativa.objects.get(cnpj=identifier)
-                user_type = 'cooperativa'
-
-        if user and user.senha == password:
-            # Determina o nome a ser retornado conforme o tipo de usuário
-            if user_type == 'cooperativa':
-                display_name = getattr(user, 'nome_empresa', None) or getattr(
-                    user, 'nome', None) or getattr(user, 'email', '')
-            else:
-                display_name = getattr(user, 'nome', None) or getattr(
-                    user, 'nome_empresa', None) or getattr(user, 'email', '')
-
-            refresh = RefreshToken()
-            refresh['user_id'] = user.pk
-            refresh['user_type'] = user_type
-            return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-                'user_type': user_type,
-                'name': display_name,
-            }, status=status.HTTP_200_OK)
-
-        return Response(
-            {'detail': 'Nenhuma conta ativa encontrada com as credenciais fornecidas.'},
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+        # Uma única consulta (UNION dos três tipos de conta) resolve email ou CPF/CNPJ
+        conta = resolver_conta(identifier)
+
+        # Sempre verifica (conta None também custa um hash) e regrava senhas antigas
+        if verificar_senha(conta, password):
+            return Response(resposta_login(conta), status=status.HTTP_200_OK)
+
+        return Response({'detail': ERRO_LOGIN}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+ERRO_LOGIN = 'Nenhuma conta ativa encontrada com as credenciais fornecidas.'
+
+
+def resposta_login(conta):
+    refresh = RefreshToken()
+    refresh['user_id'] = conta.pk
+    refresh['user_type'] = conta.user_type
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'user_type': conta.user_type,
+        'name': conta.nome,
+    }
+
+
+@csrf_exempt
+@require_POST
+async def login_assincrono(request):
+    """Variante assíncrona de `CustomLoginView` (`async/login/`), mesmos corpos e status.
+
+    O hash é aguardado no pool de `senhas` (`averificar_senha`): o event loop continua
+    atendendo outras requisições enquanto ele roda.
+    """
+    if request.content_type == 'application/json':
+        try:
+            dados = json.loads(request.body or b'{}')
+        except ValueError as e:
+            return resposta_erro(request, ParseError(f'JSON parse error - {e}'))
+    else:
+        dados = request.POST
+    serializer = LoginSerializer(data=dados)
+    if not serializer.is_valid():
+        return resposta_json(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    conta = await aresolver_conta(serializer.validated_data['email'])
+    if await averificar_senha(conta, serializer.validated_data['password']):
+        return resposta_json(resposta_login(conta))
+    return resposta_json({'detail': ERRO_LOGIN}, status=status.HTTP_401_UNAUTHORIZED)
 
 # --- View para Criar Solicitação de Coleta ---
 
@@ -178,156 +297,537 @@ class SolicitarColetaView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         try:
-            auth_payload = getattr(self.request, 'auth_payload', None)
-            if not auth_payload or 'user_id' not in auth_payload:
-                raise AttributeError
-            user_id = auth_payload.get('user_id')
-            produtor_profile = Produtor.objects.get(pk=user_id)
+            produtor_profile = Produtor.objects.get(pk=self.request.user.pk)
             serializer.save(produtor=produtor_profile)
+            publicar_solicitacoes(SOLICITACAO_CRIADA, [serializer.instance.pk])
         except Produtor.DoesNotExist:
             raise serializers.ValidationError(
                 {"detail": "Perfil de Produtor não encontrado."})
-        except AttributeError:
-            raise serializers.ValidationError(
-                {"detail": "Informação de autenticação não encontrada."})
         except Exception as e:
             raise serializers.ValidationError(
                 {"detail": f"Erro inesperado: {e}"})
 
+class SolicitarColetaLoteView(APIView):
+    """Cria várias solicitações (com seus itens) de uma vez, para condomínios e empresas.
+    Corpo: `{"solicitacoes": [<mesmo formato de coletas/solicitar/>, ...]}`.
+    É tudo ou nada: se alguma entrada for inválida nada é gravado e `erros` traz,
+    na mesma posição da entrada, o que está errado nela.
+    """
+    permission_classes = [IsProdutor]
+    LOTE_MAXIMO = 500
+
+    def post(self, request, *args, **kwargs):
+        entradas = request.data.get('solicitacoes') if isinstance(request.data, dict) else request.data
+        if not isinstance(entradas, list) or not entradas:
+            return Response({'detail': 'Envie uma lista não vazia em "solicitacoes".'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = SolicitacaoColetaCreateSerializer(data=entradas, many=True, max_length=self.LOTE_MAXIMO)
+        if not serializer.is_valid():
+            return Response({'detail': 'Há entradas inválidas no lote.', 'erros': serializer.errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            produtor_profile = Produtor.objects.get(pk=request.user.pk)
+        except Produtor.DoesNotExist:
+            return Response({'detail': 'Perfil de Produtor não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+
+        solicitacoes = serializer.save(produtor=produtor_profile)
+        publicar_solicitacoes(SOLICITACAO_CRIADA, [s.id for s in solicitacoes])
+        return Response({'criadas': len(solicitacoes), 'ids': [s.id for s in solicitacoes]},
+                        status=status.HTTP_201_CREATED)
+
 # --- View para Listar Minhas Solicitações ---
 
 
-class MinhasSolicitacoesView(generics.ListAPIView):
+class VersaoSolicitacoesMixin(GetCondicionalMixin):
+    """Validador das listagens: a versão de `VersaoListagem.SOLICITACOES`.
+
+    É conservador (qualquer mudança invalida todas as listas), mas custa a leitura de
+    uma linha e enxerga solicitações que saíram do filtro.
+    """
+
+    def versao_recurso(self, request):
+        return str(VersaoListagem.objects.atual(VersaoListagem.SOLICITACOES)), None
+
+
+class MinhasSolicitacoesView(VersaoSolicitacoesMixin, generics.ListAPIView):
     serializer_class = SolicitacaoColetaListSerializer
     permission_classes = [IsProdutor]
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         try:
-            auth_payload = getattr(self.request, 'auth_payload', None)
-            if not auth_payload or 'user_id' not in auth_payload:
-                return SolicitacaoColeta.objects.none()
-
-            user_id = auth_payload.get('user_id')
-            produtor_profile = Produtor.objects.get(pk=user_id)
-            return SolicitacaoColeta.objects.filter(produtor=produtor_profile).order_by('-id')
+            produtor_profile = Produtor.objects.get(pk=self.request.user.pk)
+            return SolicitacaoColeta.objects.para_listagem().filter(produtor=produtor_profile).order_by('-id')
         except Produtor.DoesNotExist:
             return SolicitacaoColeta.objects.none()
 
 
-class DisponiveisSolicitacoesView(generics.ListAPIView):
+class DisponiveisSolicitacoesView(VersaoSolicitacoesMixin, generics.ListAPIView):
     """Lista todas as solicitações de coleta disponíveis (status = 'SOLICITADA').
     Usado pelo Coletor/Frontend para ver coletas pendentes no sistema.
     """
     serializer_class = SolicitacaoColetaListSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         try:
-            return SolicitacaoColeta.objects.filter(status='SOLICITADA').order_by('-id')
-        except Exception as e:
-            print(f"Erro ao buscar coletas disponiveis: {e}")
-            return SolicitacaoColeta.objects.none()
-        except Exception as e:
-            print(f"Erro ao buscar solicitações: {e}")
+            return SolicitacaoColeta.objects.para_listagem().filter(status='SOLICITADA').order_by('-id')
+        except Exception:
+            logger.exception("Erro ao buscar coletas disponíveis")
             return SolicitacaoColeta.objects.none()
 
 
-class SolicitacaoColetaDetailView(generics.RetrieveAPIView):
+class PontoDeReferenciaMixin:
+    """Lê o ponto de referência (`lat`/`lng` ou o `geom` do coletor autenticado) e o `raio`."""
+    RAIO_PADRAO_M = 5000
+    RAIO_MAXIMO_M = 50000
+
+    def ponto_e_raio(self, request, params):
+        """Retorna (ponto, raio em metros). Lança ValueError com a mensagem para o cliente."""
+        ponto = ponto_dos_parametros(params)
+        raio = float(params.get('raio', self.RAIO_PADRAO_M))
+        if ponto is None and getattr(request.user, 'user_type', None) == 'coletor':
+            ponto = Coletor.objects.filter(pk=request.user.pk).values_list('geom', flat=True).first()
+        if ponto is None:
+            raise ValueError('Informe lat/lng ou autentique-se como coletor com localização cadastrada.')
+        return ponto, min(max(raio, 0), self.RAIO_MAXIMO_M)
+
+
+class DisponiveisProximasView(PontoDeReferenciaMixin, generics.ListAPIView):
+    """Solicitações disponíveis mais próximas do coletor, da mais perto para a mais longe.
+    O ponto de referência vem de `lat`/`lng` na query string ou, na falta deles, do `geom`
+    do coletor autenticado. `raio` (metros) limita a busca e `limite` o tamanho da resposta.
+    O índice GiST de `produtor.geom` serve só o corte pelo raio; as candidatas dentro dele
+    são ordenadas pela distância (ver `SolicitacaoColetaQuerySet.proximas_de`).
+    """
+    serializer_class = SolicitacaoColetaProximaSerializer
+    permission_classes = [permissions.AllowAny]
+
+    LIMITE_PADRAO = 50
+    LIMITE_MAXIMO = 200
+
+    def list(self, request, *args, **kwargs):
+        try:
+            ponto, raio = self.ponto_e_raio(request, request.query_params)
+            limite = int(request.query_params.get('limite', self.LIMITE_PADRAO))
+        except (TypeError, ValueError) as e:
+            return Response({'detail': f'Parâmetros inválidos: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        limite = min(max(limite, 1), self.LIMITE_MAXIMO)
+        queryset = (
+            SolicitacaoColeta.objects.para_listagem()
+            .filter(status='SOLICITADA')
+            .proximas_de(ponto, raio)[:limite]
+        )
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class SolicitacaoColetaDetailView(GetCondicionalMixin, generics.RetrieveAPIView):
     """Retorna detalhes de uma solicitação de coleta, incluindo os itens."""
-    queryset = SolicitacaoColeta.objects.all()
+    queryset = SolicitacaoColeta.objects.para_detalhe()
     serializer_class = SolicitacaoColetaDetailSerializer
     permission_classes = [permissions.AllowAny]
 
+    def versao_recurso(self, request):
+        ultima = SolicitacaoColeta.objects.filter(pk=self.kwargs['pk']).values_list(
+            'atualizado_em', flat=True).first()
+        return (ultima.isoformat() if ultima else None), ultima
+
 
-class MinhasSolicitacoesColetorView(generics.ListAPIView):
+class MinhasSolicitacoesColetorView(VersaoSolicitacoesMixin, generics.ListAPIView):
     """Lista as solicitações associadas ao coletor autenticado (coletor.coletas).
     Retorna solicitações onde `coletor` == coletor autenticado. Usa o serializer detalhado
     para incluir os itens de coleta no payload, facilitando a exibição no frontend.
     """
     serializer_class = SolicitacaoColetaDetailSerializer
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [IsColetor]
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         try:
-            auth_payload = getattr(self.request, 'auth_payload', None)
-            # tenta extrair token do header se auth_payload não estiver definido
-            if not auth_payload:
-                auth_header = self.request.headers.get('Authorization')
-                if auth_header and auth_header.startswith('Bearer '):
-                    raw_token = auth_header.split(' ')[1]
-                    from rest_framework_simplejwt.authentication import JWTAuthentication
-                    jwt_auth = JWTAuthentication()
-                    try:
-                        validated = jwt_auth.get_validated_token(raw_token)
-                        auth_payload = getattr(validated, 'payload', None)
-                        if auth_payload:
-                            self.request.auth_payload = auth_payload
-                    except Exception:
-                        auth_payload = None
-
-            if not auth_payload or 'user_id' not in auth_payload or auth_payload.get('user_type') != 'coletor':
-                return SolicitacaoColeta.objects.none()
-
-            coletor_id = auth_payload.get('user_id')
-            coletor_profile = Coletor.objects.filter(pk=coletor_id).first()
+            coletor_profile = Coletor.objects.filter(pk=self.request.user.pk).first()
             if not coletor_profile:
                 return SolicitacaoColeta.objects.none()
 
-            return SolicitacaoColeta.objects.filter(coletor=coletor_profile).order_by('-id')
-        except Exception as e:
-            print(f"Erro ao buscar coletas do coletor: {e}")
+            return SolicitacaoColeta.objects.para_detalhe().filter(coletor=coletor_profile).order_by('-id')
+        except Exception:
+            logger.exception("Erro ao buscar coletas do coletor #%s", self.request.user.pk)
             return SolicitacaoColeta.objects.none()
 
 
+class RotaColetorView(APIView):
+    """Ordem sugerida para visitar as coletas ACEITA do coletor autenticado.
+    Parte de `lat`/`lng` (ou do `geom` do coletor) no instante `partida` (ISO 8601, padrão
+    agora) e devolve cada parada com distância do trecho, chegada prevista e atraso em
+    relação a `fim_coleta`. Solicitações cujo produtor ainda não tem `geom` vão em `sem_localizacao`.
+    """
+    permission_classes = [IsColetor]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            ponto = ponto_dos_parametros(params)
+            partida = parse_datetime(params['partida']) if params.get('partida') else timezone.now()
+            if partida is None:
+                raise ValueError('partida deve estar no formato ISO 8601.')
+        except (TypeError, ValueError) as e:
+            return Response({'detail': f'Parâmetros inválidos: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(partida):
+            partida = timezone.make_aware(partida)
+        if ponto is None:
+            ponto = Coletor.objects.filter(pk=request.user.pk).values_list('geom', flat=True).first()
+
+        linhas = (
+            SolicitacaoColeta.objects.filter(coletor_id=request.user.pk, status='ACEITA')
+            .order_by('-id').values('id', 'inicio_coleta', 'fim_coleta', 'produtor__geom')
+        )
+        paradas, sem_localizacao = [], []
+        for linha in linhas:
+            geom = linha['produtor__geom']
+            if geom is None:
+                sem_localizacao.append(linha['id'])
+                continue
+            paradas.append({'id': linha['id'], 'lat': geom.y, 'lng': geom.x,
+                            'inicio': linha['inicio_coleta'], 'fim': linha['fim_coleta']})
+
+        rota = otimizar_rota(paradas, partida, (ponto.y, ponto.x) if ponto is not None else None)
+        return Response({**rota, 'partida': partida, 'sem_localizacao': sem_localizacao})
+
+
 class AcceptSolicitacaoView(APIView):
     """Permite que um Coletor autenticado aceite uma solicitação de coleta.
     O coletor é recuperado a partir do payload de autenticação (como nas outras views).
     """
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [IsColetor]
 
     def post(self, request, pk, *args, **kwargs):
         try:
-            auth_payload = getattr(request, 'auth_payload', None)
-            # Se a autenticação já não foi feita por uma permission (ex: IsProdutor), tentamos extrair o token do header
-            if not auth_payload:
-                auth_header = request.headers.get('Authorization')
-                if auth_header and auth_header.startswith('Bearer '):
-                    raw_token = auth_header.split(' ')[1]
-                    from rest_framework_simplejwt.authentication import JWTAuthentication
-                    jwt_auth = JWTAuthentication()
-                    try:
-                        validated = jwt_auth.get_validated_token(raw_token)
-                        auth_payload = getattr(validated, 'payload', None)
-                        # salva para uso posterior
-                        if auth_payload:
-                            request.auth_payload = auth_payload
-                    except Exception:
-                        auth_payload = None
-
-            if not auth_payload or 'user_id' not in auth_payload or auth_payload.get('user_type') != 'coletor':
-                return Response({'detail': 'Autenticação de coletor necessária.'}, status=status.HTTP_401_UNAUTHORIZED)
-
-            coletor_id = auth_payload.get('user_id')
             try:
-                coletor_profile = Coletor.objects.get(pk=coletor_id)
+                coletor_profile = Coletor.objects.get(pk=request.user.pk)
             except Coletor.DoesNotExist:
                 return Response({'detail': 'Perfil de Coletor não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
 
-            try:
-                solicit = SolicitacaoColeta.objects.get(pk=pk)
-            except SolicitacaoColeta.DoesNotExist:
+            # Um único UPDATE condicional decide quem fica com a solicitação
+            resultado = aceitar_solicitacao(pk, coletor_profile.pk)
+            if resultado == NAO_ENCONTRADA:
                 return Response({'detail': 'Solicitação não encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+            if resultado != ACEITA:
+                return Response({'detail': 'Solicitação já foi aceita por outro coletor ou não está mais disponível.'},
+                                status=status.HTTP_409_CONFLICT)
 
-            # Verifica se a solicitação ainda está disponível
-            if solicit.status != 'SOLICITADA':
-                return Response({'detail': 'Solicitação não está disponível para aceitação.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            solicit.coletor = coletor_profile
-            solicit.status = 'ACEITA'
-            solicit.save()
-
+            publicar_solicitacoes(SOLICITACAO_ACEITA, [pk])
+            solicit = SolicitacaoColeta.objects.para_detalhe().get(pk=pk)
             serializer = SolicitacaoColetaDetailSerializer(solicit)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         except Exception as e:
+            logger.exception("Erro ao aceitar a solicitação #%s", pk)
             return Response({'detail': f'Erro inesperado: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AvaliarSolicitacaoView(APIView):
+    """Produtor avalia o coletor (ou o coletor avalia o produtor) de uma coleta CONFIRMADA.
+    Cada lado avalia uma vez por solicitação; a média do avaliado é atualizada na hora.
+    """
+    permission_classes = [IsProdutor | IsColetor]
+
+    ERROS = {
+        JA_AVALIADA: ('Você já avaliou esta coleta.', status.HTTP_409_CONFLICT),
+        NAO_CONFIRMADA: ('Só é possível avaliar coletas confirmadas.', status.HTTP_409_CONFLICT),
+        NAO_PARTICIPANTE: ('Você não participa desta coleta.', status.HTTP_403_FORBIDDEN),
+    }
+
+    def post(self, request, pk, *args, **kwargs):
+        serializer = AvaliacaoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        resultado, avaliado = avaliar(pk, request.user.user_type, request.user.pk, **serializer.validated_data)
+        if resultado != AVALIADA:
+            detalhe, codigo = self.ERROS.get(resultado, ('Solicitação não encontrada.', status.HTTP_404_NOT_FOUND))
+            return Response({'detail': detalhe}, status=codigo)
+
+        return Response({
+            **serializer.validated_data,
+            'avaliado': {
+                'id': avaliado.pk,
+                'nota_avaliacao_atual': avaliado.nota_avaliacao_atual,
+                'total_avaliacoes': avaliado.total_avaliacoes,
+            },
+        }, status=status.HTTP_201_CREATED)
+
+
+class AceitarProximaSolicitacaoView(PontoDeReferenciaMixin, APIView):
+    """Entrega ao coletor autenticado a solicitação disponível mais próxima, já aceita.
+    Aceita `lat`/`lng`/`raio` no corpo ou na query string; sem coordenadas usa o `geom` do coletor.
+    Coletores concorrentes nunca recebem a mesma solicitação (FOR UPDATE SKIP LOCKED).
+    """
+    permission_classes = [IsColetor]
+
+    def post(self, request, *args, **kwargs):
+        params = request.data if request.data else request.query_params
+        try:
+            ponto, raio = self.ponto_e_raio(request, params)
+        except (TypeError, ValueError) as e:
+            return Response({'detail': f'Parâmetros inválidos: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        pk = aceitar_proxima(request.user.pk, ponto, raio)
+        if pk is None:
+            return Response({'detail': 'Nenhuma solicitação disponível no raio informado.'},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        publicar_solicitacoes(SOLICITACAO_ACEITA, [pk])
+        solicit = SolicitacaoColeta.objects.para_detalhe().get(pk=pk)
+        return Response(SolicitacaoColetaDetailSerializer(solicit).data, status=status.HTTP_200_OK)
+
+
+# --- Pontos do produtor ---
+
+
+class SaldoPontosView(APIView):
+    """Saldo de pontos do produtor autenticado (uma coluna, sem somar o extrato)."""
+    permission_classes = [IsProdutor]
+
+    def get(self, request):
+        saldo = Produtor.objects.filter(pk=request.user.pk).values_list('saldo_pontos', flat=True).first()
+        if saldo is None:
+            return Response({'detail': 'Perfil de Produtor não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'saldo_pontos': saldo})
+
+
+class ExtratoPontosView(generics.ListAPIView):
+    """Lançamentos de pontos do produtor autenticado, do mais recente ao mais antigo."""
+    serializer_class = LancamentoPontosSerializer
+    permission_classes = [IsProdutor]
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        return LancamentoPontos.objects.filter(produtor_id=self.request.user.pk).order_by('-id')
+
+
+class CatalogoRecompensasView(APIView):
+    """Prêmios que podem ser trocados por pontos (`RECOMPENSAS_CATALOGO`)."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        catalogo = getattr(settings, 'RECOMPENSAS_CATALOGO', {})
+        return Response([{'premio': chave, **dados} for chave, dados in catalogo.items()])
+
+
+class RecompensasView(generics.ListAPIView):
+    """GET: vouchers do produtor autenticado. POST `{"premio", "quantidade"}`: troca pontos
+    por vouchers do catálogo (débito do saldo e emissão na mesma transação).
+    """
+    serializer_class = RecompensaSerializer
+    permission_classes = [IsProdutor]
+    pagination_class = RecompensaCursorPagination
+
+    def get_queryset(self):
+        return Recompensa.objects.filter(id_produtor_id=self.request.user.pk).order_by('-id_recompensa')
+
+    def post(self, request, *args, **kwargs):
+        pedido = EmissaoVoucherSerializer(data=request.data)
+        pedido.is_valid(raise_exception=True)
+        try:
+            vouchers, sem_saldo = emitir_vouchers(
+                {request.user.pk: pedido.validated_data['quantidade']}, pedido.validated_data['premio'])
+        except PremioDesconhecido:
+            return Response({'detail': 'Prêmio não encontrado no catálogo.'}, status=status.HTTP_404_NOT_FOUND)
+        if sem_saldo:
+            return Response({'detail': 'Saldo de pontos insuficiente.'}, status=status.HTTP_409_CONFLICT)
+        return Response(RecompensaSerializer(vouchers, many=True).data, status=status.HTTP_201_CREATED)
+
+
+class ResgatarVoucherView(APIView):
+    """Usa um voucher do produtor autenticado: ATIVO -> RESGATADO, uma única vez."""
+    permission_classes = [IsProdutor]
+
+    def post(self, request, *args, **kwargs):
+        resultado = resgatar_voucher(request.data.get('codigo'), produtor_id=request.user.pk)
+        if resultado == JA_RESGATADO:
+            return Response({'detail': 'Voucher já resgatado.'}, status=status.HTTP_409_CONFLICT)
+        if resultado != RESGATADO:
+            return Response({'detail': 'Voucher inválido.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'codigo': normalizar_codigo(request.data.get('codigo')), 'status': 'RESGATADO'})
+
+
+# --- Painel de volumes ---
+
+
+class VolumesResiduoView(APIView):
+    """Volumes de resíduo (solicitado, confirmado, cancelado) por tipo e unidade, lidos dos
+    totais diários (`VolumeResiduoDiario`), sem varrer os itens.
+
+    `entidade`: `produtor` ou `coletor` (o próprio usuário autenticado; padrão conforme o
+    token) ou `cidade` (`cidade=Teresina/PI` para uma só; sem ela, todas). `de`/`ate`
+    (AAAA-MM-DD) limitam o período e `agrupar=dia` abre os totais por dia.
+    """
+    permission_classes = [permissions.AllowAny]
+    COLUNAS = ('itens', 'quantidade_solicitada', 'quantidade_confirmada', 'quantidade_cancelada')
+
+    def get(self, request):
+        params = request.query_params
+        user_type = getattr(request.user, 'user_type', None)
+        entidade = params.get('entidade') or (user_type if user_type in (PRODUTOR, COLETOR) else CIDADE)
+        if entidade not in (PRODUTOR, COLETOR, CIDADE):
+            return Response({'detail': 'entidade deve ser produtor, coletor ou cidade.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        totais = VolumeResiduoDiario.objects.filter(entidade=entidade)
+        agrupamento = ['tipo_residuo', 'unidade_medida']
+        if entidade == CIDADE:
+            if params.get('cidade'):
+                totais = totais.filter(chave=params['cidade'])
+            else:
+                agrupamento.insert(0, 'chave')
+        elif user_type != entidade:
+            return Response({'detail': f'Autentique-se como {entidade} para ver os próprios volumes.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        else:
+            totais = totais.filter(chave=str(request.user.pk))
+
+        for parametro, lookup in (('de', 'dia__gte'), ('ate', 'dia__lte')):
+            if not params.get(parametro):
+                continue
+            try:
+                dia = parse_date(params[parametro])
+            except ValueError:
+                dia = None
+            if dia is None:
+                return Response({'detail': f'Parâmetros inválidos: {parametro} deve ser AAAA-MM-DD.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            totais = totais.filter(**{lookup: dia})
+        if params.get('agrupar') == 'dia':
+            agrupamento.append('dia')
+
+        linhas = (
+            totais.order_by(*agrupamento).values(*agrupamento)
+            .annotate(**{coluna: Sum(coluna) for coluna in self.COLUNAS})
+        )
+        return Response({'entidade': entidade, 'totais': list(linhas)})
+
+
+# --- Leituras assíncronas (ASGI) ---
+# Variantes das listagens e do detalhe mais acessados, com o mesmo corpo, paginação e
+# validadores (ETag/Last-Modified) das views DRF acima. Rotas em `urls.py`.
+
+
+def _usuario(payload):
+    # o mesmo `request.user.pk` que entra no ETag das views síncronas
+    return payload.get('user_id') if payload else None
+
+
+async def _versao_solicitacoes():
+    return str(await VersaoListagem.objects.aatual(VersaoListagem.SOLICITACOES)), None
+
+
+async def _listar(request, payload, versao, queryset, serializer_class, paginacao=IdCursorPagination):
+    async def responder():
+        paginador = paginacao()
+        pagina = await paginador.apaginate_queryset(queryset, request)
+        return resposta_json(paginador.get_paginated_response(serializer_class(pagina, many=True).data).data)
+    return await responder_condicional(request, _usuario(payload), versao, responder)
+
+
+@leitura_assincrona()
+async def disponiveis_assincrona(request, payload):
+    """Variante assíncrona de `DisponiveisSolicitacoesView`."""
+    return await _listar(request, payload, await _versao_solicitacoes(),
+                         SolicitacaoColeta.objects.para_listagem().filter(status='SOLICITADA'),
+                         SolicitacaoColetaListSerializer)
+
+
+@leitura_assincrona(IsProdutor)
+async def minhas_solicitacoes_assincrona(request, payload):
+    """Variante assíncrona de `MinhasSolicitacoesView`."""
+    return await _listar(request, payload, await _versao_solicitacoes(),
+                         SolicitacaoColeta.objects.para_listagem().filter(produtor_id=payload['user_id']),
+                         SolicitacaoColetaListSerializer)
+
+
+@leitura_assincrona(IsColetor)
+async def minhas_solicitacoes_coletor_assincrona(request, payload):
+    """Variante assíncrona de `MinhasSolicitacoesColetorView`."""
+    return await _listar(request, payload, await _versao_solicitacoes(),
+                         SolicitacaoColeta.objects.para_detalhe().filter(coletor_id=payload['user_id']),
+                         SolicitacaoColetaDetailSerializer)
+
+
+@leitura_assincrona()
+async def solicitacao_detalhe_assincrona(request, payload, pk):
+    """Variante assíncrona de `SolicitacaoColetaDetailView`."""
+    ultima = await SolicitacaoColeta.objects.filter(pk=pk).values_list('atualizado_em', flat=True).afirst()
+
+    async def responder():
+        solicitacao = await SolicitacaoColeta.objects.para_detalhe().filter(pk=pk).afirst()
+        if solicitacao is None:
+            raise NotFound(f"No {SolicitacaoColeta._meta.object_name} matches the given query.")
+        return resposta_json(SolicitacaoColetaDetailSerializer(solicitacao).data)
+    return await responder_condicional(request, _usuario(payload), ((ultima.isoformat() if ultima else None), ultima),
+                                       responder)
+
+
+@leitura_assincrona()
+async def cooperativas_assincrona(request, payload):
+    """Variante assíncrona de `CooperativaListView`."""
+    versao = await VersaoListagem.objects.aatual(VersaoListagem.COOPERATIVAS)
+    return await _listar(request, payload, (str(versao), None),
+                         Cooperativa.objects.all(), CooperativaRegistrationSerializer, CooperativaCursorPagination)
+
+
+# --- Eventos em tempo real (SSE) ---
+
+
+async def eventos_solicitacoes(request):
+    """Stream Server-Sent Events de solicitações criadas, aceitas e com status alterado.
+
+    Substitui o polling de `coletas/disponiveis/` e `coletas/minhas/`. O token vai no
+    header Authorization ou em `?token=` (o EventSource do navegador não envia headers).
+    Coletores/cooperativas podem restringir a área com `lat`/`lng`/`raio`; sem eles o
+    coletor usa o próprio `geom`. Deve ser servido pelo ASGI (`reciclaai.asgi`).
+    """
+    raw_token = request.GET.get('token')
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        raw_token = auth_header.split(' ', 1)[1]
+    try:
+        payload = CachedJWTAuthentication().get_payload(raw_token) if raw_token else None
+    except AuthenticationFailed:
+        payload = None
+    if not payload or payload.get('user_id') is None:
+        return JsonResponse({'detail': 'Token de autenticação ausente, inválido ou expirado.'}, status=401)
+
+    user_type, user_id = payload.get('user_type'), payload.get('user_id')
+    try:
+        ponto = ponto_dos_parametros(request.GET)
+        raio = min(max(float(request.GET.get('raio', PontoDeReferenciaMixin.RAIO_PADRAO_M)), 0),
+                   PontoDeReferenciaMixin.RAIO_MAXIMO_M)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'detail': f'Parâmetros inválidos: {e}'}, status=400)
+    if ponto is None and user_type == 'coletor':
+        ponto = await Coletor.objects.filter(pk=user_id).values_list('geom', flat=True).afirst()
+
+    broadcaster = get_broadcaster()
+    assinatura = broadcaster.assinar(FiltroEventos(user_type, user_id, ponto, raio))
+    heartbeat = getattr(settings, 'EVENTOS_HEARTBEAT', 15)
+
+    async def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    evento = await asyncio.wait_for(assinatura.fila.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            broadcaster.cancelar(assinatura)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
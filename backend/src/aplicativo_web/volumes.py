@@ -0,0 +1,200 @@
+# backend/src/aplicativo_web/volumes.py
+"""Totais diários de resíduos por produtor, cidade e coletor (`VolumeResiduoDiario`).
+
+Os totais são mantidos de forma incremental, na mesma transação da escrita que os
+altera: `registrar_itens_criados` quando itens são gravados (inclusive via
+`bulk_create`, que não dispara sinais, por isso as chamadas são explícitas) e
+`registrar_mudanca_status` quando uma solicitação entra ou sai de CONFIRMADA/CANCELADA.
+O dia é a data local de `inicio_coleta`. `manage.py reconstruir_volumes` recalcula tudo
+a partir dos itens para corrigir desvios.
+
+Coletores só têm quantidades confirmadas/canceladas: na criação ainda não há coletor.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import ItemColeta, VolumeResiduoDiario
+
+PRODUTOR = 'produtor'
+COLETOR = 'coletor'
+CIDADE = 'cidade'
+
+# status que têm coluna própria nos totais
+COLUNA_DO_STATUS = {
+    'CONFIRMADA': 'quantidade_confirmada',
+    'CANCELADA': 'quantidade_cancelada',
+}
+COLUNAS = ('itens', 'quantidade_solicitada', 'quantidade_confirmada', 'quantidade_cancelada')
+ZERO = Decimal('0')
+
+
+def chave_cidade(cidade, estado):
+    """Chave da cidade nos totais ('Teresina/PI'); None se o produtor não tem cidade."""
+    cidade = (cidade or '').strip()
+    if not cidade:
+        return None
+    return f"{cidade}/{(estado or '').strip().upper()}"
+
+
+def _entidades(produtor, coletor_id=None):
+    entidades = [(PRODUTOR, str(produtor.pk))]
+    cidade = chave_cidade(produtor.cidade, produtor.estado)
+    if cidade:
+        entidades.append((CIDADE, cidade))
+    if coletor_id is not None:
+        entidades.append((COLETOR, str(coletor_id)))
+    return entidades
+
+
+def _novo_total():
+    return {'itens': 0, 'quantidade_solicitada': ZERO, 'quantidade_confirmada': ZERO,
+            'quantidade_cancelada': ZERO}
+
+
+def _somar(deltas):
+    """UPSERT de vários totais num único INSERT ... ON CONFLICT DO UPDATE com incremento.
+
+    As linhas vão ordenadas pela chave para que transações concorrentes travem as
+    mesmas linhas na mesma ordem (sem deadlock).
+    """
+    linhas = [(*chave, *(valores[c] for c in COLUNAS)) for chave, valores in sorted(deltas.items())
+              if any(valores[c] for c in COLUNAS)]
+    if not linhas:
+        return
+    tabela = VolumeResiduoDiario._meta.db_table
+    marcadores = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(linhas))
+    incrementos = ', '.join(f"{c} = v.{c} + EXCLUDED.{c}" for c in COLUNAS)
+    sql = (
+        f"INSERT INTO {tabela} AS v (entidade, chave, tipo_residuo, unidade_medida, dia, {', '.join(COLUNAS)}) "
+        f"VALUES {marcadores} "
+        f"ON CONFLICT (entidade, chave, tipo_residuo, unidade_medida, dia) DO UPDATE SET {incrementos}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [valor for linha in linhas for valor in linha])
+
+
+def registrar_itens_criados(solicitacoes):
+    """Soma aos totais os itens recém-criados de cada solicitação (com `produtor` carregado).
+
+    `solicitacoes`: pares (solicitação, lista de ItemColeta). Um único comando SQL para
+    o lote todo.
+    """
+    deltas = defaultdict(_novo_total)
+    for solicitacao, itens in solicitacoes:
+        dia = timezone.localdate(solicitacao.inicio_coleta)
+        entidades = _entidades(solicitacao.produtor)
+        for item in itens:
+            for entidade, chave in entidades:
+                total = deltas[(entidade, chave, item.tipo_residuo, item.unidade_medida, dia)]
+                total['itens'] += 1
+                total['quantidade_solicitada'] += item.quantidade
+    _somar(deltas)
+
+
+def registrar_mudanca_status(solicitacao, anterior, novo):
+    """Move as quantidades da solicitação entre as colunas de CONFIRMADA/CANCELADA."""
+    sai, entra = COLUNA_DO_STATUS.get(anterior), COLUNA_DO_STATUS.get(novo)
+    if sai == entra:
+        return
+    por_tipo = (
+        ItemColeta.objects.filter(solicitacao_id=solicitacao.pk).order_by()
+        .values('tipo_residuo', 'unidade_medida').annotate(total=Sum('quantidade'))
+    )
+    dia = timezone.localdate(solicitacao.inicio_coleta)
+    entidades = _entidades(solicitacao.produtor, solicitacao.coletor_id)
+    deltas = defaultdict(_novo_total)
+    for linha in por_tipo:
+        for entidade, chave in entidades:
+            total = deltas[(entidade, chave, linha['tipo_residuo'], linha['unidade_medida'], dia)]
+            if sai:
+                total[sai] -= linha['total']
+            if entra:
+                total[entra] += linha['total']
+    _somar(deltas)
+
+
+# --- Reconstrução ---
+
+
+def _soma(filtro=None):
+    return Coalesce(Sum('quantidade', filter=filtro), Value(ZERO), output_field=DecimalField())
+
+
+def _agregados(queryset, *agrupamento):
+    return (
+        queryset.order_by()
+        .values('tipo_residuo', 'unidade_medida', *agrupamento)
+        .annotate(
+            dia=TruncDate('solicitacao__inicio_coleta'),
+            n_itens=Count('pk'),
+            solicitada=_soma(),
+            confirmada=_soma(Q(solicitacao__status='CONFIRMADA')),
+            cancelada=_soma(Q(solicitacao__status='CANCELADA')),
+        )
+    )
+
+
+def calcular_volumes():
+    """Totais corretos calculados a partir dos itens: {chave da linha: colunas}."""
+    totais = defaultdict(_novo_total)
+
+    def acumular(entidade, chave, linha, com_criacao=True):
+        total = totais[(entidade, chave, linha['tipo_residuo'], linha['unidade_medida'], linha['dia'])]
+        if com_criacao:
+            total['itens'] += linha['n_itens']
+            total['quantidade_solicitada'] += linha['solicitada']
+        total['quantidade_confirmada'] += linha['confirmada']
+        total['quantidade_cancelada'] += linha['cancelada']
+
+    for linha in _agregados(ItemColeta.objects.all(), 'solicitacao__produtor_id'):
+        acumular(PRODUTOR, str(linha['solicitacao__produtor_id']), linha)
+    for linha in _agregados(ItemColeta.objects.all(), 'solicitacao__produtor__cidade',
+                            'solicitacao__produtor__estado'):
+        cidade = chave_cidade(linha['solicitacao__produtor__cidade'], linha['solicitacao__produtor__estado'])
+        if cidade:
+            acumular(CIDADE, cidade, linha)
+    finalizadas = ItemColeta.objects.filter(
+        solicitacao__coletor__isnull=False, solicitacao__status__in=list(COLUNA_DO_STATUS))
+    for linha in _agregados(finalizadas, 'solicitacao__coletor_id'):
+        acumular(COLETOR, str(linha['solicitacao__coletor_id']), linha, com_criacao=False)
+    return totais
+
+
+def armazenados():
+    return {
+        (v.entidade, v.chave, v.tipo_residuo, v.unidade_medida, v.dia): {c: getattr(v, c) for c in COLUNAS}
+        for v in VolumeResiduoDiario.objects.all()
+    }
+
+
+def divergencias(corretos, atuais):
+    """Chaves cujo total armazenado difere do calculado (linhas zeradas contam como ausentes)."""
+    def normalizar(valores):
+        return None if valores is None or not any(valores[c] for c in COLUNAS) else valores
+    chaves = set(corretos) | set(atuais)
+    return sorted(k for k in chaves if normalizar(corretos.get(k)) != normalizar(atuais.get(k)))
+
+
+def reconstruir_volumes(lote=1000):
+    """Recalcula todos os totais. Retorna quantas linhas foram gravadas.
+
+    A tabela fica travada para escrita durante a reconstrução: quem criar itens ou mudar
+    status espera e soma depois, sobre os totais já reconstruídos, sem contar duas vezes.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {VolumeResiduoDiario._meta.db_table} IN EXCLUSIVE MODE")
+        totais = calcular_volumes()
+        VolumeResiduoDiario.objects.all().delete()
+        VolumeResiduoDiario.objects.bulk_create([
+            VolumeResiduoDiario(entidade=entidade, chave=chave, tipo_residuo=tipo,
+                                unidade_medida=unidade, dia=dia, **valores)
+            for (entidade, chave, tipo, unidade, dia), valores in totais.items()
+        ], batch_size=lote)
+    return len(totais)
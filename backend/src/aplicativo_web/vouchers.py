@@ -0,0 +1,173 @@
+# backend/src/aplicativo_web/vouchers.py
+"""Emissão e resgate de vouchers (`Recompensa`) pagos com pontos.
+
+Códigos sem colisão e sem tentativa-e-erro: cada voucher recebe um número da sequência
+`recompensa_voucher_seq` (reservada em blocos, um comando para o lote todo), que é
+embaralhado por uma permutação de Feistel de 40 bits com chave secreta. Como a
+permutação é bijetora, números distintos dão códigos distintos, e sem a chave os
+códigos não revelam a ordem de emissão nem permitem adivinhar os vizinhos. O código
+tem 8 símbolos base32 (Crockford) mais um dígito verificador: 'ABCD-EFGH-K'.
+
+A chave é `VOUCHER_CHAVE`, obrigatória e estável: com outra chave, números novos podem
+cair em códigos já emitidos. Por isso ela não deriva da SECRET_KEY (que se troca), e
+sem ela a aplicação não sobe (`verificar_chave`, chamado no `ready`).
+"""
+
+import hashlib
+import hmac
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models.functions import Now
+
+from .models import LancamentoPontos, Produtor, Recompensa
+
+ALFABETO = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+BITS = 40
+SEQUENCIA = 'recompensa_voucher_seq'
+
+RESGATADO = 'resgatado'
+JA_RESGATADO = 'ja_resgatado'
+INVALIDO = 'invalido'
+
+
+class PremioDesconhecido(Exception):
+    """O prêmio não está em `RECOMPENSAS_CATALOGO`."""
+
+
+def verificar_chave():
+    if not getattr(settings, 'VOUCHER_CHAVE', None):
+        raise ImproperlyConfigured(
+            "Defina VOUCHER_CHAVE (fixa, nunca trocada): é a chave dos códigos de voucher.")
+
+
+def _chave():
+    verificar_chave()
+    return hashlib.sha256(settings.VOUCHER_CHAVE.encode()).digest()
+
+
+def _embaralhar(numero, chave):
+    """Permutação de Feistel (4 rodadas, metades de 20 bits) sobre [0, 2**40)."""
+    metade = BITS // 2
+    mascara = (1 << metade) - 1
+    esquerda, direita = numero >> metade, numero & mascara
+    for rodada in range(4):
+        f = hmac.new(chave, bytes([rodada]) + direita.to_bytes(3, 'big'), hashlib.sha256).digest()
+        esquerda, direita = direita, esquerda ^ (int.from_bytes(f[:3], 'big') & mascara)
+    return (esquerda << metade) | direita
+
+
+def _digito_verificador(simbolos):
+    """Luhn mod 32: pega qualquer símbolo trocado e a maioria das transposições."""
+    fator, soma = 2, 0
+    for simbolo in reversed(simbolos):
+        valor = fator * ALFABETO.index(simbolo)
+        soma += valor // 32 + valor % 32
+        fator = 1 if fator == 2 else 2
+    return ALFABETO[(32 - soma % 32) % 32]
+
+
+def codigo_do_numero(numero, chave=None):
+    valor = _embaralhar(numero, chave or _chave())
+    simbolos = ''.join(ALFABETO[(valor >> (5 * i)) & 31] for i in reversed(range(BITS // 5)))
+    return f"{simbolos[:4]}-{simbolos[4:]}-{_digito_verificador(simbolos)}"
+
+
+def normalizar_codigo(codigo):
+    """Forma canônica do código digitado (caixa, hífens, O/I/L), ou None se inválido."""
+    texto = str(codigo or '').upper().replace('-', '').replace(' ', '')
+    texto = texto.translate(str.maketrans({'O': '0', 'I': '1', 'L': '1'}))
+    if len(texto) != BITS // 5 + 1 or any(c not in ALFABETO for c in texto):
+        return None
+    simbolos, digito = texto[:-1], texto[-1]
+    if _digito_verificador(simbolos) != digito:
+        return None
+    return f"{simbolos[:4]}-{simbolos[4:]}-{digito}"
+
+
+def gerar_codigos(quantidade):
+    """Reserva `quantidade` números da sequência num único comando e os converte em códigos."""
+    if quantidade <= 0:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT nextval('{SEQUENCIA}') FROM generate_series(1, %s)", [quantidade])
+        numeros = [linha[0] for linha in cursor.fetchall()]
+    chave = _chave()
+    return [codigo_do_numero(numero, chave) for numero in numeros]
+
+
+def premio(nome):
+    catalogo = getattr(settings, 'RECOMPENSAS_CATALOGO', {})
+    if nome not in catalogo:
+        raise PremioDesconhecido(nome)
+    return catalogo[nome]
+
+
+def _debitar(debitos, lote):
+    """`saldo_pontos = saldo_pontos - total` para vários produtores num UPDATE ... FROM (VALUES)."""
+    tabela = Produtor._meta.db_table
+    for inicio in range(0, len(debitos), lote):
+        parte = debitos[inicio:inicio + lote]
+        valores = ', '.join(['(%s, %s::numeric)'] * len(parte))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {tabela} AS p SET saldo_pontos = p.saldo_pontos - v.total "
+                f"FROM (VALUES {valores}) AS v(id, total) WHERE p.id = v.id",
+                [valor for debito in parte for valor in debito])
+
+
+def emitir_vouchers(pedidos, nome_premio, lote=1000):
+    """Emite vouchers do prêmio `nome_premio` do catálogo, debitando os pontos.
+
+    `pedidos`: {produtor_id: quantidade}. Tudo numa transação: os produtores são
+    travados em ordem de id (campanhas simultâneas não se travam mutuamente), quem não
+    tem saldo para o pedido todo fica de fora, e para os demais o débito do saldo (atômico,
+    sobre as linhas já travadas), os lançamentos RESGATE e os vouchers são gravados em massa.
+    Retorna (vouchers emitidos, ids dos produtores sem saldo).
+    """
+    dados = premio(nome_premio)
+    custo = Decimal(str(dados['custo_pontos']))
+    pedidos = {pk: quantidade for pk, quantidade in pedidos.items() if quantidade > 0}
+
+    with transaction.atomic():
+        saldos = dict(
+            Produtor.objects.select_for_update().filter(pk__in=list(pedidos)).order_by('pk')
+            .values_list('pk', 'saldo_pontos')
+        )
+        atendidos = {pk: q for pk, q in pedidos.items() if pk in saldos and saldos[pk] >= custo * q}
+        sem_saldo = sorted(set(pedidos) - set(atendidos))
+
+        codigos = iter(gerar_codigos(sum(atendidos.values())))
+        vouchers, lancamentos = [], []
+        for pk, quantidade in sorted(atendidos.items()):
+            for _ in range(quantidade):
+                codigo = next(codigos)
+                vouchers.append(Recompensa(
+                    id_produtor_id=pk, codigo_voucher=codigo, nome_premio=dados['nome_premio'],
+                    loja_parceira=dados['loja_parceira'], status='ATIVO', custo_pontos=custo))
+                lancamentos.append(LancamentoPontos(
+                    produtor_id=pk, tipo='RESGATE', pontos=-custo, chave_idempotencia=f"voucher:{codigo}"))
+
+        _debitar(sorted((pk, custo * q) for pk, q in atendidos.items()), lote)
+        Recompensa.objects.bulk_create(vouchers, batch_size=lote)
+        LancamentoPontos.objects.bulk_create(lancamentos, batch_size=lote)
+    return vouchers, sem_saldo
+
+
+def resgatar_voucher(codigo, produtor_id=None):
+    """Marca o voucher como RESGATADO num único UPDATE condicional (status = 'ATIVO').
+
+    Dois resgates simultâneos do mesmo código: só um vê 1 linha afetada. Com
+    `produtor_id`, só o dono resgata. Retorna RESGATADO, JA_RESGATADO ou INVALIDO.
+    """
+    codigo = normalizar_codigo(codigo)
+    if codigo is None:
+        return INVALIDO
+    vouchers = Recompensa.objects.filter(codigo_voucher=codigo)
+    if produtor_id is not None:
+        vouchers = vouchers.filter(id_produtor_id=produtor_id)
+    if vouchers.filter(status='ATIVO').update(status='RESGATADO', resgatado_em=Now()):
+        return RESGATADO
+    return JA_RESGATADO if vouchers.exists() else INVALIDO
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'aplicativo_web.metricas.MetricasMiddleware',
+    'aplicativo_web.rastreamento.RastreamentoMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -113,6 +115,14 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# O primeiro grava os hashes novos; os demais só conferem hashes antigos (e forçam rehash).
+# Só hashers da biblioteca padrão: Argon2/bcrypt exigiriam argon2-cffi/bcrypt instalados.
+PASSWORD_HASHERS = [
+    'aplicativo_web.senhas.PBKDF2Ajustavel',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -142,12 +152,117 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 REST_FRAMEWORK = {
-    # 'DEFAULT_AUTHENTICATION_CLASSES': (
-    #     'rest_framework_simplejwt.authentication.JWTAuthentication',
-    # )
+    # JWT decodificado uma vez por requisição, com cache dos tokens já verificados
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'aplicativo_web.authentication.CachedJWTAuthentication',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
          'rest_framework.permissions.AllowAny', # Permite acesso por padrão
-     )
+     ),
+    # JSON com o tempo de codificação medido (aplicativo_web/metricas.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'aplicativo_web.metricas.JSONRendererMedido',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+# Quantos payloads de JWT verificados ficam em memória (aplicativo_web/authentication.py)
+JWT_CACHE_TAMANHO = 4096
+
+# Paginação por cursor das listagens (aplicativo_web/pagination.py)
+PAGINACAO_PAGE_SIZE = 20
+PAGINACAO_MAX_PAGE_SIZE = 100
+
+# Geocodificação (aplicativo_web/geocoding.py)
+# Em testes/desenvolvimento sem rede: 'aplicativo_web.geocoding.GeocoderLocal'
+GEOCODER_BACKEND = 'aplicativo_web.geocoding.GeocoderComCache'
+GEOCODER_UPSTREAM = 'aplicativo_web.geocoding.NominatimGeocoder'
+GEOCODER_TIMEOUT = 5  # segundos
+GEOCODER_INTERVALO_MINIMO = 1.0  # segundos entre chamadas ao Nominatim
+GEOCODE_CACHE_TAMANHO = 10000  # entradas no LRU em memória
+GEOCODE_CACHE_TTL = 30 * 86400  # segundos
+GEOCODE_CACHE_TTL_NEGATIVO = 86400  # endereços não encontrados
+GEOCODING_MAX_TENTATIVAS = 5
+GEOCODING_BACKOFF_BASE = 30  # segundos; dobra a cada tentativa
+GEOCODING_BACKOFF_MAXIMO = 3600
+# quanto tempo um worker fica com as tarefas que reservou (lote de até 50 chamadas com
+# timeout e intervalo mínimo); vencida a reserva, outro worker pode pegá-las
+GEOCODING_RESERVA = 600  # segundos
+
+# Eventos em tempo real (aplicativo_web/eventos.py); o broadcaster padrão é por processo
+EVENTOS_BROADCASTER = 'aplicativo_web.eventos.BroadcasterEmProcesso'
+EVENTOS_HEARTBEAT = 15  # segundos entre comentários keep-alive do SSE
+EVENTOS_TAMANHO_FILA = 100  # eventos pendentes por conexão
+
+# Cooperativas próximas (aplicativo_web/cooperativas.py), no cache padrão do Django.
+# Com vários processos, use um cache compartilhado para a invalidação valer em todos.
+COOPERATIVAS_CELULA_GRAUS = 0.01  # ~1,1 km de lado
+COOPERATIVAS_CACHE_TTL = 300  # segundos
+
+# Otimização da rota do coletor (aplicativo_web/rotas.py)
+ROTA_VELOCIDADE_KMH = 25  # velocidade média no trânsito urbano
+ROTA_FATOR_DESVIO = 1.3  # trajeto pelas ruas / distância em linha reta
+ROTA_TEMPO_ATENDIMENTO_MIN = 10  # minutos parado em cada coleta
+ROTA_ORCAMENTO_MS = 500  # tempo máximo de cálculo por requisição
+
+# Pontos por coleta confirmada (aplicativo_web/pontos.py):
+# quantidade x pontos do tipo x fator da unidade
+PONTOS_POR_TIPO = {'Plástico': 10, 'Metal': 15, 'Papel': 5, 'Vidro': 4}
+PONTOS_FATOR_UNIDADE = {'KG': 1, 'UN': 0.2, 'VOLUME': 2}
+
+# Vouchers trocados por pontos (aplicativo_web/vouchers.py). VOUCHER_CHAVE é a chave da
+# permutação dos códigos: obrigatória fora do DEBUG e nunca trocada depois do primeiro
+# voucher (outra chave pode repetir códigos já emitidos). Sem ela a aplicação não sobe.
+VOUCHER_CHAVE = os.environ.get('VOUCHER_CHAVE') or ('desenvolvimento-vouchers' if DEBUG else None)
+RECOMPENSAS_CATALOGO = {
+    'cupom-mercado-10': {'nome_premio': 'Cupom de R$ 10 no mercado', 'loja_parceira': 'Mercado Parceiro',
+                         'custo_pontos': 100},
+    'muda-arvore': {'nome_premio': 'Muda de árvore nativa', 'loja_parceira': 'Viveiro Municipal',
+                    'custo_pontos': 50},
+}
+
+# Métricas por requisição (aplicativo_web/metricas.py): header Server-Timing e /metrics.
+# /metrics exige 'Authorization: Bearer <METRICAS_TOKEN>'; sem token, só responde com DEBUG.
+# O Server-Timing vai para qualquer cliente (inclusive anônimo): só em desenvolvimento.
+METRICAS_SERVER_TIMING = DEBUG
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+
+# Rastreamento (aplicativo_web/rastreamento.py): fração das requisições com spans de
+# autenticação, banco e geocodificação; acima de RASTREAMENTO_LENTO_MS sempre há um resumo.
+RASTREAMENTO_AMOSTRAGEM = float(os.environ.get('RASTREAMENTO_AMOSTRAGEM', 0.01))
+RASTREAMENTO_LENTO_MS = 1000
+
+# Senhas (aplicativo_web/senhas.py): iterações do PBKDF2 (padrão do Django: 1.000.000) e
+# threads do pool de verificação (padrão: uma por núcleo). Meça com `benchmark_senhas`
+# antes de mudar; o login regrava cada hash com o valor novo.
+SENHAS_PBKDF2_ITERACOES = int(os.environ.get('SENHAS_PBKDF2_ITERACOES', 1_000_000))
+SENHAS_THREADS = None
+
+# Leituras assíncronas (aplicativo_web/assincrono.py): as variantes async de disponíveis,
+# minhas, minhas_coletor, detalhe e cooperativas ficam sempre em /api/async/...; com
+# LEITURAS_ASSINCRONAS=1 elas passam a responder também nas rotas canônicas. Só vale a
+# pena servido pelo ASGI (reciclaai.asgi); compare com `benchmark_api --asgi`.
+LEITURAS_ASSINCRONAS = os.environ.get('LEITURAS_ASSINCRONAS') == '1'
+
+# Logs em JSON, escritos por uma thread a partir de uma fila (aplicativo_web/logs.py);
+# com a fila cheia os registros são descartados em vez de segurar a requisição.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'requisicao': {'()': 'aplicativo_web.logs.FiltroRequisicao'},
+    },
+    'handlers': {
+        'fila': {
+            'class': 'aplicativo_web.logs.HandlerEmFila',
+            'filters': ['requisicao'],
+            'tamanho': 10000,
+        },
+    },
+    'root': {'handlers': ['fila'], 'level': 'WARNING'},
+    'loggers': {
+        'aplicativo_web': {'level': os.environ.get('LOG_LEVEL', 'INFO')},
+    },
 }
 
 # CORS (development helper)
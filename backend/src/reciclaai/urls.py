@@ -16,10 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, re_path, include
-from aplicativo_web.views import spa
+from aplicativo_web.views import metricas, spa
 
 urlpatterns = [
     path("admin/", admin.site.urls),               # only here (remove any duplicates elsewhere)
     path("api/", include("aplicativo_web.urls")),  # all your API endpoints
+    path("metrics", metricas, name="metricas"),    # Prometheus (aplicativo_web/metricas.py)
     re_path(r"^(?!api/).*$", spa, name="spa"),     # everything else -> React index.html
 ]
\ No newline at end of file
@@ -174,7 +174,8 @@ export default function ColetorHome() {
       try {
         setLoading(true);
         const resp = await api.request("/api/coletas/disponiveis/");
-        const dados = await resp.json();
+        const json = await resp.json();
+        const dados = Array.isArray(json) ? json : (json && Array.isArray(json.results) ? json.results : []);
         console.log("=== DADOS RECEBIDOS DA API ===");
         console.log("Coletas:", dados);
         if (dados.length > 0) {
@@ -345,8 +346,8 @@ const cancelarColetaOuEntrega = async () => {
     // Recarrega lista
     setLoading(true);
     const resp = await api.request("/api/coletas/disponiveis/");
-    const dados = await resp.json();
-    setColetas(dados);
+    const json = await resp.json();
+    setColetas(Array.isArray(json) ? json : (json && Array.isArray(json.results) ? json.results : []));
     setLoading(false);
 
   } catch (err) {
@@ -384,8 +385,8 @@ const cancelarColetaOuEntrega = async () => {
       // Recarrega a lista de coletas
       setLoading(true);
       const resp = await api.request("/api/coletas/disponiveis/");
-      const dados = await resp.json();
-      setColetas(dados);
+      const json = await resp.json();
+      setColetas(Array.isArray(json) ? json : (json && Array.isArray(json.results) ? json.results : []));
       setLoading(false);
     } catch (e) {
       console.error("Erro ao concluir entrega:", e);
@@ -27,8 +27,8 @@ const ProdutorSolicitacoes = () => {
       const resp = await apiFetch.request('/api/coletas/minhas/');
       if (!resp.ok) throw new Error(`Erro na requisição: ${resp.status}`);
       const data = await resp.json();
-      // assumir que o backend retorna um array de solicitações
-      setSolicitacoes(Array.isArray(data) ? data : []);
+      // listagem paginada por cursor: os itens vêm em `results`
+      setSolicitacoes(Array.isArray(data) ? data : (data && Array.isArray(data.results) ? data.results : []));
     } catch (err: any) {
       setError(err.message || 'Erro desconhecido ao buscar solicitações');
     } finally {